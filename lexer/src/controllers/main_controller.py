@@ -1,130 +1,409 @@
 # lexer/src/controllers/main_controller.py
 
-import os
 import re
-import contextlib, io
 import textwrap
-from lexer.src.models.regex_parser import RegexParser
-from lexer.src.models.syntax_tree import SyntaxTree
-from lexer.src.models.dfa import DFA
+import time
+from lexer.src.models.regex_parser import decode_escapes
+from lexer.src.models.dfa import DFABudgetExceeded
+from lexer.src.models.lazydfa import compile_lazy_rules
+from lexer.src.models.productdfa import compile_rules, product_dfa
 from lexer.src.models.yalex_parser import YALexParser
 from lexer.src.models.mindfa import minimize_dfa
 
 
-def generate_global_dfa():
+# Caracteres que escape_literal escribe con su escape de nombre: un salto de
+# línea literal se perdería al quitar los saltos de línea de la regla
+NAMED_ESCAPES = {'\n': '\\n', '\t': '\\t', '\r': '\\r'}
+
+# Un literal YALex entre comillas dobles o simples (con comillas escapadas dentro)
+QUOTED_LITERAL = re.compile(r'"((?:[^"\\]|\\.)*)"|\'((?:[^\'\\]|\\.)*)\'')
+
+
+def escape_literal(literal):
     """
-    Genera un DFA global a partir de la especificación en 'inputs/lexer.yal',
-    asignando un marcador único a cada regla y combinándolas en una única expresión regular.
+    Convierte el contenido de un literal YALex en texto para RegexParser:
+    decodifica una vez sus escapes (\\n, \\t, \\', \\xNN...) y vuelve a escapar
+    cada carácter no alfanumérico, incluido '_', que sin escapar es el comodín
+    de YALex.
     """
-    spec_filename = "inputs/lexer.yal"
-    yalex_parser = YALexParser(spec_filename)
-    yalex_parser.parse()
-    
-    global_rules = []
-    marker_to_rule = {}
-    
-    special = {
-        '#': r'\#',
-        '.': r'\.',
-        '{': r'\{',
-        '}': r'\}',
-    }
+    out = []
+    for ch in decode_escapes(literal):
+        if ch in NAMED_ESCAPES:
+            out.append(NAMED_ESCAPES[ch])
+        elif ch.isalnum():
+            out.append(ch)
+        else:
+            out.append('\\' + ch)
+    return "".join(out)
+
+
+def expand_rule_regex(yalex_parser, regex_str):
+    """
+    Convierte los usos de definiciones de una regla YALex en referencias {ident}
+    y escapa sus literales para que RegexParser la entienda. Devuelve None si la
+    regla está vacía.
+    """
+    # Limpieza de la regex: eliminar '|' inicial y espacios
+    regex_str_clean = regex_str.lstrip("| ").strip()
+    if not regex_str_clean:
+        return None
+    # 1) Referencias a definiciones (no se copia su texto)
+    expanded_regex = yalex_parser.reference_definitions(regex_str_clean)
+    # 2) Cada literal entre comillas (también los de las clases [...]) se
+    #    escapa en una sola pasada de izquierda a derecha
+    expanded_regex = QUOTED_LITERAL.sub(
+        lambda m: escape_literal(m.group(1) if m.group(1) is not None else m.group(2)),
+        expanded_regex
+    )
+    # 3) Quitar saltos de línea (sin tocar espacios)
+    return expanded_regex.replace("\n", "")
 
+
+def definition_regexes(yalex_parser):
+    """
+    Devuelve [(ident, expresión)] con cada definición 'let' escapada para
+    RegexParser, en orden de dependencias (lanza ValueError si hay ciclos o
+    una definición vacía). Es la forma en que las definiciones viajan a los
+    procesos de compile_rules y al lexer generado.
+    """
+    regexes = []
+    for ident in yalex_parser.definition_order():
+        regex = expand_rule_regex(yalex_parser, yalex_parser.definitions[ident])
+        if regex is None:
+            raise ValueError(f"Definición vacía: '{ident}'")
+        regexes.append((ident, regex))
+    return regexes
+
+
+# Presupuestos de construcción de cada AFD (por regla y global); None = sin límite
+STATE_BUDGET = 20000
+TRANSITION_BUDGET = 2000000
+TIME_BUDGET = 30.0
+
+
+def build_global_dfa(yalex_parser, state_budget=STATE_BUDGET,
+                     transition_budget=TRANSITION_BUDGET, time_budget=TIME_BUDGET,
+                     workers=None, cache=None):
+    """
+    Construye el DFA global de una especificación YALex ya parseada.
+    Cada regla se compila y minimiza por separado (compile_rules), en paralelo
+    con 'workers' procesos (None = uno por núcleo si hay al menos
+    PARALLEL_MIN_RULES reglas, 1 = en este proceso), y los
+    AFD de las reglas se combinan con una construcción producto en la que cada
+    estado acepta con la regla de menor 'order' (product_dfa). El resultado se
+    minimiza sin mezclar estados que aceptan reglas distintas.
+    cache (p. ej. un dict o un shelve) guarda el AFD de cada regla: al volver
+    a generar sólo se construyen las reglas nuevas o modificadas.
+    Una regla cuyo AFD estimado (estimate_dfa_states) o construido supera los
+    presupuestos no entra al DFA global: se reconoce con el LazyDFA de las
+    reglas perezosas (compile_lazy_rules). Si es el producto el que los
+    supera, se pasa a LazyDFA la regla con más estados y se vuelve a intentar.
+    time_budget es también el plazo de toda la construcción: cada intento del
+    producto recibe sólo el tiempo que queda y, agotado el plazo, las reglas
+    que quedan pasan a LazyDFA sin más intentos (el de cada regla en
+    compile_rules es por regla, para que la caché no dependa del reloj).
+    Devuelve (global_dfa, global_regex, global_rules, lazy_rules, lazy_dfa),
+    con global_dfa ya congelado (CompiledDFA), global_rules la info de las
+    reglas del DFA global, lazy_rules = [(info de la regla, expresión)] las
+    reglas perezosas en orden y lazy_dfa su LazyDFA (None si no hay);
+    global_regex (la alternancia de las reglas del DFA global) queda sólo
+    como referencia.
+    """
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    budget = {'state_budget': state_budget, 'transition_budget': transition_budget,
+              'time_budget': time_budget}
+    definitions = definition_regexes(yalex_parser)
+
+    rules = []
     for i, (regex_str, action_code) in enumerate(yalex_parser.rules):
-        regex_clean = regex_str.lstrip("| ").strip()
-        if not regex_clean:
-            continue
+        escaped = expand_rule_regex(yalex_parser, regex_str)
+        if escaped is not None:
+            rules.append(({'order': i, 'action': action_code}, escaped))
+    # Un AFD mínimo por regla; None si la regla supera los presupuestos
+    automata = compile_rules([escaped for _, escaped in rules], definitions,
+                             workers=workers, cache=cache, **budget)
+    eager_rules = [(info, escaped, automaton)
+                   for (info, escaped), automaton in zip(rules, automata) if automaton is not None]
+    lazy = [(info, escaped)
+            for (info, escaped), automaton in zip(rules, automata) if automaton is None]
 
-        if regex_clean == "ws":
-            # expandimos la definición y la metemos tal cual:
-            expanded = yalex_parser.expand_definitions("ws").replace("\n", "").strip()
-            # No la escapamos ni tocamos más, porque es algo como "(([' ' '\t'])+)"
-            escaped = expanded
-            # Y seguimos con el flujo normal de marcado…
-        else:
-            expanded = yalex_parser.expand_definitions(regex_clean).replace("\n", "").strip()
-
-        # Depuración extra para ver qué estamos recibiendo
-        # print(f"[RAW   ] Regla {i+1}: regex_str={regex_str!r}, expanded={expanded!r}")
-
-        # Caso A: literal entre comillas
-        if expanded == "'":
-            # un solo apóstrofo: lo representamos como carácter escapado \'
-            escaped = r"\'"
-            # print(f"[SPECIAL] Regla {i+1}: literal suelto {expanded!r} → escaped={escaped!r}")
-        elif expanded == '"':
-            # una sola comilla doble → \"
-            escaped = r'\"'
-            # print(f"[SPECIAL] Regla {i+1}: literal suelto {expanded!r} → escaped={escaped!r}")
-            lit = expanded[1:-1]
-            if lit == r"\n":
-                escaped = r"\n"
-            else:
-                escaped = special.get(lit, re.escape(lit))
-
-        # Caso B: cualquier carácter único no alfanumérico
-        elif len(expanded) == 1 and not expanded.isalnum():
-            escaped = special.get(expanded, re.escape(expanded))
-
-        # Caso C: expresiones más complejas
-        else:
-            escaped = re.sub(r'"([^"]*)"', lambda m: re.escape(m.group(1)), expanded)
-            escaped = re.sub(r"'([^']*)'", lambda m: re.escape(m.group(1)), escaped)
-
-        # Vuelta de depuración para verificar
-        # print(f"[ESCAPED] Regla {i+1}: escaped={escaped!r}")
-
-        # Marcador y resto idéntico al tuyo…
-        marker = chr(128 + i)
-        marker_to_rule[marker] = {'order': i, 'action': action_code}
-        '''
-        # ——— DEPURACIÓN: tokenización del trozo completo ———
-        debug_regex = escaped + "#"
-        print(f"[DEBUG] Regla {i+1}: expresion a tokenizar → {debug_regex!r}")
+    while True:
+        remaining = None if deadline is None else deadline - time.perf_counter()
+        if remaining is not None and remaining <= 0:
+            # Sin tiempo para otro intento: las reglas que quedan pasan a LazyDFA
+            lazy.extend((info, escaped) for info, escaped, _ in eager_rules)
+            eager_rules = []
+            remaining = None
         try:
-            tokens = RegexParser(debug_regex).tokenize()
-            print(f"[DEBUG] Tokens: {[str(t) for t in tokens]}")
-        except ValueError as e:
-            print(f"[ERROR] fallo tokenizando regla {i+1}: {e}")
-            raise
-        # ——— fin depuración ———
-        '''
-        global_rules.append(f"{escaped}{marker}")
+            global_dfa = product_dfa([automaton for _, _, automaton in eager_rules],
+                                     [info for info, _, _ in eager_rules],
+                                     state_budget=state_budget,
+                                     transition_budget=transition_budget, time_budget=remaining)
+            break
+        except DFABudgetExceeded:
+            # La combinación de reglas explota: la regla más grande pasa a LazyDFA
+            largest = max(range(len(eager_rules)), key=lambda k: len(eager_rules[k][2]))
+            info, escaped, _ = eager_rules.pop(largest)
+            lazy.append((info, escaped))
+    # Las tablas se entregan siempre minimizadas (un bloque inicial por regla)
+    global_dfa = minimize_dfa(global_dfa)
 
-    
-    # Combina todas las expresiones en una única expresión global con alternancia
-    global_regex = "|".join(f"({r})" for r in global_rules)
+    # Las reglas se identifican por su 'order' en los estados, no con símbolos:
+    # la expresión global es sólo la alternancia de las reglas del DFA
+    global_rules = [info for info, _, _ in eager_rules]
+    global_regex = "|".join(f"({escaped})" for _, escaped, _ in eager_rules)
+
+    lazy.sort(key=lambda rule: rule[0]['order'])
+    lazy_dfa = compile_lazy_rules(lazy, definitions) if lazy else None
+    # Sólo las tablas sobreviven: la construcción (árboles, conjuntos de estados) se libera
+    return global_dfa.freeze(), global_regex, global_rules, lazy, lazy_dfa
+
+
+def generate_global_dfa(spec_filename="inputs/lexer.yal", state_budget=STATE_BUDGET,
+                        transition_budget=TRANSITION_BUDGET, time_budget=TIME_BUDGET):
+    """
+    Genera un DFA global a partir de la especificación en 'inputs/lexer.yal',
+    compilando cada regla por separado y combinándolas con una construcción producto.
+    Los presupuestos (None = sin límite) pasan a build_global_dfa.
+    """
+    yalex_parser = YALexParser(spec_filename)
+    yalex_parser.parse()
+
+    global_dfa, global_regex, _, _, _ = build_global_dfa(
+        yalex_parser, state_budget=state_budget, transition_budget=transition_budget,
+        time_budget=time_budget)
     print("Expresión global generada:", global_regex)
-    
-    
-    # Remueve cualquier salto de línea que pueda quedar en la expresión global —> Comentado para no romper literales \n, \t dentro de []
-    # global_regex = global_regex.replace("\n", "").replace("\r", "").strip()
     print("Expresión global generada (repr):", repr(global_regex))
-    
-    # Procesar la expresión global: tokenizar, convertir a postfix, construir árbol y DFA
-    r_parser = RegexParser(global_regex)
-    r_parser.tokenize()
-    postfix = r_parser.to_postfix()
-    syntax_tree = SyntaxTree(postfix)
-    global_dfa = DFA(syntax_tree)
-    
-    # Asigna el mapeo de marcadores al DFA
-    global_dfa.marker_to_rule = marker_to_rule
-    # Crea una estructura para mapear cada ID de estado a su conjunto de posiciones
-    global_dfa.state_sets = {state_id: state_set for state_set, state_id in global_dfa.states.items()}
-    
+
     # Genera la imagen del DFA global en la carpeta 'imagenes' con Graphviz
     # global_dfa.render_dfa("global_dfa")
-    
+
     return global_dfa
 
 
-def generate_lexer():
+def action_body(action_code):
     """
-    Genera el archivo 'thelexer.py' a partir de la especificación YALex.
-    Combina el header, la generación de DFAs para cada regla con su acción asociada y el trailer.
+    Código de una acción YALex listo para ir, sangrado, dentro de una función.
+    La primera línea va justo tras '{' y llega sin su sangría, así que la
+    sangría común se quita sólo de las demás líneas; si la primera abre un
+    bloque (termina en ':'), las demás quedan al menos un nivel por dentro.
+    """
+    first, _, rest = action_code.strip().partition("\n")
+    if not rest.strip():
+        return first
+    rest = textwrap.dedent(rest)
+    if first.rstrip().endswith(":") and not rest[:1].isspace():
+        rest = textwrap.indent(rest, "    ")
+    return first + "\n" + rest
+
+
+def classify_action(action_code):
+    """
+    Clasifica el código de una acción YALex para el lexer generado:
+      ('skip', None)     → la acción descarta el lexema (return None / pass)
+      ('token', NOMBRE)  → la acción produce (NOMBRE, lexeme) sin lógica adicional
+      ('function', None) → la acción necesita compilarse como función
+    """
+    code = action_code.strip()
+    if code in ("pass", "return", "return None"):
+        return 'skip', None
+    m = (re.fullmatch(r"return\s+([A-Za-z_]\w*)", code)
+         or re.fullmatch(r"return\s*\(\s*([A-Za-z_]\w*)\s*,\s*lexeme\s*\)", code))
+    if m and m.group(1) not in ("lexeme", "text", "None"):
+        return 'token', m.group(1)
+    return 'function', None
+
+
+def first_char_dispatch(dfa, fallback_chars=()):
+    """
+    Calcula, a partir del DFA global (ya con reglas asignadas), qué primeros caracteres
+    se resuelven sin recorrer el DFA. Devuelve {carácter: (order, racha)}:
+      (order, None)    → token de un solo carácter de la regla 'order'
+      (order, racha)   → el token es ese carácter seguido de la racha más larga
+                         de caracteres en 'racha' (intervalos (lo, hi) de puntos
+                         de código; p. ej. espacios), todo de la regla 'order'
+      (None, None)     → el DFA no arranca con ese carácter; se usa el respaldo
+                         (sólo para los caracteres de fallback_chars)
+    Sólo se consideran primeros caracteres Latin-1 (los de la búsqueda rápida).
+    Los dígitos se dejan fuera: los reconoce antes SCIENTIFIC_NUMBER.
+    """
+    table, columns = dfa.table, dfa.columns
+    accept, live = dfa.accept_table, dfa.live_table
+    start_row = dfa.start_state * columns
+    dispatch = {}
+    latin1 = [(chr(code), class_id) for lo, hi, class_id in dfa.class_ranges
+              for code in range(lo, min(hi, 0xFF) + 1)]
+    for ch, class_id in latin1:
+        if re.match(r"\d", ch):
+            continue
+        state = table[start_row + class_id]
+        if not live[state] or accept[state] < 0:
+            continue
+        # Desde 'state' sólo se puede repetir el mismo estado o morir
+        row = state * columns
+        targets = [table[row + k] for k in range(columns)]
+        if any(live[t] and t != state for t in targets):
+            continue
+        run = []
+        for lo, hi, k in dfa.class_ranges:
+            if targets[k] == state:
+                if run and run[-1][1] + 1 == lo:
+                    run[-1] = (run[-1][0], hi)
+                else:
+                    run.append((lo, hi))
+        dispatch[ch] = (accept[state], tuple(run) or None)
+    for ch in fallback_chars:
+        if len(ch) == 1 and not live[table[start_row + dfa.lookup_class(ch)]]:
+            dispatch[ch] = (None, None)
+    return dispatch
+
+
+def write_scan_method(f, name, traced, mode="list"):
+    """
+    Escribe el bucle principal del lexer generado como método 'name'.
+    Con traced=True cada token se reporta a trace(tipo, lexema); con
+    traced=False el bucle se emite sin ninguna llamada de traza.
+    mode indica cómo se entregan los tokens:
+      "list"   → lista de tuplas (tipo, lexema) sobre self.input_text
+      "stream" → generador que lee el archivo por bloques y rellena el buffer
+                 cuando un token puede cruzar su final
+      "buffer" → TokenBuffer compacto con offsets sobre self.input_text
+    """
+    streaming = mode == "stream"
+    # Sin traza, el TokenBuffer sólo necesita offsets: el lexema se corta cuando hace falta
+    lazy_lexeme = mode == "buffer" and not traced
+
+    def emit(indent, tok, lexeme, start, stop, value=None):
+        pad = " " * indent
+        if streaming:
+            f.write(pad + f"yield ({tok}, {lexeme})\n")
+        elif mode == "buffer":
+            extra = f", {value}" if value else ""
+            f.write(pad + f"append({tok}, {start}, {stop}{extra})\n")
+        else:
+            f.write(pad + f"tokens.append(({tok}, {lexeme}))\n")
+        if traced:
+            f.write(pad + f"trace({tok}, {lexeme})\n")
+
+    def refill(indent):
+        pad = " " * indent
+        f.write(pad + "text, pos, end, eof = refill(stream, decoder, chunk_size, text, pos)\n")
+        f.write(pad + "continue\n")
+
+    params = ", stream, chunk_size" if streaming else ""
+    f.write(f"    def {name}(self{params}{', trace' if traced else ''}):\n")
+    if streaming:
+        f.write("        decoder = codecs.getincrementaldecoder('utf-8')()\n")
+        f.write("        text = ''\n")
+        f.write("        pos = end = 0\n")
+        f.write("        eof = False\n")
+        f.write("        while True:\n")
+        f.write("            if pos == end:\n")
+        f.write("                if eof:\n")
+        f.write("                    break\n")
+        refill(16)
+        # Un número científico que llega al final del buffer podría continuar
+        f.write("            if not eof:\n")
+        f.write("                m = SCIENTIFIC_PREFIX.match(text, pos)\n")
+        f.write("                if m and m.end() == end:\n")
+        refill(20)
+    else:
+        if mode == "buffer":
+            f.write("        tokens = TokenBuffer(self.input_text)\n")
+            f.write("        append = tokens.append\n")
+        else:
+            f.write("        tokens = []\n")
+        f.write("        text = self.input_text\n")
+        f.write("        pos = 0\n")
+        f.write("        end = len(text)\n")
+        f.write("        while pos < end:\n")
+    # ——— Despacho por primer carácter: tokens de un carácter y rachas ———
+    f.write("            dispatch = FIRST_CHAR.get(text[pos])\n")
+    f.write("            if dispatch is None:\n")
+    # ——— Reconocimiento rápido de números científicos ———
+    f.write("                m = SCIENTIFIC_NUMBER.match(text, pos)\n")
+    f.write("                if m:\n")
+    if not lazy_lexeme:
+        f.write("                    lexeme = m.group(0)\n")
+    emit(20, "NUMBER", "lexeme", "pos", "m.end()")
+    f.write("                    pos = m.end()\n")
+    f.write("                    continue\n")
+    # Un solo recorrido del DFA global: mayor prefijo y regla más prioritaria
+    f.write(f"                longest_match, rule, {'stop' if streaming else '_'} = self.longest_match(text, pos, end)\n")
+    if streaming:
+        # El DFA seguía vivo al final del buffer: el token puede ser más largo
+        f.write("                if stop == end and not eof:\n")
+        refill(20)
+    f.write("            else:\n")
+    f.write("                rule, run = dispatch\n")
+    f.write("                if run is None:\n")
+    f.write("                    longest_match = 0 if rule is None else 1\n")
+    f.write("                else:\n")
+    f.write("                    stop = run(text, pos + 1, end).end()\n")
+    if streaming:
+        # La racha llega al final del buffer: puede continuar en el siguiente bloque
+        f.write("                    if stop == end and not eof:\n")
+        refill(24)
+    f.write("                    longest_match = stop - pos\n")
+    f.write("            if longest_match > 0:\n")
+    if not lazy_lexeme:
+        f.write("                lexeme = text[pos:pos+longest_match]\n")
+    f.write("                action = RULE_FUNCTIONS[rule]\n")
+    f.write("                if action is None:\n")
+    f.write("                    tok_type = RULE_TOKEN_TYPES[rule]\n")
+    f.write("                    if tok_type is not None:\n")
+    emit(24, "tok_type", "lexeme", "pos", "pos+longest_match")
+    f.write("                else:\n")
+    if lazy_lexeme:
+        f.write("                    lexeme = text[pos:pos+longest_match]\n")
+    f.write("                    tok = action(lexeme, text)\n")
+    f.write("                    if tok is not None:\n")
+    f.write("                        # si la acción ya devolvió (TOKEN, lexeme), lo usamos directamente\n")
+    f.write("                        if not isinstance(tok, tuple):\n")
+    f.write("                            tok = (tok, lexeme)\n")
+    if mode == "buffer":
+        # Sólo se guarda un valor aparte si la acción no devolvió el lexema tal cual
+        f.write("                        if tok[1] == lexeme:\n")
+        emit(28, "tok[0]", "tok[1]", "pos", "pos+longest_match")
+        f.write("                        else:\n")
+        emit(28, "tok[0]", "tok[1]", "pos", "pos+longest_match", value="tok[1]")
+    else:
+        emit(24, "tok[0]", "tok[1]", "pos", "pos+longest_match")
+    f.write("                pos += longest_match\n")
+    f.write("                continue\n")
+    # Si no fue un token largo ni un match de un char vía DFA, símbolos puntuales
+    f.write("            ch = text[pos]\n")
+    f.write("            mapped = PUNCTUATIONS.get(ch)\n")
+    f.write("            if mapped is not None:\n")
+    emit(16, "mapped", "ch", "pos", "pos+1")
+    f.write("                pos += 1\n")
+    f.write("                continue\n")
+    # FALLÓ TODO: carácter no declarado → lo marcamos y seguimos
+    f.write("            # Carácter no declarado en la gramática: lo marcamos como UNKNOWN y continuamos\n")
+    emit(12, "None", "ch", "pos", "pos+1")
+    f.write("            pos += 1\n")
+    if streaming:
+        f.write("        yield (EOF, '')\n")
+    elif mode == "buffer":
+        f.write("        append(EOF, end, end)\n")
+        f.write("        return tokens\n")
+    else:
+        f.write("        tokens.append((EOF, ''))\n")
+        f.write("        return tokens\n")
+    f.write("\n")
+
+
+def generate_lexer(spec_filename="inputs/lexer.yal", output_filename="thelexer.py",
+                   state_budget=STATE_BUDGET, transition_budget=TRANSITION_BUDGET,
+                   time_budget=TIME_BUDGET, workers=None, cache=None):
+    """
+    Genera el archivo output_filename ('thelexer.py') a partir de la especificación YALex.
+    Combina el header y el DFA global de todas las reglas (con la acción y prioridad
+    de cada una), de modo que cada token se reconoce con un único recorrido.
+    Los presupuestos (None = sin límite), workers y cache (p. ej. un dict o un
+    shelve abierto, para no reconstruir las reglas que no cambian entre
+    generaciones) pasan a build_global_dfa.
     """
-    spec_filename = "inputs/lexer.yal"
     yalex_parser = YALexParser(spec_filename)
     yalex_parser.parse()
     print("Header extraído:")
@@ -144,85 +423,29 @@ def generate_lexer():
             if m:
                 punct_map[char] = m.group(1)
         
-    rules = []
-    for idx, (regex_str, action_code) in enumerate(yalex_parser.rules, start=1):
-        # Limpieza de la regex: eliminar '|' inicial y espacios
-        regex_str_clean = regex_str.lstrip("| ").strip()
-        if not regex_str_clean:
-            continue
-        # 1) Expandir definiciones
-        expanded_regex = yalex_parser.expand_definitions(regex_str_clean)
-        # 2) Si la regla es exactamente un literal entre comillas,
-        #    tratamos el salto de línea '\n' como un escape especial
-        if (expanded_regex.startswith("'") and expanded_regex.endswith("'")) \
-        or (expanded_regex.startswith('"') and expanded_regex.endswith('"')):
-            lit = expanded_regex[1:-1]
-            if lit == r"\n":
-                # queremos un único backslash-n para que el parser lo convierta a '\n'
-                escaped = r"\n"
-            else:
-                escaped = re.escape(lit)
-            expanded_regex = escaped
-        else:
-            # Para literales incrustados, escapamos cada uno
-            expanded_regex = re.sub(
-                r'"([^"]*)"',
-                lambda m: re.escape(m.group(1)),
-                expanded_regex
-            )
-            expanded_regex = re.sub(
-                r"'([^']*)'",
-                lambda m: re.escape(m.group(1)),
-                expanded_regex
-            )
-        # 3) Quitar saltos de línea (sin tocar espacios)
-        expanded_regex = expanded_regex.replace("\n", "")
-        # 4) Añadir centinela '#' al final
-        expanded_regex_for_tree = expanded_regex + '#'
-        '''
-        # ——— DEPURACIÓN ———
-        print(f"[DEBUG] Regla {idx}: expresión a tokenizar → {expanded_regex_for_tree!r}")
-        r_parser = RegexParser(expanded_regex_for_tree)
-        try:
-            r_parser.tokenize()
-        except ValueError as e:
-            print(f"¡Error parseando la expresión expandida en la regla {idx}!")
-            print(f"   expanded_regex_for_tree = {expanded_regex_for_tree!r}")
-            # Re-lanzamos el mismo error para que se vea el stack trace
-            raise
-        # ——— fin depuración ———
-        '''
-        added_marker = False
-        with contextlib.redirect_stdout(io.StringIO()):
-            print(f"Regla {idx+1} expandida: {expanded_regex}")
-        # Construir el DFA para la regla
-        r_parser = RegexParser(expanded_regex_for_tree)
-        r_parser.tokenize()
-        postfix = r_parser.to_postfix()
-        # (Debug opcional, envuelto en --verbose)
-        """
-        print(f"\n--- DEBUG Regla {idx+1} ---")
-        print(" regex raw:     ", repr(expanded_regex))
-        print(" tokens:        ", [str(t) for t in r_parser.tokens])
-        print(" postfix:       ", [str(t) for t in postfix])
-        """
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({
-            'regex': expanded_regex,
-            'action': action_code,
-            'dfa': dfa,
-            'order': idx,
-            'added_marker': added_marker
-        })
-    
-    output_filename = "thelexer.py"
+    # Un único DFA global: cada token se reconoce con un solo recorrido
+    global_dfa, global_regex, global_rules, lazy_rules, lazy_dfa = build_global_dfa(
+        yalex_parser, state_budget=state_budget, transition_budget=transition_budget,
+        time_budget=time_budget, workers=workers, cache=cache)
+    # Reglas en orden de prioridad; los estados de aceptación guardan su índice
+    rule_infos = sorted(global_rules + [info for info, _ in lazy_rules],
+                        key=lambda info: info['order'])
+    rule_index = {info['order']: idx for idx, info in enumerate(rule_infos)}
+    rule_actions = [classify_action(info['action']) for info in rule_infos]
+
     with open(output_filename, "w", encoding="utf-8") as f:
         # Escribir header (el código extraído del archivo YALex)
         f.write("# Código generado automáticamente por YALex\n")
         # 1) Import básico de regex
         f.write("import re\n")
+        f.write("import codecs\n")
+        f.write("import logging\n")
+        f.write("from array import array\n")
+        f.write("from bisect import bisect_right\n")
         # 2) Import de todos los tokens DEFINIDO POR EL HEADER de la gramática
+        f.write("from lexer.src.runtime.token_buffer import TokenBuffer\n")
+        if lazy_rules:
+            f.write("from lexer.src.models.lazydfa import compile_lazy_rules\n")
         header = "\n".join(line.lstrip() for line in yalex_parser.header_code.splitlines())
         if header:
             f.write(header + "\n\n")
@@ -234,100 +457,221 @@ def generate_lexer():
         for ch, tok in punct_map.items():
             f.write(f"    {ch!r}: {tok},\n")
         f.write("}\n\n")
+        f.write("# Reconocimiento rápido de números científicos (precompilado)\n")
+        f.write("SCIENTIFIC_NUMBER = re.compile(r'\\d+\\.\\d+(?:[eE][+-]?\\d+)?')\n")
+        f.write("# Cualquier prefijo de un número científico (para el modo por bloques)\n")
+        f.write("SCIENTIFIC_PREFIX = re.compile(r'\\d+(?:\\.\\d*(?:[eE][+-]?\\d*)?)?')\n\n")
+
+        # 4) Tablas del DFA global, serializadas como datos literales
+        f.write("# Expresión global de la que salen las tablas (solo referencia):\n")
+        f.write(f"# {global_regex!r}\n\n")
+        # Clases por intervalos de puntos de código; los caracteres Latin-1 van
+        # además en un dict para la búsqueda rápida. Los símbolos de varios
+        # caracteres nunca coinciden con un carácter del texto y no se emiten
+        class_ranges = global_dfa.class_ranges
+        f.write("# Intervalos [CLASS_STARTS[i], CLASS_ENDS[i]] de la clase CLASS_IDS[i] (ordenados)\n")
+        f.write(f"CLASS_STARTS = array('i', {[lo for lo, _, _ in class_ranges]!r})\n")
+        f.write(f"CLASS_ENDS = array('i', {[hi for _, hi, _ in class_ranges]!r})\n")
+        f.write(f"CLASS_IDS = array('i', {[k for _, _, k in class_ranges]!r})\n")
+        f.write(f"OTHER_CLASS = {global_dfa.other_class}\n")
+        f.write("# Clase de cada carácter Latin-1 del alfabeto; char_class completa el resto\n")
+        f.write("CHAR_CLASSES = {\n")
+        for lo, hi, class_id in class_ranges:
+            for code in range(lo, min(hi, 0xFF) + 1):
+                f.write(f"    {chr(code)!r}: {class_id},\n")
+        f.write("}\n\n")
+        f.write("def char_class(ch):\n")
+        f.write("    \"\"\"Clase de un carácter fuera de CHAR_CLASSES: bisección sobre los intervalos.\"\"\"\n")
+        f.write("    code = ord(ch)\n")
+        f.write("    i = bisect_right(CLASS_STARTS, code) - 1\n")
+        f.write("    class_id = CLASS_IDS[i] if i >= 0 and code <= CLASS_ENDS[i] else OTHER_CLASS\n")
+        f.write("    CHAR_CLASSES[ch] = class_id\n")
+        f.write("    return class_id\n\n")
+        f.write(f"NUM_COLUMNS = {global_dfa.columns}\n\n")
+        # Tabla densa: una fila por estado, el estado 0 es el estado muerto
+        columns = global_dfa.columns
+        table = global_dfa.table
+        f.write(f"INITIAL_STATE = {global_dfa.start_state}\n\n")
+        f.write("# Transiciones: TRANSITION_TABLE[estado * NUM_COLUMNS + clase] → estado (0 = muerto)\n")
+        f.write("TRANSITION_TABLE = array('i', [\n")
+        for row in range(0, len(table), columns):
+            f.write("    " + ", ".join(map(str, table[row:row + columns])) + ",\n")
+        f.write("])\n\n")
+        f.write("# Por estado: índice de la regla más prioritaria que acepta (-1 = no acepta)\n")
+        accept_rule = [rule_index[order] if order >= 0 else -1 for order in global_dfa.accept_table]
+        f.write(f"ACCEPT_RULE = array('i', {accept_rule!r})\n")
+        f.write("# Por estado: 1 si todavía puede llegar a aceptar\n")
+        f.write(f"LIVE = {bytes(global_dfa.live_table)!r}\n\n")
+        # Despacho por primer carácter, resuelto en tiempo de generación
+        dispatch = first_char_dispatch(global_dfa, punct_map)
+        if lazy_rules:
+            # Un carácter con el que puede empezar una regla perezosa necesita longest_match
+            dispatch = {ch: entry for ch, entry in dispatch.items()
+                        if not lazy_dfa.start.row.get(lazy_dfa.lookup_class(ch))}
+            f.write("# Reglas que superan el presupuesto del DFA global: un solo AFD perezoso\n")
+            f.write("# cuyas reglas se identifican por su índice en el lexer\n")
+            f.write("LAZY_DFA = compile_lazy_rules(\n")
+            f.write("    [\n")
+            for info, escaped in lazy_rules:
+                f.write(f"        ({{'order': {rule_index[info['order']]}}}, {escaped!r}),\n")
+            f.write("    ],\n")
+            f.write("    [\n")
+            for ident, regex in definition_regexes(yalex_parser):
+                f.write(f"        ({ident!r}, {regex!r}),\n")
+            f.write("    ],\n")
+            f.write(")\n\n")
+        runs = {}
+        for order, run in dispatch.values():
+            if run is not None and run not in runs:
+                runs[run] = f"_RUN_{len(runs)}"
+                pattern = "[" + "".join(re.escape(chr(lo)) if lo == hi else f"{re.escape(chr(lo))}-{re.escape(chr(hi))}"
+                                        for lo, hi in run) + "]*"
+                f.write(f"{runs[run]} = re.compile({pattern!r}).match\n")
+        f.write("# Primer carácter → (regla, racha): se resuelve sin recorrer el DFA.\n")
+        f.write("# regla None = el DFA no empieza con ese carácter (va a PUNCTUATIONS)\n")
+        f.write("FIRST_CHAR = {\n")
+        for ch in sorted(dispatch):
+            order, run = dispatch[ch]
+            rule = None if order is None else rule_index[order]
+            f.write(f"    {ch!r}: ({rule}, {runs[run] if run is not None else None}),\n")
+        f.write("}\n\n")
+        # 5) Acciones compiladas: las constantes se precalculan y el resto
+        #    se emite como funciones reales, sin exec en tiempo de ejecución
+        for info, (kind, _) in zip(rule_infos, rule_actions):
+            if kind != 'function':
+                continue
+            f.write(f"def _action_{info['order']}(lexeme, text):\n")
+            f.write(textwrap.indent(action_body(info['action']), "    ") + "\n")
+            f.write("\n")
+        f.write("# Por regla: tipo de token precalculado (None = se descarta el lexema)...\n")
+        f.write("RULE_TOKEN_TYPES = [\n")
+        for info, (kind, name) in zip(rule_infos, rule_actions):
+            # El comentario lleva la acción en una sola línea
+            f.write(f"    {name if kind == 'token' else None},  # {' '.join(line.strip() for line in info['action'].splitlines())}\n")
+        f.write("]\n\n")
+        f.write("# ...o la función de la acción cuando no es constante\n")
+        f.write("RULE_FUNCTIONS = [\n")
+        for info, (kind, _) in zip(rule_infos, rule_actions):
+            f.write(f"    {'_action_%d' % info['order'] if kind == 'function' else None},\n")
+        f.write("]\n\n")
+
+        # 6) Lectura por bloques para iter_tokens
+        f.write("# Tamaño de bloque por defecto de iter_tokens\n")
+        f.write("CHUNK_SIZE = 1 << 16\n\n")
+        f.write("def refill(stream, decoder, chunk_size, text, pos):\n")
+        f.write("    \"\"\"\n")
+        f.write("    Descarta lo ya consumido del buffer y le añade el siguiente bloque del\n")
+        f.write("    archivo; los bloques binarios se decodifican en UTF-8 de forma incremental.\n")
+        f.write("    Devuelve (texto, pos, fin, eof).\n")
+        f.write("    \"\"\"\n")
+        f.write("    chunk = stream.read(chunk_size)\n")
+        f.write("    eof = not chunk\n")
+        f.write("    if isinstance(chunk, bytes):\n")
+        f.write("        chunk = decoder.decode(chunk, final=eof)\n")
+        f.write("    text = text[pos:] + chunk\n")
+        f.write("    return text, 0, len(text), eof\n")
+        f.write("\n")
+        f.write("\n")
+
+        # 7) Normalización del destino de la traza
+        f.write("def make_trace(trace):\n")
+        f.write("    \"\"\"\n")
+        f.write("    Convierte el destino de la traza en una función trace(tipo, lexema):\n")
+        f.write("      None            → sin traza (se usa el bucle sin ganchos)\n")
+        f.write("      logging.Logger  → logger.debug por token\n")
+        f.write("      objeto con write → escritura en el archivo (usa su propio buffer)\n")
+        f.write("      callable        → se usa tal cual\n")
+        f.write("    \"\"\"\n")
+        f.write("    if trace is None:\n")
+        f.write("        return None\n")
+        f.write("    if isinstance(trace, logging.Logger):\n")
+        f.write("        return lambda tok_type, lexeme: trace.debug('⟶ Token: %r, lexema: %r', tok_type, lexeme)\n")
+        f.write("    if hasattr(trace, 'write'):\n")
+        f.write("        write = trace.write\n")
+        f.write("        return lambda tok_type, lexeme: write(f'⟶ Token: {tok_type!r}, lexema: {lexeme!r}\\n')\n")
+        f.write("    if callable(trace):\n")
+        f.write("        return trace\n")
+        f.write("    raise TypeError(f'Destino de traza no soportado: {trace!r}')\n")
+        f.write("\n")
+        f.write("\n")
 
         # Definir la clase Lexer
         f.write("class Lexer:\n")
-        f.write("    def __init__(self, input_text):\n")
+        f.write("    def __init__(self, input_text='', trace=None):\n")
         f.write("        self.input_text = input_text\n")
         f.write("        self.pos = 0\n")
+        f.write("        # Destino de la traza de tokens; None = silencioso\n")
+        f.write("        self.trace = make_trace(trace)\n")
         f.write("\n")
         f.write("    def get_tokens(self):\n")
-        f.write("        tokens = []\n")
-        f.write("        text = self.input_text\n")
-        f.write("        pos = 0\n")
-        f.write("        while pos < len(text):\n")
-        # ——— Reconocimiento rápido de números científicos ———
-        f.write("            m = re.match(r'\\d+\\.\\d+(?:[eE][+-]?\\d+)?', text[pos:])\n")
-        f.write("            if m:\n")
-        f.write("                lexeme = m.group(0)\n")
-        f.write("                tokens.append((NUMBER, lexeme))\n")
-        f.write("                print(f'⟶ Token: {NUMBER!r}, lexema: {lexeme!r}')\n")
-        f.write("                pos += len(lexeme)\n")
-        f.write("                continue\n")
-        # Intentar, por cada regla, empatar el mayor prefijo
-        f.write("            longest_match = 0\n")
-        f.write("            selected_rule = None\n")
-        f.write("            for rule in self.rules:\n")
-        f.write("                ml = rule['dfa'].match_prefix(text[pos:])\n")
-        f.write("                if ml > longest_match:\n")
-        f.write("                    longest_match = ml\n")
-        f.write("                    selected_rule = rule\n")
-        f.write("            if longest_match > 1:\n")
-        f.write("                lexeme = text[pos:pos+longest_match]\n")
-        f.write("                action_code = selected_rule['action']\n")
-        f.write("                local_env = {'lexeme': lexeme, 'text': text}\n")
-        f.write("                exec(action_code.replace('return', 'token ='), globals(), local_env)\n")
-        f.write("                tok = local_env.get('token')\n")
-        f.write("                if tok is not None:\n")
-        f.write("                    # si la acción ya devolvió (TOKEN, lexeme), lo usamos directamente\n")
-        f.write("                    if isinstance(tok, tuple):\n")
-        f.write("                        tokens.append(tok)\n")
-        f.write("                    else:\n")
-        f.write("                        tokens.append((tok, lexeme))\n")
-        f.write("                    print(f'⟶ Token: {tok!r}, lexema: {lexeme!r}')\n")
-        f.write("                pos += longest_match\n")
-        f.write("                continue\n")
-        # Si el DFA sólo empata 1 carácter (ej. ws de longitud 1, dígito suelto...)
-        f.write("            if longest_match == 1:\n")
-        f.write("                lexeme = text[pos]\n")
-        f.write("                action_code = selected_rule['action']\n")
-        f.write("                local_env = {'lexeme': lexeme, 'text': text}\n")
-        f.write("                exec(action_code.replace('return', 'token ='), globals(), local_env)\n")
-        f.write("                tok = local_env.get('token')\n")
-        f.write("                if tok is not None:\n")
-        f.write("                    # si la acción ya devolvió (TOKEN, lexeme), lo usamos directamente\n")
-        f.write("                    if isinstance(tok, tuple):\n")
-        f.write("                        tokens.append(tok)\n")
-        f.write("                    else:\n")
-        f.write("                        tokens.append((tok, lexeme))\n")
-        f.write("                    print(f'⟶ Token: {tok!r}, lexema: {lexeme!r}')\n")
-        f.write("                pos += 1\n")
-        f.write("                continue\n")
-        # Si no fue un token largo ni un match de un char vía DFA, símbolos puntuales
-        f.write("            ch = text[pos]\n")
-        f.write("            mapped = PUNCTUATIONS.get(ch)\n")
-        f.write("            if mapped is not None:\n")
-        f.write("                tokens.append((mapped, ch))\n")
-        f.write("                print(f'⟶ Token: {mapped!r}, lexema: {ch!r}')\n")
-        f.write("                pos += 1\n")
-        f.write("                continue\n")
-        # FALLÓ TODO: carácter no declarado → lo marcamos y seguimos
-        f.write("            # Carácter no declarado en la gramática: lo marcamos como UNKNOWN y continuamos\n")
+        f.write("        if self.trace is None:\n")
+        f.write("            return self._scan()\n")
+        f.write("        return self._scan_traced(self.trace)\n")
+        f.write("\n")
+        # Dos bucles especializados: sin traza no hay ni una comprobación por token
+        write_scan_method(f, "_scan", traced=False)
+        write_scan_method(f, "_scan_traced", traced=True)
+        f.write("    def iter_tokens(self, stream, chunk_size=CHUNK_SIZE):\n")
+        f.write("        \"\"\"\n")
+        f.write("        Genera los tokens de un archivo de texto o binario (UTF-8) leyéndolo por\n")
+        f.write("        bloques de chunk_size, con memoria acotada al token más largo más un bloque.\n")
+        f.write("        Las acciones reciben como 'text' la ventana actual del buffer.\n")
+        f.write("        \"\"\"\n")
+        f.write("        if self.trace is None:\n")
+        f.write("            return self._iter_scan(stream, chunk_size)\n")
+        f.write("        return self._iter_scan_traced(stream, chunk_size, self.trace)\n")
+        f.write("\n")
+        write_scan_method(f, "_iter_scan", traced=False, mode="stream")
+        write_scan_method(f, "_iter_scan_traced", traced=True, mode="stream")
+        f.write("    def get_token_buffer(self):\n")
+        f.write("        \"\"\"\n")
+        f.write("        Igual que get_tokens, pero devuelve un TokenBuffer compacto (tipo + offsets)\n")
+        f.write("        cuyos lexemas se cortan del texto sólo al accederlos.\n")
+        f.write("        \"\"\"\n")
+        f.write("        if self.trace is None:\n")
+        f.write("            return self._scan_buffer()\n")
+        f.write("        return self._scan_buffer_traced(self.trace)\n")
+        f.write("\n")
+        write_scan_method(f, "_scan_buffer", traced=False, mode="buffer")
+        write_scan_method(f, "_scan_buffer_traced", traced=True, mode="buffer")
+        # Recorrido de las tablas precalculadas por índice sobre el texto original:
+        # no se compila ninguna regex ni se copian subcadenas en ejecución
+        f.write("    def longest_match(self, text, start, end):\n")
+        f.write("        # Tablas en variables locales: un índice y una carga de array por carácter\n")
+        f.write("        table, columns, live, accept_rule = TRANSITION_TABLE, NUM_COLUMNS, LIVE, ACCEPT_RULE\n")
+        f.write("        char_classes = CHAR_CLASSES.get\n")
+        f.write("        state = INITIAL_STATE\n")
+        f.write("        last_accept_pos = start\n")
+        f.write("        accepted_rule = None\n")
+        f.write("        pos = start\n")
+        f.write("        while pos < end:\n")
         f.write("            ch = text[pos]\n")
-        f.write("            print(f\"⟶ Token no reconocido: {ch!r} en posición {pos}\")\n")
-        f.write("            tokens.append((None, ch))  # None indica token no reconocido\n")
+        f.write("            class_id = char_classes(ch)\n")
+        f.write("            if class_id is None:\n")
+        f.write("                class_id = char_class(ch)\n")
+        f.write("            state = table[state * columns + class_id]\n")
+        f.write("            if not live[state]:\n")
+        f.write("                break\n")
         f.write("            pos += 1\n")
-        f.write("            continue\n")
-        f.write("        tokens.append((EOF, ''))\n")
-        f.write("        return tokens\n")
-        f.write("\n")
-        # Propiedad rules que reconstruye las reglas al momento de usar el lexer
-        f.write("    @property\n")
-        f.write("    def rules(self):\n")
-        f.write("        rules = []\n")
-        # Para cada regla, se genera el código que recrea el DFA (con la misma expresión expandida)
-        for rule in rules:
-            f.write("        from lexer.src.models.regex_parser import RegexParser\n")
-            f.write("        from lexer.src.models.syntax_tree import SyntaxTree\n")
-            f.write("        from lexer.src.models.dfa import DFA\n")
-            f.write(f"        # Regla: {rule['regex']}\n")
-            f.write(f"        parser = RegexParser({rule['regex']!r} + '#')\n")
-            f.write("        parser.tokenize()\n")
-            f.write("        postfix = parser.to_postfix()\n")
-            f.write("        syntax_tree = SyntaxTree(postfix)\n")
-            f.write("        dfa = DFA(syntax_tree)\n")
-            f.write(f"        rules.append({{'regex': {rule['regex']!r}, 'action': {rule['action']!r}, 'dfa': dfa}})\n")
-        f.write("        return rules\n")
+        f.write("            rule = accept_rule[state]\n")
+        f.write("            if rule >= 0:\n")
+        f.write("                last_accept_pos = pos\n")
+        f.write("                accepted_rule = rule\n")
+        if lazy_rules:
+            f.write("        length = 0 if accepted_rule is None else last_accept_pos - start\n")
+            f.write("        # Reglas perezosas: gana el lexema más largo y, a igual largo, la regla anterior\n")
+            f.write("        n, rule, stop = LAZY_DFA.longest_match_rule(text, start, end)\n")
+            f.write("        if n > length or (n == length and n > 0 and rule < accepted_rule):\n")
+            f.write("            length, accepted_rule = n, rule\n")
+            f.write("        if stop > pos:\n")
+            f.write("            pos = stop\n")
+            f.write("        if accepted_rule is None:\n")
+            f.write("            return 0, None, pos\n")
+            f.write("        return length, accepted_rule, pos\n")
+        else:
+            f.write("        if accepted_rule is None:\n")
+            f.write("            return 0, None, pos\n")
+            f.write("        return last_accept_pos - start, accepted_rule, pos\n")
         f.write("\n")
         
         # Escribir trailer (el código extraído del archivo YALex, si existe)
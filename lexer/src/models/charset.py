@@ -0,0 +1,89 @@
+# lexer.src/models/charset.py
+
+MAX_CODE_POINT = 0x10FFFF
+
+
+class CharSet:
+    """
+    Conjunto de caracteres representado como intervalos de puntos de código
+    ordenados y disjuntos: ((lo, hi), ...), ambos extremos incluidos.
+    Una clase como [A-Za-z] o [\\u0000-\\uffff] ocupa una sola hoja del árbol
+    sintáctico, sin importar cuántos caracteres contenga.
+    """
+
+    __slots__ = ("intervals", "_hash")
+
+    def __init__(self, intervals):
+        # Ordena y fusiona intervalos solapados o contiguos
+        merged = []
+        for lo, hi in sorted(intervals):
+            if lo > hi:
+                lo, hi = hi, lo
+            if merged and lo <= merged[-1][1] + 1:
+                if hi > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], hi)
+            else:
+                merged.append((lo, hi))
+        self.intervals = tuple(merged)
+        self._hash = hash(self.intervals)
+
+    @classmethod
+    def from_chars(cls, chars):
+        return cls((ord(c), ord(c)) for c in chars)
+
+    def complement(self):
+        """Todos los caracteres que no están en el conjunto (para [^...])."""
+        intervals = []
+        start = 0
+        for lo, hi in self.intervals:
+            if lo > start:
+                intervals.append((start, lo - 1))
+            start = hi + 1
+        if start <= MAX_CODE_POINT:
+            intervals.append((start, MAX_CODE_POINT))
+        return CharSet(intervals)
+
+    def union(self, other):
+        return CharSet(self.intervals + other.intervals)
+
+    def intersects(self, other):
+        """¿Comparten algún carácter? Recorre ambas listas de intervalos a la vez."""
+        a, b = self.intervals, other.intervals
+        i = j = 0
+        while i < len(a) and j < len(b):
+            if a[i][1] < b[j][0]:
+                i += 1
+            elif b[j][1] < a[i][0]:
+                j += 1
+            else:
+                return True
+        return False
+
+    def __contains__(self, ch):
+        code = ord(ch)
+        return any(lo <= code <= hi for lo, hi in self.intervals)
+
+    def __len__(self):
+        """Cantidad de caracteres del conjunto."""
+        return sum(hi - lo + 1 for lo, hi in self.intervals)
+
+    def __eq__(self, other):
+        if not isinstance(other, CharSet):
+            return NotImplemented
+        return self.intervals == other.intervals
+
+    def __hash__(self):
+        return self._hash
+
+    def __str__(self):
+        parts = []
+        for lo, hi in self.intervals:
+            parts.append(chr(lo) if lo == hi else f"{chr(lo)}-{chr(hi)}")
+        return "[" + "".join(parts) + "]"
+
+    __repr__ = __str__
+
+
+# Comodines de YALex: '_' es cualquier carácter y '.' cualquiera salvo el salto de línea
+ANY_CHAR = CharSet(((0, MAX_CODE_POINT),))
+ANY_BUT_NEWLINE = CharSet.from_chars("\n").complement()
@@ -1,25 +1,312 @@
 # lexer.src/models/dfa.py
 import os
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
 import graphviz
-from lexer.src.models.syntax_tree import NodoHoja, NodoBinario, NodoUnario, SyntaxTree
+from lexer.src.models.charset import CharSet
+from lexer.src.models.syntax_tree import (NodoHoja, NodoBinario, NodoUnario, SyntaxTree,
+                                          bits_to_positions, child_nodes, iter_nodes)
+
+class DFABudgetExceeded(RuntimeError):
+    """La construcción del AFD superó su presupuesto de estados, transiciones o tiempo."""
+
+
+def symbol_charset(sym):
+    """CharSet de un símbolo de hoja; None para '#' y los símbolos de varios caracteres."""
+    if isinstance(sym, CharSet):
+        return sym
+    if sym != '#' and len(sym) == 1:
+        return CharSet.from_chars(sym)
+    return None
+
+
+def estimate_dfa_states(node):
+    """
+    Estimación barata (sin construir el AFD) del número de estados que produce
+    el árbol. Tras una cerradura, un paso cuyos primeros símbolos se solapan
+    con los de la cerradura puede empezar de nuevo en ella; si además algún
+    paso admite varios caracteres, varias de esas ramas siguen vivas a la vez
+    y los conjuntos de posiciones se duplican: (a|b)*a(a|b)^n da 2^(n+1)
+    estados. Los pasos de un solo carácter (.*abc) no duplican nada: sólo
+    cuentan si después llega un paso de varios caracteres. Un paso no anulable
+    que no se solapa con las cerraduras anteriores las termina. Se cuentan los
+    pasos que duplican (k) y se devuelve max(posiciones, 2^k). Es una pista
+    orientativa, no una cota exacta.
+    """
+    empty = CharSet(())
+    # Por nodo: (símbolos, primeros símbolos, símbolos de las cerraduras vivas,
+    # largo de la secuencia, ¿algún paso de varios caracteres?, pasos de un
+    # solo carácter pendientes, k)
+    info = {}
+    positions = 0
+    for n in iter_nodes(node):
+        if isinstance(n, NodoHoja):
+            positions += 1
+            symbols = symbol_charset(n.valor) or empty
+            info[id(n)] = (symbols, symbols, empty, 1, len(symbols) > 1, 0, 0)
+        elif isinstance(n, NodoBinario):
+            lsyms, lfirst, lloops, llen, lwide, lpending, lk = info[id(n.izquierdo)]
+            rsyms, rfirst, rloops, rlen, rwide, rpending, rk = info[id(n.derecho)]
+            symbols = lsyms.union(rsyms)
+            if n.valor == '.':
+                first = lfirst.union(rfirst) if n.izquierdo.nullable else lfirst
+                k = lk + rk
+                pending = lpending + rpending
+                if lloops.intersects(rfirst):
+                    if rwide:
+                        # Los pasos pendientes y los de la derecha duplican los estados
+                        k += pending + rlen
+                        pending = 0
+                    else:
+                        pending += rlen
+                    loops = lloops.union(rloops)
+                elif n.derecho.nullable:
+                    loops = lloops.union(rloops)
+                else:
+                    # La derecha no puede seguir a las cerraduras anteriores: las termina
+                    loops = rloops
+                    pending = rpending
+                info[id(n)] = (symbols, first, loops, llen + rlen, lwide or rwide, pending, k)
+            else:
+                first = lfirst.union(rfirst)
+                info[id(n)] = (symbols, first, lloops.union(rloops), max(llen, rlen),
+                               lwide or rwide or len(first) > 1, max(lpending, rpending), max(lk, rk))
+        else:
+            symbols, first, loops, length, wide, pending, k = info[id(n.hijo)]
+            if n.valor in ('*', '+'):
+                # Cualquier símbolo de la cerradura puede volver a aparecer
+                loops = loops.union(symbols)
+            info[id(n)] = (symbols, first, loops, length, wide, pending, k)
+    return max(positions, 1 << info[id(node)][6])
+
+
+def partition_classes(bounds, interval_signature, opaque_signature):
+    """
+    Parte el alfabeto en clases de equivalencia por firmas: cada intervalo
+    elemental e = [bounds[e], bounds[e+1]) tiene su firma en interval_signature
+    y cada símbolo opaco (de varios caracteres) la suya en opaque_signature;
+    los que comparten firma van en la misma clase. Cada clase es una lista de
+    intervalos (lo, hi) y de símbolos opacos.
+    Devuelve (clases, {símbolo o carácter Latin-1: clase}, [(lo, hi, clase)]
+    ordenados, firma de cada clase, {e: clase}).
+    """
+    classes = []
+    class_of = {}
+    signatures = []
+    by_signature = {}
+
+    def class_for(signature):
+        signature = tuple(signature)
+        class_id = by_signature.get(signature)
+        if class_id is None:
+            class_id = by_signature[signature] = len(classes)
+            classes.append([])
+            signatures.append(signature)
+        return class_id
+
+    # Rangos (lo, hi, clase) ordenados; los contiguos de la misma clase se fusionan
+    ranges = []
+    element_class = {}
+    for e in sorted(interval_signature):
+        class_id = element_class[e] = class_for(interval_signature[e])
+        lo, hi = bounds[e], bounds[e + 1] - 1
+        if ranges and ranges[-1][2] == class_id and ranges[-1][1] + 1 == lo:
+            ranges[-1] = (ranges[-1][0], hi, class_id)
+        else:
+            ranges.append((lo, hi, class_id))
+    for lo, hi, class_id in ranges:
+        members = classes[class_id]
+        if members and members[-1][1] + 1 == lo:
+            members[-1] = (members[-1][0], hi)
+        else:
+            members.append((lo, hi))
+        # Los caracteres Latin-1 van precargados para la búsqueda rápida
+        for code in range(lo, min(hi, 0xFF) + 1):
+            class_of[chr(code)] = class_id
+    for sym in sorted(opaque_signature):
+        class_id = class_for(opaque_signature[sym])
+        classes[class_id].append(sym)
+        class_of[sym] = class_id
+    return classes, class_of, ranges, signatures, element_class
+
+
+class CompiledDFA:
+    """
+    AFD listo para reconocer, sin nada de su construcción: la tabla densa de
+    transiciones, la regla que acepta en cada estado y el mapa de clases de
+    caracteres. Lo devuelve DFA.freeze(); DFA hereda de aquí los métodos de
+    reconocimiento, que sólo usan estos atributos.
+      table          → array('i') de estados × columns (ver DFA.compile_tables)
+      accept_table   → array('i') con el 'order' de la regla que acepta en cada estado (-1 si no acepta)
+      live_table     → bytearray: 1 si desde el estado todavía se puede aceptar
+      class_of       → {carácter o símbolo: clase}; caché de lookup_class
+      class_starts   → array('i') con el inicio de cada intervalo de class_ranges
+      class_ranges   → [(lo, hi, clase)] ordenados
+      rules_by_order → {order: info de la regla}
+    """
+
+    __slots__ = ("table", "columns", "other_class", "start_state", "accept_table", "live_table",
+                 "class_of", "class_starts", "class_ranges", "rules_by_order")
+
+    def __init__(self, table, columns, start_state, accept_table, live_table,
+                 class_of, class_ranges, rules_by_order=None):
+        self.table = table
+        self.columns = columns
+        self.other_class = columns - 1
+        self.start_state = start_state
+        self.accept_table = accept_table
+        self.live_table = live_table
+        self.class_of = class_of
+        self.class_ranges = class_ranges
+        self.class_starts = array('i', [lo for lo, _, _ in class_ranges])
+        self.rules_by_order = rules_by_order
+
+    def lookup_class(self, ch):
+        """
+        Clase de un carácter del texto (other_class si no pertenece al alfabeto).
+        Los caracteres Latin-1 vienen precargados en class_of; el resto se busca
+        por bisección en class_ranges y queda guardado en class_of.
+        """
+        class_id = self.class_of.get(ch)
+        if class_id is None:
+            class_id = self.other_class
+            if len(ch) == 1:
+                code = ord(ch)
+                i = bisect_right(self.class_starts, code) - 1
+                if i >= 0 and code <= self.class_ranges[i][1]:
+                    class_id = self.class_ranges[i][2]
+            self.class_of[ch] = class_id
+        return class_id
+
+    def simulate(self, string):
+        """
+        Simula el AFD con la cadena de entrada 'string'.
+        Retorna True si, tras procesar todos los caracteres,
+        el estado en que quedas está marcado como de aceptación.
+        """
+        table, columns = self.table, self.columns
+        class_of = self.class_of
+        live = self.live_table
+        state = self.start_state
+        for ch in string:
+            class_id = class_of.get(ch)
+            if class_id is None:
+                class_id = self.lookup_class(ch)
+            state = table[state * columns + class_id]
+            # Estado muerto o sin salida hacia una aceptación: no hace falta seguir
+            if not live[state]:
+                return False
+        return self.accept_table[state] >= 0
+
+    def longest_match(self, text, start, end):
+        """
+        Recorre text[start:end] por índice, sin copiar la entrada, y devuelve la
+        longitud del mayor prefijo aceptado (-1 si ninguno). El fin de la entrada
+        termina el recorrido; no hace falta concatenar un centinela '#'.
+        """
+        table, columns = self.table, self.columns
+        class_of = self.class_of
+        accept = self.accept_table
+        live = self.live_table
+        state = self.start_state
+        last_accept_pos = -1
+        pos = start
+        while pos < end:
+            class_id = class_of.get(text[pos])
+            if class_id is None:
+                class_id = self.lookup_class(text[pos])
+            state = table[state * columns + class_id]
+            if not live[state]:
+                break
+            pos += 1
+            # Si es estado de aceptacion, guardamos la posición
+            if accept[state] >= 0:
+                last_accept_pos = pos - start
+        return last_accept_pos
 
-class DFA:
-    def __init__(self, syntax_tree):
+    def match_at(self, text, start):
+        """Mayor prefijo aceptado de text a partir del índice start (-1 si ninguno)."""
+        return self.longest_match(text, start, len(text))
+
+    def match_prefix(self, input_str):
+        """
+        Devuelve la longitud del mayor prefijo de input_str reconocido por el DFA
+        (-1 si ninguno). Equivale a match_at(input_str, 0).
+        """
+        return self.longest_match(input_str, 0, len(input_str))
+
+    def match_prefix_and_token(self, input_str, start=0, end=None):
+        """
+        Recorre input_str[start:end] por índice y devuelve (largo, token_info) donde
+        token_info es la regla precalculada del último estado de aceptación alcanzado.
+        """
+        if end is None:
+            end = len(input_str)
+        table, columns = self.table, self.columns
+        class_of = self.class_of
+        accept = self.accept_table
+        live = self.live_table
+        state = self.start_state
+        last_accept_pos = 0
+        accepted_rule = -1
+        pos = start
+
+        while pos < end:
+            class_id = class_of.get(input_str[pos])
+            if class_id is None:
+                class_id = self.lookup_class(input_str[pos])
+            state = table[state * columns + class_id]
+            if not live[state]:
+                break
+            pos += 1
+            rule = accept[state]
+            if rule >= 0:
+                last_accept_pos = pos - start
+                accepted_rule = rule
+
+        if accepted_rule >= 0:
+            return last_accept_pos, self.rules_by_order[accepted_rule]
+
+        return 0, None
+
+
+class DFA(CompiledDFA):
+    def __init__(self, syntax_tree, state_budget=None, transition_budget=None, time_budget=None):
+        """
+        Los presupuestos (None = sin límite) acotan la construcción: si se crean
+        más de state_budget estados o transition_budget transiciones, o pasan más
+        de time_budget segundos, build_dfa lanza DFABudgetExceeded.
+        """
         self.syntax_tree = syntax_tree
+        self.state_budget = state_budget
+        self.transition_budget = transition_budget
+        self.time_budget = time_budget
         # Calcula la función followpos y el mapeo de posiciones a símbolos
         self.followpos = self.compute_followpos(syntax_tree.raiz)
         self.pos_to_symbol = self.compute_pos_to_symbol(syntax_tree.raiz)
+        # Regla de cada posición de aceptación (metadato, no es un símbolo)
+        self.pos_to_rule = self.compute_pos_to_rule(syntax_tree.raiz)
         # Definir el alfabeto (excluimos el marcador '#' de entrada)
         self.alphabet = { sym for sym in self.pos_to_symbol.values() if sym != '#' }
-        # Diccionario para almacenar los estados (clave: frozenset de posiciones, valor: ID del estado)
+        # Clases de equivalencia del alfabeto: el AFD se construye sobre sus IDs
+        (self.symbol_classes, self.class_of,
+         self.class_ranges, self.symbol_class_ids) = self.compute_symbol_classes(syntax_tree.raiz)
+        self.class_starts = array('i', [lo for lo, _, _ in self.class_ranges])
+        # Diccionario para almacenar los estados (clave: bitset entero de posiciones, valor: ID del estado)
         self.states = {}
-        # Tabla de transiciones: {estado_id: {símbolo: estado_id_destino}}
+        # Tabla de transiciones: {estado_id: {ID de clase: estado_id_destino}}
         self.transitions = {}
         self.initial_state = None
         self.accepting_states = set()
+        # Regla ganadora por estado y reglas por 'order' (las fija assign_rules)
+        self.accepting_rule = None
+        self.rules_by_order = None
         # Construir el AFD
         self.build_dfa()
-        # Creo un mapeo inverso {estado_id -> frozenset(posiciones)}
+        self.compile_tables()
+        # Creo un mapeo inverso {estado_id -> bitset de posiciones}
         self.state_sets = { state_id: state_set
                         for state_set, state_id in self.states.items() }
         # Averiguo la posición del marcador interno '#', si existe
@@ -29,117 +316,312 @@ class DFA:
         except StopIteration:
             self.marker_pos = None
 
+    @classmethod
+    def from_transitions(cls, transitions, initial_state, accepting_states, states,
+                         alphabet, symbol_classes, class_of, class_ranges, symbol_class_ids=None,
+                         accepting_rule=None, rules_by_order=None, pos_to_symbol=None,
+                         pos_to_rule=None, marker_pos=None, state_sets=None):
+        """
+        DFA ya construido, sin árbol ni followpos: sus transiciones
+        {estado: {clase: destino}}, sus estados {clave: estado} y la partición
+        del alfabeto en clases (como la deja compute_symbol_classes). Lo usan
+        minimize_dfa y product_dfa; el resto de atributos queda vacío y las
+        tablas compiladas.
+        """
+        dfa = cls.__new__(cls)
+        dfa.syntax_tree = None
+        dfa.state_budget = None
+        dfa.transition_budget = None
+        dfa.time_budget = None
+        dfa.followpos = None
+        dfa.pos_to_symbol = {} if pos_to_symbol is None else pos_to_symbol
+        dfa.pos_to_rule = {} if pos_to_rule is None else pos_to_rule
+        dfa.marker_pos = marker_pos
+        dfa.alphabet = alphabet
+        dfa.symbol_classes = symbol_classes
+        dfa.class_of = class_of
+        dfa.class_ranges = class_ranges
+        dfa.class_starts = array('i', [lo for lo, _, _ in class_ranges])
+        dfa.symbol_class_ids = {} if symbol_class_ids is None else symbol_class_ids
+        dfa.states = states
+        dfa.transitions = transitions
+        dfa.initial_state = initial_state
+        dfa.accepting_states = accepting_states
+        dfa.accepting_rule = accepting_rule
+        dfa.rules_by_order = rules_by_order
+        dfa.state_sets = state_sets
+        dfa.compile_tables()
+        return dfa
+
     def compute_followpos(self, node):
-        followpos = {}
-
-        def init_followpos(n):
-            if isinstance(n, NodoHoja):
-                followpos[n.posicion] = set()
-            elif isinstance(n, NodoBinario):
-                init_followpos(n.izquierdo)
-                init_followpos(n.derecho)
-            elif isinstance(n, NodoUnario):
-                init_followpos(n.hijo)
-        init_followpos(node)
+        """
+        Devuelve followpos como lista indexada por posición; cada conjunto es un
+        entero usado como bitset (ver NodoBase).
+        """
+        # firstpos/lastpos ya están calculados en cada nodo, así que el orden del
+        # recorrido no importa; iter_nodes visita cada nodo una vez y sin recursión
+        nodes = list(iter_nodes(node))
+        max_pos = max((n.posicion for n in nodes if isinstance(n, NodoHoja)), default=0)
+        followpos = [0] * (max_pos + 1)
 
-        def traverse(n):
+        for n in nodes:
             if isinstance(n, NodoBinario):
-                traverse(n.izquierdo)
-                traverse(n.derecho)
                 if n.valor == '.':
-                    # Para cada p en lastpos(izquierdo), followpos[p] += firstpos(derecho)
-                    for pos in n.izquierdo.lastpos:
-                        followpos[pos].update(n.derecho.firstpos)
+                    # Para cada p en lastpos(izquierdo), followpos[p] |= firstpos(derecho)
+                    first = n.derecho.firstpos_bits
+                    for pos in bits_to_positions(n.izquierdo.lastpos_bits):
+                        followpos[pos] |= first
             elif isinstance(n, NodoUnario):
-                traverse(n.hijo)
-                if n.valor == '*':
-                    # Para cada p en lastpos(hijo), followpos[p] += firstpos(hijo)
-                    for pos in n.hijo.lastpos:
-                        followpos[pos].update(n.hijo.firstpos)
+                if n.valor in ('*', '+'):
+                    # Para cada p en lastpos(hijo), followpos[p] |= firstpos(hijo)
+                    first = n.hijo.firstpos_bits
+                    for pos in bits_to_positions(n.hijo.lastpos_bits):
+                        followpos[pos] |= first
             # NodoHoja no hace nada
-        traverse(node)
 
         return followpos
 
 
     def compute_pos_to_symbol(self, node):
         """Crea un diccionario que mapea cada posición de un nodo hoja a su símbolo."""
-        pos_to_symbol = {}
-
-        def traverse(n):
-            if isinstance(n, NodoHoja):
-                pos_to_symbol[n.posicion] = n.valor
-            elif isinstance(n, NodoBinario):
-                traverse(n.izquierdo)
-                traverse(n.derecho)
-            elif isinstance(n, NodoUnario):
-                traverse(n.hijo)
-        traverse(node)
-        return pos_to_symbol
+        return {n.posicion: n.valor for n in iter_nodes(node) if isinstance(n, NodoHoja)}
+
+    def compute_pos_to_rule(self, node):
+        """Mapea cada posición de aceptación de una regla (hoja RegexNode('rule')) a su identificador."""
+        return {n.posicion: n.regla for n in iter_nodes(node)
+                if isinstance(n, NodoHoja) and n.regla is not None}
+
+    def compute_symbol_classes(self, node):
+        """
+        Agrupa los símbolos del alfabeto en clases de equivalencia: dos símbolos
+        van en la misma clase si aparecen exactamente en los mismos grupos de hojas.
+        Un grupo es una alternancia formada sólo por hojas (p. ej. a|b|c); sus
+        posiciones comparten followpos y siempre aparecen juntas en los estados,
+        así que el AFD no puede distinguir sus símbolos. Los CharSet y los
+        caracteres sueltos se parten antes en intervalos disjuntos.
+        Devuelve (clases, {símbolo o carácter Latin-1: clase},
+        [(lo, hi, clase)] ordenados, {símbolo: clases que cubre}).
+        """
+        # Alternancias de sólo hojas, calculado de abajo hacia arriba (postorden)
+        leaf_alternation = set()
+        for n in iter_nodes(node):
+            if (isinstance(n, NodoBinario) and n.valor == '|'
+                    and all(isinstance(h, NodoHoja) or id(h) in leaf_alternation
+                            for h in (n.izquierdo, n.derecho))):
+                leaf_alternation.add(id(n))
+
+        # Cada grupo es una alternancia maximal de sólo hojas o una hoja suelta;
+        # cada hoja cae en un solo grupo, así que el recorrido es lineal
+        groups = []
+        visited = set()
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            if id(n) in visited:
+                continue
+            visited.add(id(n))
+            if id(n) in leaf_alternation:
+                groups.append([h.valor for h in iter_nodes(n) if isinstance(h, NodoHoja)])
+            elif isinstance(n, NodoHoja):
+                groups.append([n.valor])
+            else:
+                stack.extend(reversed(child_nodes(n)))
+
+        def intervals_of(sym):
+            # Un CharSet o un carácter son intervalos; los símbolos de varios
+            # caracteres (p. ej. '\\.') son opacos y forman su propio átomo
+            if isinstance(sym, CharSet):
+                return sym.intervals
+            if len(sym) == 1:
+                return ((ord(sym), ord(sym)),)
+            return None
+
+        # Fronteras de los intervalos elementales: todos los intervalos se parten
+        # en rangos disjuntos [bounds[e], bounds[e+1])
+        bounds = set()
+        for sym in self.alphabet:
+            for lo, hi in intervals_of(sym) or ():
+                bounds.add(lo)
+                bounds.add(hi + 1)
+        bounds = sorted(bounds)
+
+        # Firma de cada intervalo elemental y de cada símbolo opaco: los grupos en los que aparece
+        interval_signature = {}
+        opaque_signature = {}
+
+        def sign(signature, key, group_id):
+            groups_of_key = signature.setdefault(key, [])
+            if not groups_of_key or groups_of_key[-1] != group_id:
+                groups_of_key.append(group_id)
+
+        for group_id, symbols in enumerate(groups):
+            for sym in symbols:
+                if sym == '#':
+                    continue
+                intervals = intervals_of(sym)
+                if intervals is None:
+                    sign(opaque_signature, sym, group_id)
+                    continue
+                for lo, hi in intervals:
+                    for e in range(bisect_left(bounds, lo), bisect_left(bounds, hi + 1)):
+                        sign(interval_signature, e, group_id)
+
+        classes, class_of, ranges, _, element_class = partition_classes(
+            bounds, interval_signature, opaque_signature)
+
+        # Clases que cubre cada símbolo (un CharSet puede abarcar varias)
+        symbol_class_ids = {}
+        for sym in self.alphabet:
+            intervals = intervals_of(sym)
+            if intervals is None:
+                symbol_class_ids[sym] = (class_of[sym],)
+                continue
+            ids = set()
+            for lo, hi in intervals:
+                for e in range(bisect_left(bounds, lo), bisect_left(bounds, hi + 1)):
+                    ids.add(element_class[e])
+            symbol_class_ids[sym] = tuple(sorted(ids))
+        return classes, class_of, ranges, symbol_class_ids
+
+    def class_label(self, class_id):
+        """Texto legible de una clase: su único símbolo o sus símbolos entre corchetes."""
+        labels = []
+        for item in self.symbol_classes[class_id]:
+            if isinstance(item, str):
+                labels.append(item)
+            else:
+                lo, hi = item
+                labels.append(chr(lo) if lo == hi else f"{chr(lo)}-{chr(hi)}")
+        if len(labels) == 1 and len(labels[0]) == 1:
+            return labels[0]
+        return "[" + "".join(labels) + "]"
 
     def build_dfa(self):
-        initial = frozenset(self.syntax_tree.raiz.firstpos)
+        initial = self.syntax_tree.raiz.firstpos_bits
         self.states[initial] = 0
         self.initial_state = 0
-        unmarked_states = [initial]
+        unmarked_states = deque([initial])
         state_id_counter = 0
+        # Clases de cada posición ('#' no tiene clase: no genera transiciones)
+        pos_classes = {pos: self.symbol_class_ids.get(sym, ())
+                       for pos, sym in self.pos_to_symbol.items()}
+        state_budget = self.state_budget
+        transition_budget = self.transition_budget
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        num_transitions = 0
 
         while unmarked_states:
-            current = unmarked_states.pop(0)
+            current = unmarked_states.popleft()
             current_state_id = self.states[current]
-            self.transitions[current_state_id] = {}
-
-            for symbol in self.alphabet:
-                u = set()
-                for pos in current:
-                    if self.pos_to_symbol[pos] == symbol:
-                        u.update(self.followpos[pos])
-                if u:
-                    u = frozenset(u)
-                    if u not in self.states:
-                        state_id_counter += 1
-                        self.states[u] = state_id_counter
-                        unmarked_states.append(u)
-                    self.transitions[current_state_id][symbol] = self.states[u]
+            transitions = self.transitions[current_state_id] = {}
+
+            # Una sola pasada reparte las posiciones por clase: sólo se visitan
+            # las clases que de verdad aparecen en el estado
+            buckets = {}
+            followpos = self.followpos
+            for pos in bits_to_positions(current):
+                follow = followpos[pos]
+                for class_id in pos_classes[pos]:
+                    buckets[class_id] = buckets.get(class_id, 0) | follow
+
+            for class_id in sorted(buckets):
+                u = buckets[class_id]
+                if not u:
+                    continue
+                target = self.states.get(u)
+                if target is None:
+                    state_id_counter += 1
+                    if state_budget is not None and state_id_counter >= state_budget:
+                        raise DFABudgetExceeded(f"El AFD supera {state_budget} estados")
+                    target = self.states[u] = state_id_counter
+                    unmarked_states.append(u)
+                transitions[class_id] = target
+            num_transitions += len(transitions)
+            if transition_budget is not None and num_transitions > transition_budget:
+                raise DFABudgetExceeded(f"El AFD supera {transition_budget} transiciones")
+            if deadline is not None and time.perf_counter() > deadline:
+                raise DFABudgetExceeded(f"La construcción del AFD supera {self.time_budget} s")
 
         # Estados de aceptación: usa get() para evitar KeyError si falta alguna posición
+        end_bits = 0
+        for p, sym in self.pos_to_symbol.items():
+            if sym == '#':
+                end_bits |= 1 << p
         for state_set, state_id in self.states.items():
-            if any(self.pos_to_symbol[p] == '#' for p in state_set):
+            if state_set & end_bits:
                 self.accepting_states.add(state_id)
         # Fallback: solo si aún no hay aceptadores Y hay posiciones definidas
         if not self.accepting_states and self.pos_to_symbol:
-            max_pos = max(self.pos_to_symbol)
+            max_bit = 1 << max(self.pos_to_symbol)
             for state_set, state_id in self.states.items():
-                if max_pos in state_set:
+                if state_set & max_bit:
                     self.accepting_states.add(state_id)
         
 
-    def simulate(self, string):
+    def compile_tables(self):
         """
-        Simula el AFD con la cadena de entrada 'string'.
-        Retorna True si, tras procesar todos los caracteres,
-        el estado en que quedas está marcado como de aceptación.
+        Compila las transiciones a una tabla densa array('i') de
+        (estados + 1) × (clases + 1) entradas, indexada por estado * columns + clase.
+        El estado denso 0 es el estado muerto y el estado_id s pasa a ser s + 1; la
+        última columna recoge los caracteres fuera del alfabeto (van al estado muerto).
+          accept_table[s] → 'order' de la regla que acepta en s (0 sin reglas asignadas; -1 si no acepta)
+          live_table[s]   → 1 si desde s todavía se puede llegar a aceptar
         """
-        current = self.initial_state
-        for ch in string:
-            trans = self.transitions.get(current, {})
-            if ch not in trans:
-                return False
-            current = trans[ch]
-        return current in self.accepting_states
-
+        columns = len(self.symbol_classes) + 1
+        size = max(self.transitions, default=-1) + 2
+        table = array('i', bytes(4 * size * columns))
+        for state_id, trans in self.transitions.items():
+            row = (state_id + 1) * columns
+            for class_id, target in trans.items():
+                table[row + class_id] = target + 1
+
+        accept = array('i', [-1]) * size
+        for state_id in self.accepting_states:
+            if self.accepting_rule is None:
+                accept[state_id + 1] = 0
+            else:
+                accept[state_id + 1] = self.accepting_rule[state_id]['order']
 
+        # Vivos: los que alcanzan un estado de aceptación (recorrido inverso)
+        predecessors = {}
+        for state_id, trans in self.transitions.items():
+            for target in trans.values():
+                predecessors.setdefault(target, set()).add(state_id)
+        live = bytearray(size)
+        pending = list(self.accepting_states)
+        while pending:
+            state_id = pending.pop()
+            if not live[state_id + 1]:
+                live[state_id + 1] = 1
+                pending.extend(predecessors.get(state_id, ()))
+
+        self.columns = columns
+        self.other_class = columns - 1
+        self.start_state = self.initial_state + 1
+        self.table = table
+        self.accept_table = accept
+        self.live_table = live
+
+    def freeze(self):
+        """
+        Devuelve un CompiledDFA con las tablas de este AFD y nada más: el árbol,
+        followpos, los conjuntos de posiciones y las transiciones por estado se
+        pueden liberar en cuanto no quede ninguna referencia al DFA.
+        """
+        return CompiledDFA(self.table, self.columns, self.start_state, self.accept_table,
+                           self.live_table, dict(self.class_of), tuple(self.class_ranges),
+                           self.rules_by_order)
 
     def print_dfa(self):
         """Imprime la tabla de transiciones y los estados de aceptación."""
         print("Estados y sus conjuntos de posiciones:")
         for state_set, state_id in self.states.items():
             aceptacion = " (aceptación)" if state_id in self.accepting_states else ""
-            print(f"Estado {state_id}{aceptacion}: {set(state_set)}")
+            print(f"Estado {state_id}{aceptacion}: {set(bits_to_positions(state_set))}")
         print("\nTransiciones:")
         for state_id, trans in self.transitions.items():
-            for symbol, target in trans.items():
-                print(f"  δ({state_id}, '{symbol}') = {target}")
+            for class_id, target in trans.items():
+                print(f"  δ({state_id}, '{self.class_label(class_id)}') = {target}")
 
 
 
@@ -157,7 +639,7 @@ class DFA:
         # Agregar estados
         for state_set, state_id in self.states.items():
             shape = "doublecircle" if state_id in self.accepting_states else "circle"
-            label = f"q{state_id}\n{state_set}"
+            label = f"q{state_id}\n{set(bits_to_positions(state_set))}"
             dot.node(str(state_id), label=label, shape=shape)
 
         # Estado inicial
@@ -166,8 +648,8 @@ class DFA:
 
         # Agregar transiciones
         for state_id, trans_dict in self.transitions.items():
-            for symbol, target_id in trans_dict.items():
-                symbol_escaped = symbol.replace('\\', '\\\\').replace('"', '\\"')
+            for class_id, target_id in trans_dict.items():
+                symbol_escaped = self.class_label(class_id).replace('\\', '\\\\').replace('"', '\\"')
                 dot.edge(str(state_id), str(target_id), label=f"\"{symbol_escaped}\"")
 
         # Guardar la imagen en la carpeta 'imagenes/'
@@ -176,70 +658,30 @@ class DFA:
 
         print(f"Imagen del DFA guardada en: {output_path}.png")
 
-    def match_prefix(self, input_str):
-        """
-        Escanea input_str + '#' al final y devuelve la longitud
-        del mayor prefijo reconocido por el DFA (sin contar '#').
-        """
-        current_state = self.initial_state
-        last_accept_pos = -1
-        # Escaneamos los caracteres reales más un '#' al final
-        stream = input_str + '#'
-        for i, ch in enumerate(stream, start=1):
-            trans = self.transitions.get(current_state, {})
-            if ch not in trans:
-                break
-            current_state = trans[ch]
-            # Si es estado de aceptacion, guardamos la posición
-            if current_state in self.accepting_states:
-                last_accept_pos = i
-        # last_accept_pos == índice en stream donde fue aceptado;
-        # como en stream aparece '#' en la última posición válida,
-        # y queremos la longitud sobre input_str, devolvemos last_accept_pos
-        # sólo si es ≥ 0 y menor que len(input_str)+1
-        return last_accept_pos
-    
-    
-    def match_prefix_and_token(self, input_str):
+    def assign_rules(self, rules):
         """
-        Recorre input_str y devuelve (largo, token_info) donde token_info
-        proviene de marker_to_rule para el marcador más prioritario.
+        rules es la info ({'order', ...}) de cada regla cuyas hojas de
+        aceptación (RegexNode('rule') con su 'order') están en el árbol. Asocia
+        a cada estado la regla más prioritaria (menor 'order') de entre las que
+        terminan en él, de modo que los estados de aceptación son exactamente
+        los que contienen alguna posición de aceptación de una regla.
         """
-        current_state = self.initial_state
-        last_accept_pos = -1
-        accepted_state = None
-        pos = 0
-
-        for ch in input_str:
-            trans = self.transitions.get(current_state, {})
-            if ch in trans:
-                current_state = trans[ch]
-                pos += 1
-                if current_state in self.accepting_states:
-                    last_accept_pos = pos
-                    accepted_state = current_state
-            else:
-                break
-
-        if last_accept_pos != -1 and accepted_state is not None:
-            # obtenemos el conjunto de posiciones del estado aceptador
-            state_set = self.state_sets[accepted_state]
-            matched_marker = None
-            for p in state_set:
-                sym = self.pos_to_symbol[p]
-                if sym in self.marker_to_rule:
-                    # elegimos el marcador de menor 'order'
-                    if (matched_marker is None or
-                        self.marker_to_rule[sym]['order'] <
-                        self.marker_to_rule[matched_marker]['order']):
-                        matched_marker = sym
-            if matched_marker is not None:
-                return last_accept_pos, self.marker_to_rule[matched_marker]
+        self.rules_by_order = {info['order']: info for info in rules}
+        self.accepting_rule = {}
+        # Sólo interesan las posiciones de aceptación de las reglas conocidas
+        rule_bits = 0
+        for p, order in self.pos_to_rule.items():
+            if order in self.rules_by_order:
+                rule_bits |= 1 << p
+        for state_set, state_id in self.states.items():
+            best = min((self.pos_to_rule[p] for p in bits_to_positions(state_set & rule_bits)),
+                       default=None)
+            if best is not None:
+                self.accepting_rule[state_id] = self.rules_by_order[best]
+        self.accepting_states = set(self.accepting_rule)
+        self.compile_tables()
 
-        return 0, None
 
- 
- 
 if __name__ == "__main__":
     # Ejemplo de uso:
     # 1. Se define una expresión regular.
@@ -0,0 +1,219 @@
+# lexer.src/models/lazydfa.py
+from collections import OrderedDict
+from lexer.src.models.dfa import DFA
+from lexer.src.models.regex_ast import sequence
+from lexer.src.models.syntax_tree import RuleTrees, bits_to_positions
+
+
+class LazyState:
+    """
+    Estado construido bajo demanda.
+      bits   → conjunto de posiciones (bitset entero)
+      row    → {clase: bitset destino}, calculado de una vez al crear el estado
+      next   → {clase: LazyState} ya resueltos; None si el estado no está en la caché
+      accept → 'order' de la regla que acepta (0 sin reglas asignadas; -1 si no acepta)
+      used   → bit de referencia del reemplazo CLOCK
+    """
+
+    __slots__ = ("bits", "row", "next", "accept", "used")
+
+    def __init__(self, bits, row, accept):
+        self.bits = bits
+        self.row = row
+        self.next = None
+        self.accept = accept
+        self.used = True
+
+
+class LazyDFA(DFA):
+    """
+    AFD perezoso: usa las mismas posiciones y followpos que DFA, pero sólo crea
+    los estados que la entrada alcanza y los guarda en una caché de a lo sumo
+    max_states estados (reemplazo CLOCK, una aproximación de LRU). Si la caché
+    está llena y, en una ventana de 'window' caracteres, más de max_miss_rate
+    de los pasos crean estados nuevos, deja de cachear y simula directamente
+    sobre los conjuntos de posiciones hasta que la tasa vuelve a bajar (como
+    hace RE2). Ofrece la misma interfaz de reconocimiento que DFA.
+    """
+
+    def __init__(self, syntax_tree, max_states=4096, window=4096, max_miss_rate=0.25):
+        # El estado inicial nunca se desaloja: hace falta sitio para al menos otro
+        self.max_states = max(2, max_states)
+        self.window = window
+        self.max_miss_rate = max_miss_rate
+        super().__init__(syntax_tree)
+
+    def build_dfa(self):
+        """No construye estados por adelantado: sólo prepara los datos por posición."""
+        # Clases de cada posición ('#' no genera transiciones)
+        self.pos_classes = [()] * (len(self.followpos))
+        for pos, sym in self.pos_to_symbol.items():
+            self.pos_classes[pos] = self.symbol_class_ids.get(sym, ())
+        self.end_bits = 0
+        for pos, sym in self.pos_to_symbol.items():
+            if sym == '#':
+                self.end_bits |= 1 << pos
+        # Igual que DFA.build_dfa: sin '#', acepta la última posición
+        if not self.end_bits and self.pos_to_symbol:
+            self.end_bits = 1 << max(self.pos_to_symbol)
+        self.rule_order = {}
+        self.rule_bits = 0
+        self.initial_state = 0
+        self.dead = LazyState(0, {}, -1)
+        self.dead.next = {}
+
+    def compile_tables(self):
+        """Sin tabla densa: sólo la columna de caracteres fuera del alfabeto y la caché vacía."""
+        self.columns = len(self.symbol_classes) + 1
+        self.other_class = self.columns - 1
+        self.reset_cache()
+
+    def reset_cache(self):
+        self.cache = OrderedDict()
+        self.steps = 0
+        self.misses = 0
+        self.fallback = False
+        self.start = self.state_for(self.syntax_tree.raiz.firstpos_bits)
+
+    def assign_rules(self, rules):
+        """
+        Igual que DFA.assign_rules, pero la regla de cada estado se calcula al
+        crearlo: aquí sólo se guardan las posiciones de aceptación de las reglas.
+        """
+        self.rules_by_order = {info['order']: info for info in rules}
+        self.accepting_rule = {}
+        self.rule_order = {p: order for p, order in self.pos_to_rule.items()
+                           if order in self.rules_by_order}
+        self.rule_bits = 0
+        for p in self.rule_order:
+            self.rule_bits |= 1 << p
+        self.compile_tables()
+
+    def new_state(self, bits):
+        """Calcula la fila de transiciones y la aceptación de un conjunto de posiciones."""
+        row = {}
+        followpos, pos_classes = self.followpos, self.pos_classes
+        for pos in bits_to_positions(bits):
+            follow = followpos[pos]
+            for class_id in pos_classes[pos]:
+                row[class_id] = row.get(class_id, 0) | follow
+        if self.accepting_rule is None:
+            accept = 0 if bits & self.end_bits else -1
+        else:
+            accept = min((self.rule_order[p] for p in bits_to_positions(bits & self.rule_bits)),
+                         default=-1)
+        return LazyState(bits, row, accept)
+
+    def state_for(self, bits):
+        """Estado de la caché para 'bits'; lo crea (y lo cachea, salvo en modo respaldo) si falta."""
+        state = self.cache.get(bits)
+        if state is None:
+            self.misses += 1
+            state = self.new_state(bits)
+            if not self.fallback:
+                if len(self.cache) >= self.max_states:
+                    self.evict()
+                state.next = {}
+                self.cache[bits] = state
+        state.used = True
+        return state
+
+    def evict(self):
+        """Desaloja un estado con CLOCK: los usados desde la última vuelta tienen otra oportunidad."""
+        cache = self.cache
+        while True:
+            bits, state = cache.popitem(last=False)
+            if state is self.start or state.used:
+                state.used = False
+                cache[bits] = state
+                continue
+            # Los estados que aún lo referencian lo recalculan en step()
+            state.next = None
+            state.row = None
+            return
+
+    def step(self, state, class_id):
+        """Transición que no está resuelta en la caché: se calcula desde las posiciones."""
+        if state.row is None:
+            # El estado fue desalojado mientras se recorría la entrada
+            state = self.state_for(state.bits)
+        bits = state.row.get(class_id, 0)
+        target = self.state_for(bits) if bits else self.dead
+        if state.next is not None and target.next is not None:
+            state.next[class_id] = target
+        return target
+
+    def count_steps(self, steps):
+        """Cada 'window' caracteres decide si la caché sirve o conviene el respaldo."""
+        self.steps += steps
+        if self.steps >= self.window:
+            full = len(self.cache) >= self.max_states
+            self.fallback = full and self.misses > self.max_miss_rate * self.steps
+            self.steps = 0
+            self.misses = 0
+
+    def longest_match_rule(self, text, start, end):
+        """
+        Recorre text[start:end] y devuelve (largo, order, parada): el mayor
+        prefijo aceptado y su regla ((-1, -1) si ninguno) y el índice donde se
+        detuvo el recorrido (end si el AFD seguía vivo al final).
+        """
+        class_of = self.class_of
+        dead = self.dead
+        state = self.start
+        last_accept_pos = -1
+        accepted_rule = -1
+        pos = start
+        while pos < end:
+            ch = text[pos]
+            class_id = class_of.get(ch)
+            if class_id is None:
+                class_id = self.lookup_class(ch)
+            nxt = state.next.get(class_id) if state.next is not None else None
+            if nxt is None or nxt.next is None:
+                nxt = self.step(state, class_id)
+            else:
+                nxt.used = True
+            state = nxt
+            if state is dead:
+                break
+            pos += 1
+            if state.accept >= 0:
+                last_accept_pos = pos - start
+                accepted_rule = state.accept
+        self.count_steps(pos - start)
+        return last_accept_pos, accepted_rule, pos
+
+    def simulate(self, string):
+        length, _, _ = self.longest_match_rule(string, 0, len(string))
+        if not string:
+            return self.start.accept >= 0
+        return length == len(string)
+
+    def longest_match(self, text, start, end):
+        return self.longest_match_rule(text, start, end)[0]
+
+    def match_prefix_and_token(self, input_str, start=0, end=None):
+        if end is None:
+            end = len(input_str)
+        length, rule, _ = self.longest_match_rule(input_str, start, end)
+        if rule >= 0:
+            return length, self.rules_by_order[rule]
+        return 0, None
+
+
+def compile_lazy_rules(rules, definitions=(), **cache_options):
+    """
+    Construye un solo LazyDFA para todas las reglas que no caben en el DFA
+    global (lo usa el lexer generado): la alternancia de las reglas, cada una
+    terminada en su hoja de aceptación (tag_rule), con las reglas asignadas,
+    de modo que un recorrido del texto prueba todas a la vez. rules es
+    [(info de la regla, expresión)], con el 'order' de cada regla en su info,
+    y definitions [(ident, expresión)] en orden de dependencias, ambas ya
+    escapadas para RegexParser (como las deja expand_rule_regex).
+    """
+    trees = RuleTrees(definitions)
+    ast = sequence('|', [trees.rule_ast(regex, info['order']) for info, regex in rules])
+    engine = LazyDFA(trees.syntax_tree(ast), **cache_options)
+    engine.assign_rules([info for info, _ in rules])
+    return engine
@@ -6,133 +6,168 @@ import graphviz
 
 def minimize_dfa(dfa: DFA) -> DFA:
     """
-    Minimiza el DFA usando el algoritmo de Hopcroft.
+    Minimiza el DFA usando el algoritmo de Hopcroft en O(n·|Σ|·log n).
     Devuelve una NUEVA instancia de DFA que represente el autómata mínimo.
+
+    Se trabaja sobre el autómata completado con un estado sumidero (las
+    transiciones ausentes van a él) y, al final, se descarta el bloque del
+    sumidero: sus estados nunca llegan a aceptar.
+
+    Si el DFA tiene reglas asignadas (assign_rules), la partición inicial
+    tiene un bloque por regla ganadora, de modo que nunca se fusionan estados
+    que aceptan tokens distintos, y el resultado conserva la regla de cada estado.
     """
 
     # 1) Recolectar la info necesaria
     # --------------------------------
-    all_states = set(dfa.states.values())  # conjunto de IDs de estados (ej. {0, 1, 2, ...})
-    alphabet = dfa.alphabet
+    states = sorted(dfa.transitions)
+    sink = len(states)
+    num_states = sink + 1
+    index_of = {state: i for i, state in enumerate(states)}
+    num_classes = len(dfa.symbol_classes)
     accepting_states = dfa.accepting_states
+    accepting_rule = dfa.accepting_rule
     initial_state = dfa.initial_state
 
-    # 2) Crear la partición inicial: A = estados de aceptación, B = el resto
-    # ---------------------------------------------------------------------
-    accepting = accepting_states
-    non_accepting = all_states - accepting
-
-    P = []
-    if accepting:
-        P.append(accepting)
-    if non_accepting:
-        P.append(non_accepting)
-
-    W = P.copy()
+    # Transiciones inversas: inverse[clase][destino] = [orígenes]
+    inverse = [[[] for _ in range(num_states)] for _ in range(num_classes)]
+    for state in states:
+        source = index_of[state]
+        trans = dfa.transitions[state]
+        for class_id in range(num_classes):
+            target = trans.get(class_id)
+            inverse[class_id][sink if target is None else index_of[target]].append(source)
+    for class_id in range(num_classes):
+        inverse[class_id][sink].append(sink)
+
+    # 2) Partición refinable sobre arreglos
+    # -------------------------------------
+    # elems guarda los estados de modo que cada bloque ocupa un tramo contiguo
+    # [first[b], end[b]); marked[b] cuenta los marcados (al principio del tramo).
+    # Partición inicial: no aceptación (con el sumidero) y un bloque por regla
+    # ganadora; sin reglas asignadas, un único bloque de aceptación
+    initial_blocks = {}
+    for i in range(num_states):
+        if i == sink or states[i] not in accepting_states:
+            key = None
+        elif accepting_rule is None:
+            key = True
+        else:
+            key = accepting_rule[states[i]]['order']
+        initial_blocks.setdefault(key, []).append(i)
+
+    elems = []
+    block_of = [0] * num_states
+    first, end, marked = [], [], []
+    for members in initial_blocks.values():
+        b = len(first)
+        first.append(len(elems))
+        for i in members:
+            block_of[i] = b
+            elems.append(i)
+        end.append(len(elems))
+        marked.append(0)
+    location = [0] * num_states
+    for pos, i in enumerate(elems):
+        location[i] = pos
+
+    # 3) Algoritmo de Hopcroft con una lista de trabajo de pares (bloque, clase)
+    # --------------------------------------------------------------------------
+    # Inicialmente basta con todos los bloques menos el más grande
+    largest = max(range(len(first)), key=lambda b: end[b] - first[b])
+    W = {(b, class_id) for b in range(len(first)) if b != largest
+         for class_id in range(num_classes)}
 
-    # 3) Algoritmo de Hopcroft: refinamiento de bloques
-    # -------------------------------------------------
-    # P = Pila de bloques (particiones), W = cola de bloques a procesar
     while W:
-        R = W.pop()  # Toma un bloque a refinar
-        for symbol in alphabet:
-            # X = todos los estados que tienen transición con `symbol` a un estado de R
-            X = set()
-            # Para cada estado en todo el autómata
-            for state in all_states:
-                # Determina el posible destino
-                destino = dfa.transitions.get(state, {}).get(symbol, None)
-                if destino in R:
-                    X.add(state)
-
-            # Para cada bloque Y en P, vamos a ver la intersección con X
-            new_P = []
-            for Y in P:
-                # Intersección y diferencia
-                intersection = Y.intersection(X)
-                difference = Y - X
-                if intersection and difference:
-                    # Se parte Y en intersection y difference
-                    new_P.append(intersection)
-                    new_P.append(difference)
-                    # Ajustar W
-                    if Y in W:
-                        # Reemplaza Y en W por los dos sub-bloques
-                        W.remove(Y)
-                        W.append(intersection)
-                        W.append(difference)
-                    else:
-                        # Añade el sub-bloque más pequeño
-                        if len(intersection) <= len(difference):
-                            W.append(intersection)
-                        else:
-                            W.append(difference)
+        splitter, class_id = W.pop()
+        inv = inverse[class_id]
+        touched = []
+        # Marca los predecesores de los estados del bloque separador
+        for target in elems[first[splitter]:end[splitter]]:
+            for source in inv[target]:
+                b = block_of[source]
+                pos = location[source]
+                boundary = first[b] + marked[b]
+                if pos >= boundary:
+                    # Intercambia el estado al final de la zona marcada de su bloque
+                    other = elems[boundary]
+                    elems[pos], elems[boundary] = other, source
+                    location[other], location[source] = pos, boundary
+                    if marked[b] == 0:
+                        touched.append(b)
+                    marked[b] += 1
+
+        # Separa cada bloque tocado en su parte marcada y la no marcada
+        for b in touched:
+            count = marked[b]
+            marked[b] = 0
+            if count == end[b] - first[b]:
+                continue
+            new_block = len(first)
+            first.append(first[b])
+            end.append(first[b] + count)
+            marked.append(0)
+            first[b] += count
+            for pos in range(first[new_block], end[new_block]):
+                block_of[elems[pos]] = new_block
+            smaller = new_block if count <= end[b] - first[b] else b
+            for c in range(num_classes):
+                if (b, c) in W:
+                    W.add((new_block, c))
                 else:
-                    # Si no hay partición, queda igual
-                    new_P.append(Y)
-            P = new_P
-
-    # 4) Construir el DFA mínimo a partir de la partición final P
-    # -----------------------------------------------------------
-    # Ahora, cada bloque en P es un estado "colapsado" en el DFA mínimo.
-
-    # Asignar un ID nuevo a cada bloque
-    min_state_map = {}  # asigna "representante" -> "nuevo estado ID"
-    new_states_list = []
-    new_id = 0
-
-    for block in P:
-        # Escogemos un representante (podría ser min(block) o simplemente sacamos uno)
-        rep = min(block)  # escogemos el menor ID como "representante"
-        for st in block:
-            min_state_map[st] = new_id
-        new_states_list.append(block)
-        new_id += 1
-
-    # Estados de aceptación en el DFA mínimo
-    new_accepting_states = set()
-    for block in P:
-        # Si al menos un estado del bloque era de aceptación, todo el bloque lo es
-        rep = min(block)
-        if block & accepting_states:  # intersección no vacía
-            new_accepting_states.add(min_state_map[rep])
-
-    # Nuevo estado inicial
-    new_initial_state = min_state_map[initial_state]
+                    W.add((smaller, c))
+
+    # 4) Construir el DFA mínimo a partir de la partición final
+    # ---------------------------------------------------------
+    # Los bloques se numeran por su menor estado original; el del sumidero se
+    # descarta salvo que contenga al estado inicial (lenguaje vacío).
+    sink_block = block_of[sink]
+    initial_block = block_of[index_of[initial_state]]
+    blocks = {}
+    for i in range(sink):
+        b = block_of[i]
+        if b != sink_block or b == initial_block:
+            blocks.setdefault(b, []).append(states[i])
+    ordered = sorted(blocks, key=lambda b: blocks[b][0])
+    min_state_map = {b: new_id for new_id, b in enumerate(ordered)}
 
-    # Construir nuevas transiciones
     new_transitions = {}
-    for block in P:
-        rep = min(block)  # ID representativo
-        rep_new_state = min_state_map[rep]
-        new_transitions[rep_new_state] = {}
-        # Tomamos las transiciones del representative
-        for symbol in alphabet:
-            old_target = dfa.transitions[rep].get(symbol, None)
-            if old_target is not None:
-                new_target = min_state_map[old_target]
-                new_transitions[rep_new_state][symbol] = new_target
+    new_accepting_states = set()
+    for b in ordered:
+        new_id = min_state_map[b]
+        rep = blocks[b][0]  # escogemos el menor ID como "representante"
+        new_transitions[new_id] = {}
+        for class_id, old_target in dfa.transitions[rep].items():
+            target_block = block_of[index_of[old_target]]
+            if target_block in min_state_map and target_block != sink_block:
+                new_transitions[new_id][class_id] = min_state_map[target_block]
+        if rep in accepting_states:
+            new_accepting_states.add(new_id)
 
     # 5) Crear un nuevo DFA con la información minimizada
     # ---------------------------------------------------
-    min_dfa = DFA.__new__(DFA)  # creamos una instancia vacía de DFA
-    # Llenamos sus atributos
-    min_dfa.alphabet = alphabet
-    # Reconstruimos states como { frozenset(...) : id }, aunque ya no necesitamos frozenset.
-    # Pero para mantener la misma interfaz, guardamos que cada "bloque" se asocia a un ID.
-    min_dfa.states = {}
-    for block_idx, block in enumerate(P):
-        # construimos un set ficticio como "frozenset(block)"
-        # *pero ojo, block contiene IDs, no sets de posiciones
-        # si quieres, asigna un dummy: frozenset({block_idx})
-        # Lo importante es no romper la interfaz.  ;)
-        min_dfa.states[frozenset(block)] = block_idx
-
-    min_dfa.transitions = new_transitions
-    min_dfa.initial_state = new_initial_state
-    min_dfa.accepting_states = new_accepting_states
-    min_dfa.followpos = None  # ya no es relevante
-    min_dfa.pos_to_symbol = None  # ya no es relevante
+    # Se conservan las posiciones de cada bloque y la regla ganadora de cada estado
+    min_state_sets = None
+    if dfa.state_sets is not None:
+        # Bitsets de posiciones: la unión del bloque es un OR
+        min_state_sets = {}
+        for b in ordered:
+            bits = 0
+            for st in blocks[b]:
+                bits |= dfa.state_sets[st]
+            min_state_sets[min_state_map[b]] = bits
+    min_accepting_rule = None
+    if accepting_rule is not None:
+        min_accepting_rule = {min_state_map[b]: accepting_rule[blocks[b][0]]
+                              for b in ordered if blocks[b][0] in accepting_states}
+    # Para mantener la misma interfaz, cada bloque (conjunto de IDs originales) se asocia a su ID
+    min_dfa = DFA.from_transitions(
+        new_transitions, min_state_map[initial_block], new_accepting_states,
+        {frozenset(blocks[b]): min_state_map[b] for b in ordered},
+        dfa.alphabet, dfa.symbol_classes, dfa.class_of, dfa.class_ranges,
+        symbol_class_ids=dfa.symbol_class_ids, accepting_rule=min_accepting_rule,
+        rules_by_order=dfa.rules_by_order, pos_to_symbol=dfa.pos_to_symbol,
+        pos_to_rule=dfa.pos_to_rule, marker_pos=dfa.marker_pos, state_sets=min_state_sets)
     return min_dfa
 
 
@@ -163,9 +198,9 @@ def render_mindfa(dfa, filename="mindfa"):
 
     # Procesar transiciones: se encierran los labels en comillas dobles
     for state_id, trans_dict in dfa.transitions.items():
-        for symbol, target_id in trans_dict.items():
-            # Convierte el símbolo a string y escapa comillas
-            edge_label = str(symbol).replace('"', '\\"')
+        for class_id, target_id in trans_dict.items():
+            # Etiqueta legible de la clase, escapando comillas
+            edge_label = dfa.class_label(class_id).replace('"', '\\"')
             quoted_edge_label = f'"{edge_label}"'
             dot.edge(str(state_id), str(target_id), label=quoted_edge_label)
 
@@ -0,0 +1,222 @@
+# lexer.src/models/productdfa.py
+import hashlib
+import os
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from lexer.src.models.dfa import DFA, DFABudgetExceeded, estimate_dfa_states, partition_classes
+from lexer.src.models.mindfa import minimize_dfa
+from lexer.src.models.syntax_tree import RuleTrees
+
+
+class RuleAutomaton:
+    """
+    AFD mínimo de una sola regla reducido a datos simples, de modo que se puede
+    enviar entre procesos y guardar en una caché.
+      alphabet     → símbolos de las hojas de la regla
+      class_ranges → [(lo, hi, clase)] ordenados, como DFA.class_ranges
+      opaque       → {símbolo de varios caracteres: clase}
+      transitions  → lista indexada por estado de {clase: estado destino}
+      initial      → estado inicial
+      accepting    → frozenset de estados de aceptación
+    """
+
+    __slots__ = ("alphabet", "class_ranges", "opaque", "transitions", "initial", "accepting")
+
+    def __init__(self, dfa):
+        # Los estados de minimize_dfa ya están numerados 0..n-1
+        self.alphabet = frozenset(dfa.alphabet)
+        self.class_ranges = list(dfa.class_ranges)
+        self.opaque = {sym: class_id for class_id, members in enumerate(dfa.symbol_classes)
+                       for sym in members if isinstance(sym, str)}
+        self.transitions = [dict(dfa.transitions[s]) for s in range(len(dfa.transitions))]
+        self.initial = dfa.initial_state
+        self.accepting = frozenset(dfa.accepting_states)
+
+    def __len__(self):
+        return len(self.transitions)
+
+
+# estimate_dfa_states es sólo una pista: una regla se descarta sin construirla
+# cuando la estimación supera el presupuesto de estados por este factor; si no,
+# decide la construcción con presupuesto
+ESTIMATE_MARGIN = 100
+
+# RuleTrees de las últimas definiciones recibidas por este proceso
+_rule_trees = None
+
+
+def rule_trees(definitions):
+    """
+    RuleTrees de las definiciones [(ident, expresión)], parseadas una sola vez
+    por proceso: las reglas que recibe un mismo proceso comparten el resultado.
+    """
+    global _rule_trees
+    definitions = tuple(definitions)
+    if _rule_trees is None or _rule_trees.definitions != definitions:
+        _rule_trees = RuleTrees(definitions)
+    return _rule_trees
+
+
+def compile_rule(regex, definitions=(), state_budget=None, transition_budget=None, time_budget=None):
+    """
+    Construye y minimiza el AFD de una regla sola. regex es la expresión ya
+    escapada para RegexParser y definitions [(ident, expresión)] en orden de
+    dependencias. Devuelve un RuleAutomaton, o None si la regla supera los
+    presupuestos durante la construcción o si estimate_dfa_states la estima
+    ESTIMATE_MARGIN veces por encima del presupuesto de estados.
+    Es una función de módulo para poder ejecutarse en un ProcessPoolExecutor.
+    """
+    trees = rule_trees(definitions)
+    tree = trees.syntax_tree(trees.rule_ast(regex))
+    if state_budget is not None and estimate_dfa_states(tree.raiz) > ESTIMATE_MARGIN * state_budget:
+        return None
+    try:
+        dfa = DFA(tree, state_budget=state_budget, transition_budget=transition_budget,
+                  time_budget=time_budget)
+    except DFABudgetExceeded:
+        return None
+    return RuleAutomaton(minimize_dfa(dfa))
+
+
+def rule_cache_key(regex, definitions=(), **budget):
+    """
+    Clave (texto) del resultado de compile_rule para una caché persistente
+    (un dict o un shelve): cambia si cambia la regla, alguna definición o un
+    presupuesto.
+    """
+    data = repr((regex, tuple(definitions), sorted(budget.items())))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+# Con workers=None, por debajo de estas reglas por construir no compensa
+# arrancar un ProcessPoolExecutor y se compilan en este proceso
+PARALLEL_MIN_RULES = 64
+
+
+def compile_rules(regexes, definitions=(), workers=None, cache=None, **budget):
+    """
+    Aplica compile_rule a cada expresión de regexes y devuelve los resultados
+    en el mismo orden. Con workers > 1 las reglas se compilan en un
+    ProcessPoolExecutor; con workers=None, en uno por núcleo si quedan al menos
+    PARALLEL_MIN_RULES reglas por construir y, si no, en este proceso. Si no se
+    pueden crear procesos, se compilan en este. cache guarda cada resultado por rule_cache_key, de modo
+    que sólo se construyen las reglas nuevas o modificadas.
+    """
+    definitions = tuple(definitions)
+    keys = [rule_cache_key(regex, definitions, **budget) for regex in regexes]
+    results = [None] * len(regexes)
+    pending = []
+    for i, key in enumerate(keys):
+        if cache is not None and key in cache:
+            results[i] = cache[key]
+        else:
+            pending.append(i)
+
+    compile_one = partial(compile_rule, definitions=definitions, **budget)
+    todo = [regexes[i] for i in pending]
+    if workers is None:
+        workers = (os.cpu_count() or 1) if len(todo) >= PARALLEL_MIN_RULES else 1
+    workers = min(workers, len(todo))
+    compiled = None
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(workers) as pool:
+                compiled = list(pool.map(compile_one, todo))
+        except (OSError, BrokenProcessPool):
+            # Sin procesos disponibles (p. ej. en un entorno restringido)
+            compiled = None
+    if compiled is None:
+        compiled = [compile_one(regex) for regex in todo]
+
+    for i, automaton in zip(pending, compiled):
+        results[i] = automaton
+        if cache is not None:
+            cache[keys[i]] = automaton
+    return results
+
+
+def product_dfa(automata, rules, state_budget=None, transition_budget=None, time_budget=None):
+    """
+    Une los AFD de varias reglas en un solo DFA con la construcción producto.
+    Cada estado es la tupla de pares (índice de la regla, estado) de las
+    reglas que siguen vivas, y acepta con la regla de menor 'order' de entre
+    las que aceptan en él; rules[i] es la info de la regla de automata[i].
+    Las clases del resultado son la partición común más gruesa de las clases
+    de todas las reglas. Los presupuestos se aplican como en DFA.build_dfa.
+    Devuelve un DFA sin posiciones, con accepting_rule ya asignado.
+    """
+    # 1) Clases comunes: cada intervalo elemental tiene por firma las clases
+    #    (regla, clase) que lo contienen; la misma firma es la misma clase
+    bounds = set()
+    for automaton in automata:
+        for lo, hi, _ in automaton.class_ranges:
+            bounds.add(lo)
+            bounds.add(hi + 1)
+    bounds = sorted(bounds)
+    interval_signature = {}
+    for i, automaton in enumerate(automata):
+        for lo, hi, class_id in automaton.class_ranges:
+            for e in range(bisect_left(bounds, lo), bisect_left(bounds, hi + 1)):
+                interval_signature.setdefault(e, []).append((i, class_id))
+
+    opaque_signature = {}
+    for i, automaton in enumerate(automata):
+        for sym, class_id in automaton.opaque.items():
+            opaque_signature.setdefault(sym, []).append((i, class_id))
+    classes, class_of, ranges, signatures, _ = partition_classes(
+        bounds, interval_signature, opaque_signature)
+
+    # Clases comunes que cubre cada clase de cada regla
+    global_classes = [{} for _ in automata]
+    for class_id, signature in enumerate(signatures):
+        for i, local in signature:
+            global_classes[i].setdefault(local, []).append(class_id)
+
+    # 2) Producto: sólo se exploran los estados alcanzables; una regla que no
+    #    tiene transición con una clase muere y sale de la tupla
+    initial = tuple((i, automaton.initial) for i, automaton in enumerate(automata))
+    states = {initial: 0}
+    pending = [initial]
+    transitions = {}
+    num_transitions = 0
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    for state_id, current in enumerate(pending):
+        buckets = {}
+        for i, state in current:
+            mapping = global_classes[i]
+            for local, target in automata[i].transitions[state].items():
+                for class_id in mapping[local]:
+                    buckets.setdefault(class_id, []).append((i, target))
+        trans = transitions[state_id] = {}
+        for class_id in sorted(buckets):
+            key = tuple(buckets[class_id])
+            target = states.get(key)
+            if target is None:
+                if state_budget is not None and len(states) >= state_budget:
+                    raise DFABudgetExceeded(f"El AFD supera {state_budget} estados")
+                target = states[key] = len(pending)
+                pending.append(key)
+            trans[class_id] = target
+        num_transitions += len(trans)
+        if transition_budget is not None and num_transitions > transition_budget:
+            raise DFABudgetExceeded(f"El AFD supera {transition_budget} transiciones")
+        if deadline is not None and time.perf_counter() > deadline:
+            raise DFABudgetExceeded(f"La construcción del AFD supera {time_budget} s")
+
+    # 3) Regla ganadora de cada estado: la de menor 'order' entre las que aceptan
+    accepting_rule = {}
+    for key, state_id in states.items():
+        best = None
+        for i, state in key:
+            if state in automata[i].accepting and (best is None or rules[i]['order'] < best['order']):
+                best = rules[i]
+        if best is not None:
+            accepting_rule[state_id] = best
+
+    return DFA.from_transitions(
+        transitions, 0, set(accepting_rule), states,
+        set().union(*(automaton.alphabet for automaton in automata)), classes, class_of, ranges,
+        accepting_rule=accepting_rule, rules_by_order={info['order']: info for info in rules})
@@ -0,0 +1,197 @@
+# lexer.src/models/regex_ast.py
+
+
+class RegexNode:
+    """
+    Nodo del árbol de una expresión regular, sin posiciones: lo produce
+    RegexParser.parse_ast y SyntaxTree le asigna las posiciones al construir
+    su propio árbol.
+      op = 'sym'  → hoja; value es el símbolo (carácter, CharSet o '#')
+      op = 'ref'  → referencia a una definición 'let'; value es su nombre
+      op = 'rule' → hoja de aceptación de una regla; value es su identificador
+                    (su 'order'), fuera del alfabeto de entrada
+      op = '.'    → concatenación de children (dos o más)
+      op = '|'    → alternancia de children (dos o más)
+      op = '*', '+', '?' → operador unario sobre children[0]
+    """
+
+    __slots__ = ("op", "value", "children")
+
+    def __init__(self, op, value=None, children=()):
+        self.op = op
+        self.value = value
+        self.children = children
+
+    def __repr__(self):
+        if self.op == 'sym':
+            return str(self.value)
+        if self.op == 'ref':
+            return "{" + self.value + "}"
+        if self.op == 'rule':
+            return f"<{self.value}>"
+        if self.op in ('.', '|'):
+            return "(" + self.op.join(repr(c) for c in self.children) + ")"
+        return repr(self.children[0]) + self.op
+
+
+def sequence(op, items):
+    """Concatenación o alternancia de items; un solo item se devuelve tal cual."""
+    if not items:
+        raise ValueError(f"Operador '{op}' sin operandos (grupo o alternativa vacía).")
+    if len(items) == 1:
+        return items[0]
+    return RegexNode(op, children=tuple(items))
+
+
+def tag_rule(ast, rule_id):
+    """La expresión de una regla seguida de su hoja de aceptación: ast . <rule_id>."""
+    return sequence('.', [ast, RegexNode('rule', rule_id)])
+
+
+
+class Simplifier:
+    """
+    Reescribe árboles RegexNode antes de asignar posiciones, sin cambiar el
+    lenguaje que describen:
+      - aplana concatenaciones y alternancias anidadas
+      - elimina alternativas repetidas y factoriza sus prefijos comunes como
+        un trie: if|in|int → i(f|n(t)?)
+      - simplifica cerraduras: (x*)*, (x+)*, (x?)*, (x*)+ → x*; (x+)+ → x+;
+        (x+)? → x*; x? con x anulable → x; x+ con x anulable → x*
+    Los nodos resultantes se comparten (hash-consing): dos subárboles iguales
+    son el mismo objeto, así que comparar es comparar identidades. SyntaxTree
+    recorre cada uso por separado, de modo que compartir no mezcla posiciones.
+    """
+
+    def __init__(self, nullable_refs=None):
+        # {ident: bool}; una referencia desconocida se trata como no anulable
+        self.nullable_refs = dict(nullable_refs or {})
+        self.table = {}      # (op, value, ids de los hijos) → nodo único
+        self.nullable = {}   # id(nodo único) → anulable
+
+    def make(self, op, value=None, children=()):
+        key = (op, value, tuple(id(c) for c in children))
+        node = self.table.get(key)
+        if node is None:
+            node = self.table[key] = RegexNode(op, value, children)
+            if op in ('sym', 'rule'):
+                nullable = False
+            elif op == 'ref':
+                nullable = self.nullable_refs.get(value, False)
+            elif op == '.':
+                nullable = all(self.nullable[id(c)] for c in children)
+            elif op == '|':
+                nullable = any(self.nullable[id(c)] for c in children)
+            elif op == '+':
+                nullable = self.nullable[id(children[0])]
+            else:
+                nullable = True
+            self.nullable[id(node)] = nullable
+        return node
+
+    def is_nullable(self, node):
+        return self.nullable[id(node)]
+
+    def define(self, name, ast):
+        """Simplifica una definición 'let' y recuerda si es anulable."""
+        node = self.simplify(ast)
+        self.nullable_refs[name] = self.is_nullable(node)
+        return node
+
+    def simplify(self, ast):
+        """Devuelve el árbol simplificado; ast no se modifica. Sin recursión."""
+        out = []
+        stack = [(ast, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if not node.children:
+                out.append(self.make(node.op, node.value))
+                continue
+            if not expanded:
+                stack.append((node, True))
+                for child in reversed(node.children):
+                    stack.append((child, False))
+                continue
+            k = len(node.children)
+            kids = out[-k:]
+            del out[-k:]
+            if node.op == '.':
+                out.append(self.concat(kids))
+            elif node.op == '|':
+                out.append(self.alternation(kids))
+            else:
+                out.append(self.unary(node.op, kids[0]))
+        return out.pop()
+
+    def concat(self, items):
+        flat = []
+        for item in items:
+            if item.op == '.':
+                flat.extend(item.children)
+            else:
+                flat.append(item)
+        return flat[0] if len(flat) == 1 else self.make('.', children=tuple(flat))
+
+    def unary(self, op, child):
+        inner = child.op
+        if op == '*':
+            if inner in ('*', '+', '?'):
+                child = child.children[0]
+            return self.make('*', children=(child,))
+        if op == '+':
+            if inner == '+':
+                return child
+            if inner in ('*', '?') or self.is_nullable(child):
+                return self.unary('*', child)
+            return self.make('+', children=(child,))
+        # op == '?'
+        if self.is_nullable(child):
+            return child
+        if inner == '+':
+            return self.make('*', children=child.children)
+        return self.make('?', children=(child,))
+
+    def alternation(self, alternatives):
+        """
+        Inserta cada alternativa (como secuencia de operandos) en un trie y lo
+        vuelve a convertir en árbol: las repetidas desaparecen y los prefijos
+        comunes quedan una sola vez. El orden de las alternativas se conserva.
+        """
+        # Nodo del trie: [{id(operando): (operando, hijo)}, ¿termina aquí una alternativa?]
+        root = [{}, False]
+        for alternative in alternatives:
+            for alt in (alternative.children if alternative.op == '|' else (alternative,)):
+                trie = root
+                for item in (alt.children if alt.op == '.' else (alt,)):
+                    branch = trie[0].get(id(item))
+                    if branch is None:
+                        branch = trie[0][id(item)] = (item, [{}, False])
+                    trie = branch[1]
+                trie[1] = True
+
+        # Postorden sobre el trie; None representa ε (el resto vacío)
+        rest = {}
+        stack = [(root, False)]
+        while stack:
+            trie, expanded = stack.pop()
+            if not expanded:
+                stack.append((trie, True))
+                for _, child in trie[0].values():
+                    stack.append((child, False))
+                continue
+            alts = []
+            for item, child in trie[0].values():
+                tail = rest.pop(id(child))
+                alts.append(item if tail is None else self.concat((item, tail)))
+            if not alts:
+                node = None
+            else:
+                node = alts[0] if len(alts) == 1 else self.make('|', children=tuple(alts))
+                if trie[1]:
+                    node = self.unary('?', node)
+            rest[id(trie)] = node
+        return rest[id(root)]
+
+
+def simplify(ast):
+    return Simplifier().simplify(ast)
@@ -2,6 +2,89 @@
 
 import re
 from collections import deque
+from lexer.src.models.charset import CharSet, ANY_CHAR, ANY_BUT_NEWLINE
+from lexer.src.models.regex_ast import RegexNode, sequence
+
+
+# Escapes de YALex con significado propio; \xNN, \uNNNN, \UNNNNNNNN (hexadecimal)
+# y \ooo (octal, de 1 a 3 dígitos) son un carácter por su código, como con el
+# códec unicode_escape, y cualquier otro carácter escapado (\. \} \_ ...) vale
+# por sí mismo
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '\\': '\\', "'": "'", '"': '"'}
+HEX_ESCAPES = {'x': 2, 'u': 4, 'U': 8}
+HEX_DIGITS = re.compile(r'[0-9A-Fa-f]+')
+OCTAL_DIGITS = re.compile(r'[0-7]{1,3}')
+
+
+def decode_escape(text, i):
+    """
+    Decodifica el escape que empieza en text[i] (una '\\'). Devuelve
+    (carácter, índice siguiente al escape).
+    """
+    if i + 1 >= len(text):
+        raise ValueError("Escape final sin carácter tras '\\'.")
+    c = text[i + 1]
+    width = HEX_ESCAPES.get(c)
+    if width is not None:
+        digits = text[i + 2 : i + 2 + width]
+        if len(digits) == width and HEX_DIGITS.fullmatch(digits):
+            code = int(digits, 16)
+            if code > 0x10FFFF:
+                raise ValueError(f"Escape fuera de Unicode: '\\{c}{digits}'.")
+            return chr(code), i + 2 + width
+    m = OCTAL_DIGITS.match(text, i + 1)
+    if m:
+        return chr(int(m.group(), 8)), m.end()
+    return ESCAPES.get(c, c), i + 2
+
+
+def decode_escapes(text):
+    """Decodifica todos los escapes de text (ver ESCAPES); el resto queda igual."""
+    parts = []
+    i = 0
+    while True:
+        j = text.find('\\', i)
+        if j < 0:
+            parts.append(text[i:])
+            return "".join(parts)
+        parts.append(text[i:j])
+        ch, i = decode_escape(text, j)
+        parts.append(ch)
+
+
+def find_closing(text, char, start):
+    """Índice del primer 'char' sin escapar de text a partir de start (-1 si no hay)."""
+    i = start
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == char:
+            return i
+        i += 2 if c == '\\' else 1
+    return -1
+
+
+def find_bracket_end(text, start):
+    """
+    Índice del ']' que cierra la clase cuyo contenido empieza en start (-1 si
+    no hay): se saltan los escapes y los literales entre comillas, que pueden
+    contener ']'.
+    """
+    i = start
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == ']':
+            return i
+        if c == "'" or c == '"':
+            j = find_closing(text, c, i + 1)
+            if j < 0:
+                return -1
+            i = j + 1
+        else:
+            i += 2 if c == '\\' else 1
+    return -1
+
 
 class Symbol:
     def __init__(self, value, is_operator=False):
@@ -9,10 +92,49 @@ class Symbol:
         self.is_operator = is_operator
 
     def __str__(self):
-        return self.value
+        return str(self.value)
 
     def __repr__(self):
-        return self.value 
+        return str(self.value)
+
+
+class DefinitionRef(Symbol):
+    """
+    Operando que referencia una definición 'let' por nombre ({ident} en la
+    expresión). SyntaxTree lo sustituye por el árbol de la definición.
+    """
+    def __init__(self, name):
+        super().__init__(name, is_operator=False)
+
+    def __str__(self):
+        return "{" + self.value + "}"
+
+    def __repr__(self):
+        return str(self)
+
+
+class Token:
+    """Token compacto del escáner: tipo y, para los operandos, su valor."""
+
+    __slots__ = ("kind", "value")
+
+    def __init__(self, kind, value=None):
+        self.kind = kind
+        self.value = value
+
+    def __repr__(self):
+        return self.kind if self.value is None else f"{self.kind}:{self.value}"
+
+
+def literal_symbol(ch):
+    """
+    Hoja para un carácter literal. Un '#' literal se representa como CharSet
+    para no confundirlo con el marcador de fin '#'.
+    """
+    if ch == '#':
+        return Symbol(CharSet.from_chars(ch), is_operator=False)
+    return Symbol(ch, is_operator=False)
+
 
 class RegexParser:
     OPERATORS  = {'|', '*', '+', '?'}
@@ -22,235 +144,224 @@ class RegexParser:
         self.regex = regex
         self.tokens = []
     
-    def should_concat(self, last_token, current_token_type):
-        """
-        Decide si se debe insertar un operador de concatenación antes de agregar un token
-        """
-        if last_token is None:
-            return False
-        if last_token.is_operator:
-            if last_token.value not in {')', '*', '+', '?'}:
-                return False
-        # Si el token actual es literal o el inicio de un grupo, se concatena.
-        if current_token_type in ['literal', 'group_start']:
-            return True
-        return False
-
-    def expand_range(self, c1, c2):
-        """
-        Retorna la lista de caracteres que van desde c1..c2.
-        """
-        start = ord(c1)
-        end = ord(c2)
-        if start > end:
-            start, end = end, start
-        
-        expanded = []
-        for code in range(start, end + 1):
-            expanded.append(chr(code))
-        return expanded
-    
     def parse_bracket_expression(self, bracket_content):
         """
         Dado el contenido dentro de [ ], genera una lista de tokens equivalente.
-        Primero limpiamos las comillas y espacios para quedarnos solo con los
-        caracteres puros (sin ' ni " ni espacios), luego expandimos rangos X–Y
-        solo cuando ambos sean alfanuméricos.
+        El contenido se recorre elemento a elemento: literales entre comillas
+        ('c' o "abc", con sus escapes decodificados dentro de cada literal),
+        escapes sueltos (\\n, \\], ...) y caracteres sueltos; los espacios sin
+        comillas se ignoran. Un '-' entre dos elementos de un solo carácter es
+        el rango entre ellos (ValueError si el inicio es mayor que el fin). Un
+        '^' inicial niega la clase: [^...] es el complemento. La clase se
+        devuelve como una única hoja con un CharSet (intervalos), sin expandir
+        los rangos carácter a carácter.
         """
-        # 1) Primero, decodificamos cualquier \n, \t, \\uXXXX, etc.
-        decoded = bytes(bracket_content, "utf-8").decode("unicode_escape")
-        # 2) Ahora removemos las comillas simples o dobles y espacios sobrantes
-        clean = decoded.replace("'", "").replace('"', "")
-        
-        # 3) Recogemos cada carácter literal o rango a–b
-        chars = []
+        negated = bracket_content.startswith("^") and len(bracket_content) > 1
+        body = bracket_content[1:] if negated else bracket_content
+
+        # 1) Elementos: los caracteres de cada literal, escape o carácter suelto;
+        #    None es un '-' sin comillas (un posible rango)
+        items = []
         i = 0
-        while i < len(clean):
-            c = clean[i]
-            # caso rango: a-b
-            if i + 2 < len(clean) and clean[i+1] == "-" and clean[i].isalnum() and clean[i+2].isalnum():
-                a, b = clean[i], clean[i+2]
-                start, end = ord(a), ord(b)
-                if start > end: start, end = end, start
-                for code in range(start, end+1):
-                    chars.append(chr(code))
-                i += 3
+        while i < len(body):
+            c = body[i]
+            if c == "'" or c == '"':
+                j = find_closing(body, c, i + 1)
+                if j < 0:
+                    raise ValueError("No se encontró la comilla de cierre en la clase [...].")
+                items.append(decode_escapes(body[i+1 : j]))
+                i = j + 1
+            elif c == '\\':
+                ch, i = decode_escape(body, i)
+                items.append(ch)
+            elif c == '-':
+                items.append(None)
+                i += 1
+            elif c.isspace():
+                i += 1
             else:
-                # carácter suelto
-                chars.append(c)
+                items.append(c)
                 i += 1
-        
-        # 4) Eliminamos duplicados y ordenamos
-        unique = []
-        for c in chars:
-            if c not in unique:
-                unique.append(c)
-        
+
+        # 2) Cada rango a–b o carácter suelto es un intervalo; un '-' que no
+        #    está entre dos extremos es un '-' literal
+        def endpoint(k):
+            item = items[k] if 0 <= k < len(items) else None
+            return item if item is not None and len(item) == 1 else None
+
+        intervals = []
+        k = 0
+        while k < len(items):
+            lo, hi = endpoint(k), endpoint(k + 2)
+            if lo is not None and hi is not None and items[k + 1] is None:
+                if lo > hi:
+                    raise ValueError(f"Rango inválido en la clase [...]: {lo!r}-{hi!r}.")
+                intervals.append((ord(lo), ord(hi)))
+                k += 3
+                continue
+            for ch in ('-' if items[k] is None else items[k]):
+                intervals.append((ord(ch), ord(ch)))
+            k += 1
+
+        if not intervals:
+            raise ValueError("Clase [...] vacía.")
+        # 3) CharSet ordena y fusiona los intervalos (elimina duplicados)
+        char_set = CharSet(intervals)
+        if negated:
+            char_set = char_set.complement()
+
         # Si la clase tiene solo un símbolo, lo devolvemos como literal
-        if len(unique) == 1:
-            return [ Symbol(unique[0], is_operator=False) ]
-
-        # 5) Convertimos a tokens: ( c1 | c2 | ... cn )
-        tokens = [Symbol("(", is_operator=True)]
-        for idx, c in enumerate(unique):
-            tokens.append(Symbol(c, is_operator=False))
-            if idx < len(unique)-1:
-                tokens.append(Symbol("|", is_operator=True))
-        tokens.append(Symbol(")", is_operator=True))
-        return tokens
+        if len(char_set) == 1:
+            return [ literal_symbol(chr(char_set.intervals[0][0])) ]
+        return [ Symbol(char_set, is_operator=False) ]
 
 
     
-    def tokenize(self):
+    def scan(self):
         """
-        Convierte la expresión regular en una lista de tokens, insertando concatenaciones explícitas.
-        Se utiliza enumerate para saber cuándo es el último carácter (por ejemplo, para el '#' final).
+        Escáner de una sola pasada: devuelve una lista de Token compactos sin
+        concatenaciones explícitas. Los operandos son Token('sym', símbolo) o
+        Token('ref', nombre); los operadores y paréntesis llevan su carácter
+        como tipo ('|', '*', '+', '?', '(', ')').
         """
-        output = []
-        last_token = None 
-        escaped = False
-
-        skip_until = -1
-        
-        for i, char in enumerate(self.regex):
-            if i < skip_until:
-                continue
-            if escaped: # Si el carácter está escapado, lo tratamos como literal.
-                if self.should_concat(last_token, 'literal'):
-                    output.append(Symbol('.', is_operator=True))
-                token = Symbol(char, is_operator=False)
-                output.append(token)
-                last_token = token
-                escaped = False
-                continue
+        regex = self.regex
+        n = len(regex)
+        tokens = []
+        append = tokens.append
+        i = 0
+        while i < n:
+            char = regex[i]
+            if char in self.OPERATORS or char == '(' or char == ')':
+                append(Token(char))
+                i += 1
 
-            if char == '.':
-                # si hacía falta concatenar, inyectamos explicitamente CONCAT (el “punto” interno)
-                if self.should_concat(last_token, 'literal'):
-                    output.append(Symbol('.', is_operator=True))
-                # ahora metemos el '.' como literal comodín
-                token = Symbol('.', is_operator=False)
-                output.append(token)
-                last_token = token
-                continue
+            elif char.isalnum() or char == '#' or char == '$':
+                append(Token('sym', char))
+                i += 1
 
             elif char == '\\':
-                # si hay un carácter tras la barra, lo consumimos como escape
-                if i + 1 < len(self.regex):
-                    esc_char = self.regex[i+1]
-                    token_value = bytes(f"\\{esc_char}", "utf-8").decode("unicode_escape")
-                    if self.should_concat(last_token, 'literal'):
-                        output.append(Symbol('.', is_operator=True))
-                    token = Symbol(token_value, is_operator=False)
-                    output.append(token)
-                    last_token = token
-                    # avanzamos un paso extra para saltarnos el carácter escapado
-                    skip_until = i + 2
-                    continue
-                else:
-                    raise ValueError("Escape final sin carácter tras '\\'.")
+                # Escape: \n, \t, \xNN... o el carácter literal (\. \( \_ \# ...)
+                value, i = decode_escape(regex, i)
+                append(Token('sym', literal_symbol(value).value))
+
+            elif char == '.':
+                # '.' es el comodín: cualquier carácter salvo '\n'
+                append(Token('sym', ANY_BUT_NEWLINE))
+                i += 1
+
+            elif char == '_':
+                # '_' es el comodín de YALex: cualquier carácter
+                append(Token('sym', ANY_CHAR))
+                i += 1
 
-            # Detectar '['
             elif char == '[':
-                # Buscar la posición del ']' correspondiente
-                j = i + 1
-                found_closing = False
-                while j < len(self.regex):
-                    if self.regex[j] == ']':
-                        found_closing = True
-                        break
-                    j += 1
-                if not found_closing:
+                j = find_bracket_end(regex, i + 1)
+                if j < 0:
                     raise ValueError("Falta ']' de cierre en la expresión regular.")
-                
-                raw = self.regex[i+1 : j]
-                # decodifica '\n', '\t', '\u1234', etc.
-                bracket_content = bytes(raw, "utf-8").decode("unicode_escape")
-                
-                # Expandimos a un grupo de tokens
-                bracket_tokens = self.parse_bracket_expression(bracket_content)
-            
-                # Verificamos si hace falta concatenar
-                if self.should_concat(last_token, 'group_start'):
-                    output.append(Symbol('.', is_operator=True))
-                
-                output.extend(bracket_tokens)
-                last_token = bracket_tokens[-1] if bracket_tokens else None
-
-                skip_until = j + 1
-                continue
+                # parse_bracket_expression decodifica los escapes; la clase es una sola hoja
+                bracket = self.parse_bracket_expression(regex[i+1 : j])
+                append(Token('sym', bracket[0].value))
+                i = j + 1
 
             elif char == "'" or char == '"':
-                # Procesar literal entre comillas.
-                quote_char = char
-                literal = ""
-                j = i + 1
-                while j < len(self.regex) and self.regex[j] != quote_char:
-                    literal += self.regex[j]
-                    j += 1
-                if j >= len(self.regex):
+                # Literal entre comillas: la concatenación de sus caracteres
+                j = find_closing(regex, char, i + 1)
+                if j < 0:
                     raise ValueError("No se encontró la comilla de cierre para literal.")
-                # Actualizamos 'skip_until' para saltar el literal entero
-                skip_until = j + 1
-                if self.should_concat(last_token, 'literal'):
-                    output.append(Symbol('.', is_operator=True))
-                literal = bytes(literal, "utf-8").decode("unicode_escape")
-                token = Symbol(literal, is_operator=False)
-                output.append(token)
-                last_token = token
-                continue
-
-            # (bloque de corchetes, literales entre comillas, alfanuméricos, operadores y paréntesis)
-            # —––––––––––––––––––––––––––––––––––––––––––––––––––––––––––––––––––––––
-            elif char.isalnum() or char in {'#', '$'}:
-                # Igual que antes
-                if self.should_concat(last_token, 'literal'):
-                    output.append(Symbol('.', is_operator=True))
-                token = Symbol(char, is_operator=False)
-                output.append(token)
-                last_token = token
-                continue
-
-            elif char in self.OPERATORS:
-                token = Symbol(char, is_operator=True)
-                output.append(token)
-                last_token = None if char == '|' else token
-                continue
+                literal = decode_escapes(regex[i+1 : j])
+                if not literal:
+                    raise ValueError("Literal vacío entre comillas.")
+                if len(literal) > 1:
+                    append(Token('('))
+                for ch in literal:
+                    append(Token('sym', literal_symbol(ch).value))
+                if len(literal) > 1:
+                    append(Token(')'))
+                i = j + 1
 
-            elif char == '(':
-                if self.should_concat(last_token, 'group_start'):
-                    output.append(Symbol('.', is_operator=True))
-                output.append(Symbol('(', is_operator=True))
-                last_token = None
-                continue
+            elif char == '{':
+                # Referencia a una definición: {ident} es un solo operando
+                j = regex.find('}', i + 1)
+                if j < 0:
+                    raise ValueError("Falta '}' de cierre en la referencia a una definición.")
+                append(Token('ref', regex[i+1 : j].strip()))
+                i = j + 1
 
-            elif char == ')':
-                output.append(Symbol(')', is_operator=True))
-                last_token = Symbol(')', is_operator=True)
-                continue
+            elif char.isspace():
+                # Ignorar espacios
+                i += 1
 
-            # —––––––––––––––––––––––––––––––––––––––––––––––––––––––––––––––––––––––
-            # tratar cualquier otro carácter (ej. ':', ';', '<', '=', etc.) como literal
-            elif char not in self.OPERATORS \
-                 and char not in {'(',')','[',']','{','}','|'} \
-                 and not char.isspace():
-                # puntos, comas, dos puntos, etc.
-                if self.should_concat(last_token, 'literal'):
-                    output.append(Symbol('.', is_operator=True))
-                token = Symbol(char, is_operator=False)
-                output.append(token)
-                last_token = token
-                continue
+            elif char not in {']', '}'}:
+                # cualquier otro carácter (ej. ':', ';', '<', '=', etc.) es literal
+                append(Token('sym', char))
+                i += 1
 
-            # Ignorar espacios
-            if char.isspace():
-                continue
+            else:
+                raise ValueError(f"Carácter no reconocido: {char}")
+        return tokens
 
-            # Si nada hizo `continue` antes, es un caracter inválido
-            raise ValueError(f"Carácter no reconocido: {char}")
+    def parse_ast(self):
+        """
+        Convierte la expresión directamente en un árbol RegexNode (sin posiciones
+        y sin pasar por postfix). Es un descenso por precedencias con una pila
+        explícita de grupos abiertos, así que el anidamiento no tiene límite:
+          alternancia   := concatenación ('|' concatenación)*
+          concatenación := unario+
+          unario        := operando ('*' | '+' | '?')*
+        """
+        # Cada grupo abierto guarda (alternativas completas, operandos de la concatenación actual)
+        groups = []
+        alternatives, items = [], []
+        for token in self.scan():
+            kind = token.kind
+            if kind == 'sym':
+                items.append(RegexNode('sym', token.value))
+            elif kind == 'ref':
+                items.append(RegexNode('ref', token.value))
+            elif kind == '|':
+                alternatives.append(sequence('.', items))
+                items = []
+            elif kind == '(':
+                groups.append((alternatives, items))
+                alternatives, items = [], []
+            elif kind == ')':
+                if not groups:
+                    raise ValueError("No se encontró un '(' que haga match con ')'.")
+                alternatives.append(sequence('.', items))
+                group = sequence('|', alternatives)
+                alternatives, items = groups.pop()
+                items.append(group)
+            else:
+                # '*', '+' o '?' sobre el último operando
+                if not items:
+                    raise ValueError(f"Operador unario '{kind}' sin operando previo.")
+                items[-1] = RegexNode(kind, children=(items[-1],))
+        if groups:
+            raise ValueError("Paréntesis desbalanceados")
+        if not items and not alternatives:
+            raise ValueError("Expresión regular vacía.")
+        alternatives.append(sequence('.', items))
+        return sequence('|', alternatives)
 
-        if escaped:
-            raise ValueError("Secuencia de escape incompleta en la expresión regular.")
+    def tokenize(self):
+        """
+        Lista de Symbol con concatenaciones explícitas ('.'), a partir de scan().
+        Se conserva para to_postfix y el constructor de SyntaxTree por postfix.
+        """
+        output = []
+        # ¿El token anterior termina un operando? Entonces hace falta un '.'
+        operand_before = False
+        for token in self.scan():
+            kind = token.kind
+            if kind in ('sym', 'ref', '(') and operand_before:
+                output.append(Symbol('.', is_operator=True))
+            if kind == 'sym':
+                output.append(Symbol(token.value, is_operator=False))
+            elif kind == 'ref':
+                output.append(DefinitionRef(token.value))
+            else:
+                output.append(Symbol(kind, is_operator=True))
+            operand_before = kind not in ('(', '|')
 
         self.tokens = output
         return output
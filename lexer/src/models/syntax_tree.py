@@ -2,30 +2,89 @@
 
 import os
 import graphviz
+from lexer.src.models.regex_ast import RegexNode, Simplifier, sequence, tag_rule
+from lexer.src.models.regex_parser import DefinitionRef, RegexParser
+
+def bits_to_positions(bits):
+    """Posiciones (en orden creciente) de un conjunto representado como entero."""
+    positions = []
+    while bits:
+        low = bits & -bits
+        positions.append(low.bit_length() - 1)
+        bits ^= low
+    return positions
+
+
+def child_nodes(n):
+    """Hijos directos de un nodo (vacío para las hojas)."""
+    if isinstance(n, NodoBinario):
+        return (n.izquierdo, n.derecho)
+    if isinstance(n, NodoUnario):
+        return (n.hijo,)
+    return ()
+
+
+def iter_nodes(raiz):
+    """
+    Recorre el árbol en postorden (hijos antes que el padre) sin recursión.
+    El árbol puede compartir subárboles (DAG): cada nodo se visita una sola vez.
+    """
+    visited = set()
+    stack = [(raiz, False)]
+    while stack:
+        n, expanded = stack.pop()
+        if expanded:
+            yield n
+            continue
+        if id(n) in visited:
+            continue
+        visited.add(id(n))
+        stack.append((n, True))
+        for hijo in reversed(child_nodes(n)):
+            stack.append((hijo, False))
+
 
 class NodoBase:
+    # firstpos/lastpos se guardan como enteros usados como bitsets: el bit p
+    # está encendido si la posición p pertenece al conjunto (unión = '|')
     def __init__(self, valor):
         self.valor = valor
         self.nullable = False
-        self.firstpos = set()
-        self.lastpos = set()
+        self.firstpos_bits = 0
+        self.lastpos_bits = 0
+
+    @property
+    def firstpos(self):
+        """firstpos como conjunto de posiciones (vista de firstpos_bits)."""
+        return set(bits_to_positions(self.firstpos_bits))
+
+    @property
+    def lastpos(self):
+        """lastpos como conjunto de posiciones (vista de lastpos_bits)."""
+        return set(bits_to_positions(self.lastpos_bits))
 
-    # Método polimórfico a sobrescribir en hijos
+    # Método polimórfico a sobrescribir en hijos: dibuja sólo este nodo y
+    # sus aristas; SyntaxTree.render se encarga del recorrido
     def to_dot(self, dot):
         pass
 
 class NodoHoja(NodoBase):
-    def __init__(self, valor, posicion):
+    def __init__(self, valor, posicion, regla=None):
         super().__init__(valor)
         self.posicion = posicion
-        self.firstpos.add(posicion)
-        self.lastpos.add(posicion)
-        self.nullable = (valor == 'ε')
+        # Identificador de la regla que acepta en esta posición (hojas '#' de
+        # RegexNode('rule')); va aparte del símbolo, fuera del alfabeto
+        self.regla = regla
+        self.firstpos_bits = 1 << posicion
+        self.lastpos_bits = 1 << posicion
+        # Las hojas siempre consumen un carácter (no hay hojas ε: x? es un NodoUnario)
+        self.nullable = False
 
     def to_dot(self, dot):
         """Agrega este nodo hoja al gráfico DOT."""
+        etiqueta = self.valor if self.regla is None else f"{self.valor}<{self.regla}>"
         dot.node(str(id(self)),
-                 f"{self.valor} ({self.posicion})",
+                 f"{etiqueta} ({self.posicion})",
                  shape="ellipse")
 
 
@@ -40,15 +99,15 @@ class NodoBinario(NodoBase):
         if self.valor == '.':  # Concatenación
             self.nullable = self.izquierdo.nullable and self.derecho.nullable
 
-            self.firstpos = (self.izquierdo.firstpos |
-                             (self.derecho.firstpos if self.izquierdo.nullable else set()))
-            self.lastpos = (self.derecho.lastpos |
-                            (self.izquierdo.lastpos if self.derecho.nullable else set()))
+            self.firstpos_bits = (self.izquierdo.firstpos_bits |
+                                  (self.derecho.firstpos_bits if self.izquierdo.nullable else 0))
+            self.lastpos_bits = (self.derecho.lastpos_bits |
+                                 (self.izquierdo.lastpos_bits if self.derecho.nullable else 0))
 
         elif self.valor == '|':  # Alternancia
             self.nullable = self.izquierdo.nullable or self.derecho.nullable
-            self.firstpos = self.izquierdo.firstpos | self.derecho.firstpos
-            self.lastpos = self.izquierdo.lastpos | self.derecho.lastpos
+            self.firstpos_bits = self.izquierdo.firstpos_bits | self.derecho.firstpos_bits
+            self.lastpos_bits = self.izquierdo.lastpos_bits | self.derecho.lastpos_bits
 
 
     def to_dot(self, dot):
@@ -57,10 +116,6 @@ class NodoBinario(NodoBase):
                  f"{self.valor}",
                  shape="box")
 
-        # Dibujar hijos
-        self.izquierdo.to_dot(dot)
-        self.derecho.to_dot(dot)
-
         # Conectar con aristas
         dot.edge(str(id(self)), str(id(self.izquierdo)))
         dot.edge(str(id(self)), str(id(self.derecho)))
@@ -76,8 +131,16 @@ class NodoUnario(NodoBase):
     def calcular_propiedades(self):
         if self.valor == '*':  # Cerradura de Kleene
             self.nullable = True
-            self.firstpos = self.hijo.firstpos
-            self.lastpos = self.hijo.lastpos
+            self.firstpos_bits = self.hijo.firstpos_bits
+            self.lastpos_bits = self.hijo.lastpos_bits
+        elif self.valor == '+':  # Cerradura positiva: como '*' pero anulable sólo si el hijo lo es
+            self.nullable = self.hijo.nullable
+            self.firstpos_bits = self.hijo.firstpos_bits
+            self.lastpos_bits = self.hijo.lastpos_bits
+        elif self.valor == '?':  # Opcional: anulable, sin aportar followpos
+            self.nullable = True
+            self.firstpos_bits = self.hijo.firstpos_bits
+            self.lastpos_bits = self.hijo.lastpos_bits
 
     def to_dot(self, dot):
         """Agrega este nodo unario y su conexión al gráfico DOT."""
@@ -85,22 +148,111 @@ class NodoUnario(NodoBase):
                  f"{self.valor}",
                  shape="diamond")
 
-        self.hijo.to_dot(dot)
         dot.edge(str(id(self)), str(id(self.hijo)))
 
 
 
 class SyntaxTree:
-    def __init__(self, postfix):
+    def __init__(self, postfix, definitions=None):
+        """
+        postfix es un RegexNode (de RegexParser.parse_ast) o, por compatibilidad,
+        la lista postfija de RegexParser.parse. definitions es {ident: RegexNode}
+        o {ident: postfix}, del mismo tipo que la expresión.
+        """
         self.postfix = postfix
+        # Definiciones 'let', cada una parseada una sola vez
+        self.definitions = definitions or {}
         self.posicion_actual = 1
-        self.raiz = self.construir_arbol()
-    
+        if isinstance(postfix, RegexNode):
+            self.raiz = self.construir_desde_ast(postfix)
+        else:
+            self.raiz = self.construir_arbol()
+
+    def nueva_hoja(self, valor, regla=None):
+        hoja = NodoHoja(valor, self.posicion_actual, regla)
+        self.posicion_actual += 1
+        return hoja
+
+    def construir_desde_ast(self, ast):
+        """
+        Construye el árbol con posiciones a partir de un RegexNode, en postorden
+        y con una pila explícita. Cada referencia {ident} construye de nuevo el
+        árbol de su definición, con posiciones propias. Cada hoja 'rule' es
+        una hoja '#' con el identificador de su regla. Las concatenaciones y
+        alternancias de varios operandos se asocian a la izquierda, igual que
+        en el postfix.
+        """
+        nodos = []     # nodos ya construidos, como en la evaluación de un postfix
+        activas = []   # referencias que se están construyendo (detecta ciclos)
+        pila = [(ast, False)]
+        while pila:
+            nodo, expandido = pila.pop()
+            if nodo is None:
+                # fin de la definición que se estaba construyendo
+                activas.pop()
+                continue
+            op = nodo.op
+            if op == 'sym':
+                nodos.append(self.nueva_hoja(nodo.value))
+            elif op == 'rule':
+                # Fin de una regla: una hoja '#' que recuerda a qué regla pertenece
+                nodos.append(self.nueva_hoja('#', nodo.value))
+            elif op == 'ref':
+                nombre = nodo.value
+                if nombre not in self.definitions:
+                    raise ValueError(f"SyntaxTree: definición no encontrada: '{nombre}'.")
+                if nombre in activas:
+                    raise ValueError(f"SyntaxTree: definición cíclica: '{nombre}'.")
+                activas.append(nombre)
+                pila.append((None, True))
+                pila.append((self.definitions[nombre], False))
+            elif not expandido:
+                pila.append((nodo, True))
+                for hijo in reversed(nodo.children):
+                    pila.append((hijo, False))
+            elif op in ('.', '|'):
+                k = len(nodo.children)
+                operandos = nodos[-k:]
+                del nodos[-k:]
+                arbol = operandos[0]
+                for derecho in operandos[1:]:
+                    arbol = NodoBinario(op, arbol, derecho)
+                nodos.append(arbol)
+            else:
+                nodos.append(NodoUnario(op, nodos.pop()))
+        return nodos.pop()
+
+    def expandir_referencias(self):
+        """
+        Recorre el postfix sustituyendo cada referencia {ident} por el postfix
+        de su definición, sin recursión. El postfix memorizado se comparte; sólo
+        los nodos que se construyen a partir de él son nuevos, con posiciones
+        propias para cada uso de la definición.
+        """
+        activas = []
+        pila = [iter(self.postfix)]
+        while pila:
+            for token in pila[-1]:
+                if isinstance(token, DefinitionRef):
+                    nombre = token.value
+                    if nombre not in self.definitions:
+                        raise ValueError(f"SyntaxTree: definición no encontrada: '{nombre}'.")
+                    if nombre in activas:
+                        raise ValueError(f"SyntaxTree: definición cíclica: '{nombre}'.")
+                    activas.append(nombre)
+                    pila.append(iter(self.definitions[nombre]))
+                    break
+                yield token
+            else:
+                pila.pop()
+                if activas and len(pila) == len(activas):
+                    activas.pop()
+
     def construir_arbol(self):
         stack = []
-        for token in self.postfix:
+        for token in self.expandir_referencias():
             # Caso hoja
-            if (token.value.isalnum() or token.value == '#') or not token.is_operator:
+            if not token.is_operator or token.value.isalnum() or token.value == '#':
                 nodo_hoja = NodoHoja(token.value, self.posicion_actual)
                 stack.append(nodo_hoja)
                 self.posicion_actual += 1
@@ -123,10 +275,9 @@ class SyntaxTree:
                         f"SyntaxTree: operador unario '+' sin operando previo.\n"
                         f"Postfix completo: {[str(t) for t in self.postfix]}"
                     )
+                # Nodo propio: x+ no comparte el subárbol x entre x y x*
                 nodo = stack.pop()
-                nodo_clausura = NodoUnario('*', nodo)
-                nodo_concat = NodoBinario('.', nodo, nodo_clausura)
-                stack.append(nodo_concat)
+                stack.append(NodoUnario('+', nodo))
 
             # Concatenación o alternancia
             elif token.value in {'.', '|'}:
@@ -147,11 +298,9 @@ class SyntaxTree:
                         f"SyntaxTree: operador '?' sin operando previo.\n"
                         f"Postfix completo: {[str(t) for t in self.postfix]}"
                     )
+                # Nodo propio en lugar de x | ε: no agrega posiciones ni símbolos
                 nodo = stack.pop()
-                hoja_epsilon = NodoHoja('ε', self.posicion_actual)
-                self.posicion_actual += 1
-                altern = NodoBinario('|', nodo, hoja_epsilon)
-                stack.append(altern)
+                stack.append(NodoUnario('?', nodo))
     
         # Al finalizar, debe quedar **exactamente** un nodo (la raíz)
         if not self.postfix:
@@ -177,7 +326,8 @@ class SyntaxTree:
 
         dot = graphviz.Digraph(format="png")
         if self.raiz:
-            self.raiz.to_dot(dot)
+            for nodo in iter_nodes(self.raiz):
+                nodo.to_dot(dot)
 
         # Guardar la imagen en la carpeta 'imagenes/'
         output_path = f"imagenes/{filename}"
@@ -185,6 +335,36 @@ class SyntaxTree:
 
         print(f"Imagen del árbol sintáctico guardada en: {output_path}.png")
 
+
+class RuleTrees:
+    """
+    Definiciones 'let' [(ident, expresión)], en orden de dependencias, y las
+    expresiones de las reglas, todas ya escapadas para RegexParser. Las
+    definiciones se parsean y simplifican una sola vez; cada regla se
+    simplifica con el mismo Simplifier y su SyntaxTree las enlaza por
+    referencia. Lo usan compile_rule y compile_lazy_rules.
+    """
+
+    def __init__(self, definitions=()):
+        self.definitions = tuple(definitions)
+        self.simplifier = Simplifier()
+        self.trees = {ident: self.simplifier.define(ident, RegexParser(regex).parse_ast())
+                      for ident, regex in self.definitions}
+
+    def rule_ast(self, regex, rule_id=None):
+        """
+        RegexNode simplificado de una regla terminado en su hoja de aceptación:
+        el marcador '#' o, con rule_id, la hoja de esa regla (tag_rule).
+        """
+        ast = self.simplifier.simplify(RegexParser(regex).parse_ast())
+        if rule_id is None:
+            return sequence('.', [ast, RegexNode('sym', '#')])
+        return tag_rule(ast, rule_id)
+
+    def syntax_tree(self, ast):
+        """SyntaxTree de un RegexNode que usa estas definiciones."""
+        return SyntaxTree(ast, self.trees)
+
 if __name__ == "__main__":
     from regex_parser import RegexParser
 
@@ -104,18 +104,87 @@ class YALexParser:
             self.trailer_code = trailer_match.group(1).strip()
 
 
-    def expand_definitions(self, regex_str):
+    def definition_references(self, regex_str):
         """
-        Sustituye cada identificador por su definición hasta que
-        no queden más nombres de definiciones en la cadena.
+        Devuelve [(inicio, fin, ident)] con cada identificador definido con 'let'
+        que aparece en regex_str. Se ignoran los literales entre comillas, las
+        clases [...] y los caracteres escapados; un identificador debe ser una
+        palabra completa (como \\b...\\b).
         """
-        # Repetimos hasta que no haya ningún cambio
-        while True:
-            new_regex = regex_str
-            for ident, definition in self.definitions.items():
-                pattern = re.compile(r'\b' + re.escape(ident) + r'\b')
-                new_regex = pattern.sub(lambda m: f"({definition})", new_regex)
-            if new_regex == regex_str:
-                break
-            regex_str = new_regex
-        return regex_str
\ No newline at end of file
+        refs = []
+        n = len(regex_str)
+        i = 0
+        while i < n:
+            c = regex_str[i]
+            if c == '\\':
+                i += 2
+            elif c in ('"', "'"):
+                # salta el literal respetando las comillas escapadas
+                i += 1
+                while i < n and regex_str[i] != c:
+                    i += 2 if regex_str[i] == '\\' else 1
+                i += 1
+            elif c == '[':
+                end = regex_str.find(']', i + 1)
+                i = n if end < 0 else end + 1
+            elif c.isalnum() or c == '_':
+                start = i
+                while i < n and (regex_str[i].isalnum() or regex_str[i] == '_'):
+                    i += 1
+                ident = regex_str[start:i]
+                if ident in self.definitions:
+                    refs.append((start, i, ident))
+            else:
+                i += 1
+        return refs
+
+    def reference_definitions(self, regex_str):
+        """
+        Reescribe cada identificador definido como una referencia {ident} que
+        RegexParser convierte en un único token. La definición no se copia: su
+        árbol se construye una vez y SyntaxTree lo enlaza con posiciones nuevas.
+        """
+        parts = []
+        last = 0
+        for start, end, ident in self.definition_references(regex_str):
+            parts.append(regex_str[last:start])
+            parts.append("{" + ident + "}")
+            last = end
+        parts.append(regex_str[last:])
+        return "".join(parts)
+
+    def definition_graph(self):
+        """Grafo de dependencias: {ident: [definiciones que usa, sin repetir]}."""
+        return {ident: list(dict.fromkeys(ref for _, _, ref in self.definition_references(regex)))
+                for ident, regex in self.definitions.items()}
+
+    def definition_order(self):
+        """
+        Ordena las definiciones de modo que cada una aparezca después de las que
+        usa (orden topológico del grafo de definiciones). Lanza ValueError si
+        hay una definición cíclica, p. ej. let a = b y let b = a.
+        """
+        graph = self.definition_graph()
+        order = []
+        done = set()
+        for root in graph:
+            if root in done:
+                continue
+            # DFS iterativo; 'path' es la cadena de definiciones en curso
+            path = [root]
+            stack = [iter(graph[root])]
+            while stack:
+                for dep in stack[-1]:
+                    if dep in path:
+                        cycle = path[path.index(dep):] + [dep]
+                        raise ValueError("Definición cíclica: " + " -> ".join(cycle))
+                    if dep not in done:
+                        path.append(dep)
+                        stack.append(iter(graph[dep]))
+                        break
+                else:
+                    stack.pop()
+                    ident = path.pop()
+                    done.add(ident)
+                    order.append(ident)
+        return order
@@ -0,0 +1,106 @@
+# lexer/src/runtime/token_buffer.py
+
+from array import array
+
+# Centinela: el valor del token es el propio lexema (se obtiene del texto fuente)
+_LEXEME = object()
+
+
+class TokenBuffer:
+    """
+    Contenedor compacto de tokens en forma de arreglos paralelos:
+      types  → array('H') con el ID del tipo de token (índice en type_names)
+      starts → array('I') con el offset de inicio del lexema en el fuente
+      ends   → array('I') con el offset de fin del lexema en el fuente
+    Unos 10 bytes por token. Los lexemas se cortan del fuente sólo al pedirlos,
+    y el buffer se comporta como una secuencia de tuplas (tipo, lexema), por lo
+    que Parser.parse y trace_parse lo consumen igual que una lista. Como una
+    lista, se puede concatenar con otra secuencia de tokens (el resultado es una
+    lista): parser_interface.parse añade así su ('$', None).
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.types = array('H')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.type_names = []   # ID → tipo de token
+        self.type_ids = {}     # tipo de token → ID
+        # Valores que no son un corte del fuente (p. ej. acciones que devuelven int(lexeme))
+        self.values = {}
+
+    def intern(self, tok_type):
+        """Devuelve el ID del tipo de token, registrándolo si es nuevo."""
+        type_id = self.type_ids.get(tok_type)
+        if type_id is None:
+            type_id = len(self.type_names)
+            if type_id > 0xFFFF:
+                raise OverflowError("TokenBuffer: más de 65536 tipos de token distintos.")
+            self.type_ids[tok_type] = type_id
+            self.type_names.append(tok_type)
+        return type_id
+
+    def append(self, tok_type, start, end, value=_LEXEME):
+        """Agrega un token que ocupa source[start:end]; 'value' sustituye al lexema."""
+        type_id = self.type_ids.get(tok_type)
+        if type_id is None:
+            type_id = self.intern(tok_type)
+        if value is not _LEXEME:
+            self.values[len(self.types)] = value
+        self.types.append(type_id)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def type_of(self, index):
+        return self.type_names[self.types[index]]
+
+    def lexeme(self, index):
+        value = self.values.get(index, _LEXEME) if self.values else _LEXEME
+        if value is _LEXEME:
+            return self.source[self.starts[index]:self.ends[index]]
+        return value
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("TokenBuffer: índice fuera de rango.")
+        return self.type_names[self.types[index]], self.lexeme(index)
+
+    def __iter__(self):
+        type_names = self.type_names
+        source = self.source
+        values = self.values
+        for index, (type_id, start, end) in enumerate(zip(self.types, self.starts, self.ends)):
+            if values and index in values:
+                yield type_names[type_id], values[index]
+            else:
+                yield type_names[type_id], source[start:end]
+
+    def __add__(self, other):
+        """buffer + tokens: lista con los tokens de ambos, como list + list."""
+        try:
+            return list(self) + list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __radd__(self, other):
+        """tokens + buffer: lista con los tokens de ambos."""
+        try:
+            return list(other) + list(self)
+        except TypeError:
+            return NotImplemented
+
+    def __eq__(self, other):
+        try:
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return f"TokenBuffer({len(self)} tokens)"
@@ -1,8 +1,11 @@
 # tests/test_dfa.py
 import pytest
-from src.models.regex_parser import RegexParser
-from src.models.syntax_tree import SyntaxTree
-from src.models.dfa import DFA
+from array import array
+from lexer.src.models.regex_parser import RegexParser
+from lexer.src.models.syntax_tree import SyntaxTree
+from lexer.src.models.dfa import DFA, CompiledDFA
+from lexer.src.models.mindfa import minimize_dfa
+from lexer.src.models.regex_ast import sequence, tag_rule
 
 @pytest.fixture
 def make_dfa():
@@ -36,3 +39,118 @@ def test_dfa_union(make_dfa):
     assert dfa.simulate("a")
     assert dfa.simulate("b")
     assert not dfa.simulate("ab")
+
+def rules_dfa(*regexes):
+    """DFA de la alternancia de reglas; la i-ésima termina en la hoja de aceptación <i>."""
+    return DFA(SyntaxTree(sequence('|', [tag_rule(RegexParser(r).parse_ast(), order)
+                                         for order, r in enumerate(regexes)])))
+
+def test_dfa_rules_pick_highest_priority_rule():
+    # "if" empata con la regla de identificadores: gana la de menor 'order'
+    dfa = rules_dfa("if", "[a-z]+")
+    dfa.assign_rules([{'order': 0, 'action': 'IF'}, {'order': 1, 'action': 'ID'}])
+    assert dfa.match_prefix_and_token("if(") == (2, {'order': 0, 'action': 'IF'})
+    assert dfa.match_prefix_and_token("iffy") == (4, {'order': 1, 'action': 'ID'})
+    assert dfa.match_prefix_and_token("(") == (0, None)
+
+def test_dfa_match_at_offsets(make_dfa):
+    dfa = make_dfa("(a|b)*abb#")
+    text = "xxabbab"
+    assert dfa.match_at(text, 2) == 3
+    assert dfa.longest_match(text, 2, 4) == -1   # "ab" no alcanza a aceptar
+    assert dfa.match_at(text, 0) == -1
+    assert dfa.match_prefix("abbabb") == 6
+
+def test_dfa_symbol_classes(make_dfa):
+    # a, b y c sólo aparecen juntas en la misma alternancia: una sola clase;
+    # d también aparece sola, así que queda en otra
+    dfa = make_dfa("(((a|b|c|d)(a|b|c|d)*)|d)#")
+    assert dfa.class_of['a'] == dfa.class_of['b'] == dfa.class_of['c']
+    assert dfa.class_of['d'] != dfa.class_of['a']
+    assert len(dfa.symbol_classes) == 2
+    assert all(len(trans) <= 2 for trans in dfa.transitions.values())
+    assert dfa.simulate("cab") and dfa.simulate("d") and dfa.simulate("dad")
+    assert not dfa.simulate("e")
+
+def test_dfa_dense_table(make_dfa):
+    dfa = make_dfa("abc#")
+    columns = dfa.columns
+    # fila del estado muerto: todo va a 0 y no está vivo
+    assert list(dfa.table[:columns]) == [0] * columns
+    assert dfa.live_table[0] == 0 and dfa.accept_table[0] == -1
+    state = dfa.table[dfa.start_state * columns + dfa.class_of['a']]
+    assert state != 0 and dfa.live_table[state]
+    # carácter fuera del alfabeto → estado muerto
+    assert dfa.table[dfa.start_state * columns + dfa.other_class] == 0
+    assert dfa.simulate("abc") and not dfa.simulate("abx") and not dfa.simulate("ab")
+
+def test_dfa_interval_class_is_one_leaf(make_dfa):
+    # [α-ω] es una sola hoja (un CharSet), no 25 alternativas
+    dfa = make_dfa("[α-ω][α-ω]*#")
+    assert len(dfa.pos_to_symbol) == 3
+    assert dfa.simulate("λμ") and not dfa.simulate("λa") and not dfa.simulate("")
+    # Los intervalos solapados se parten en rangos disjuntos: [a-m] y [h-z]
+    dfa = make_dfa("([a-m]x)|([h-z]y)#")
+    assert dfa.lookup_class('a') != dfa.lookup_class('h') != dfa.lookup_class('z')
+    assert dfa.lookup_class('b') == dfa.lookup_class('a')
+
+def test_dfa_deep_regex_without_recursion(make_dfa):
+    # Anidamiento más profundo que el límite de recursión de Python
+    depth = 3000
+    dfa = make_dfa("(" * depth + "a" + ")+" * depth + "#")
+    assert len(dfa.pos_to_symbol) == 2
+    assert dfa.simulate("aaa") and not dfa.simulate("")
+    dfa = make_dfa("(" + "|".join("a" * 3000) + ")b#")
+    assert dfa.simulate("ab") and not dfa.simulate("b")
+
+def test_dfa_optional_has_no_epsilon_symbol(make_dfa):
+    # x? es un nodo propio: 'ε' no entra al alfabeto ni se acepta como carácter
+    dfa = make_dfa("a?b#")
+    assert dfa.alphabet == {'a', 'b'}
+    assert dfa.simulate("b") and dfa.simulate("ab") and not dfa.simulate("εb")
+
+def test_dfa_budget_and_estimate(make_dfa):
+    from lexer.src.models.dfa import DFABudgetExceeded, estimate_dfa_states
+    regex = "(a|b)*a" + "(a|b)" * 9 + "#"
+    tree = SyntaxTree(RegexParser(regex).parse())
+    # (a|b)*a(a|b)^9 tiene 2^10 estados; la estimación lo anticipa sin construirlo
+    assert estimate_dfa_states(tree.raiz) == 1 << 10
+    assert estimate_dfa_states(SyntaxTree(RegexParser("[a-z]([a-z]|[0-9])*#").parse()).raiz) < 10
+    # Los pasos de un solo carácter tras una cerradura no duplican estados
+    assert estimate_dfa_states(SyntaxTree(RegexParser(".*abcdefghijklmnop#").parse()).raiz) < 20
+    # Un paso que no se solapa termina las cerraduras anteriores
+    assert estimate_dfa_states(SyntaxTree(RegexParser("[a-z]+[0-9]+" * 4 + "#").parse()).raiz) < 20
+    with pytest.raises(DFABudgetExceeded):
+        DFA(tree, state_budget=100)
+    with pytest.raises(DFABudgetExceeded):
+        DFA(tree, transition_budget=100)
+    assert len(DFA(tree, state_budget=2000).states) == 1 << 10
+
+def test_rule_ids_are_not_symbols():
+    # Las reglas no ocupan símbolos: el texto Latin-1 y los miles de reglas no chocan con ellas
+    dfa = rules_dfa(*[f"w{i}" for i in range(3000)] + ["[À-ÿ]+"])
+    dfa.assign_rules([{'order': i} for i in range(3001)])
+    assert len(dfa.symbol_classes) == 12   # w, 0-9 y el rango À-ÿ
+    assert dfa.match_prefix_and_token("w2999") == (5, {'order': 2999})
+    assert dfa.match_prefix_and_token("Àéñ") == (3, {'order': 3000})
+
+def test_freeze_keeps_only_tables():
+    dfa = rules_dfa("if", "[a-z]+", "[0-9]+")
+    rules = [{'order': 0, 'action': 'IF'}, {'order': 1, 'action': 'ID'}, {'order': 2, 'action': 'NUM'}]
+    dfa.assign_rules(rules)
+    frozen = dfa.freeze()
+    assert type(frozen) is CompiledDFA and not hasattr(frozen, '__dict__')
+    assert not hasattr(frozen, 'syntax_tree') and not hasattr(frozen, 'states')
+    for text in ["if(", "iffy", "42x", "(", "ñ"]:
+        assert frozen.match_prefix_and_token(text) == dfa.match_prefix_and_token(text)
+        assert frozen.match_prefix(text) == dfa.match_prefix(text)
+    assert frozen.simulate("if") and not frozen.simulate("if(")
+
+def test_freeze_without_rules(make_dfa):
+    # Sin assign_rules, el DFA y su mínimo también se pueden congelar
+    dfa = make_dfa("(a|b)*abb#")
+    for automaton in (dfa, minimize_dfa(dfa)):
+        assert automaton.rules_by_order is None
+        frozen = automaton.freeze()
+        assert type(frozen.class_starts) is type(automaton.class_starts) is array
+        assert frozen.simulate("aabb") and not frozen.simulate("aab")
@@ -0,0 +1,49 @@
+# tests/test_lazydfa.py
+import pytest
+from lexer.src.models.regex_parser import RegexParser
+from lexer.src.models.syntax_tree import SyntaxTree
+from lexer.src.models.dfa import DFA
+from lexer.src.models.lazydfa import LazyDFA, compile_lazy_rules
+from lexer.src.models.regex_ast import sequence, tag_rule
+
+def tree(regex):
+    return SyntaxTree(RegexParser(regex).parse_ast())
+
+def test_lazy_builds_only_reached_states():
+    lazy = LazyDFA(tree("(a|b)*abb#"))
+    assert len(lazy.cache) == 1   # sólo el estado inicial
+    assert lazy.simulate("aabb") and not lazy.simulate("aab") and not lazy.simulate("")
+    assert lazy.match_at("xxabbab", 2) == 3
+    assert len(lazy.cache) <= len(DFA(tree("(a|b)*abb#")).states)
+
+def test_lazy_rules_pick_highest_priority_rule():
+    rules = [{'order': 0, 'action': 'IF'}, {'order': 1, 'action': 'ID'}]
+    lazy = LazyDFA(SyntaxTree(sequence('|', [tag_rule(RegexParser("if").parse_ast(), 0),
+                                             tag_rule(RegexParser("[a-z]+").parse_ast(), 1)])))
+    lazy.assign_rules(rules)
+    assert lazy.match_prefix_and_token("if(") == (2, rules[0])
+    assert lazy.match_prefix_and_token("iffy") == (4, rules[1])
+    assert lazy.match_prefix_and_token("(") == (0, None)
+
+def test_compile_lazy_rules_builds_one_engine():
+    rules = [({'order': 3, 'action': 'IF'}, "if"),
+             ({'order': 5, 'action': 'ID'}, "{letter}+"),
+             ({'order': 7, 'action': 'NUM'}, "[0-9]+")]
+    lazy = compile_lazy_rules(rules, [("letter", "[a-z]")])
+    assert lazy.match_prefix_and_token("if(") == (2, rules[0][0])
+    assert lazy.match_prefix_and_token("iffy") == (4, rules[1][0])
+    assert lazy.match_prefix_and_token("42x") == (2, rules[2][0])
+    assert lazy.longest_match_rule("(", 0, 1) == (-1, -1, 0)
+
+@pytest.mark.parametrize("max_states", [2, 3, 64])
+def test_lazy_bounded_cache_matches_eager(max_states):
+    # (a|b)*a(a|b)^8 necesita 2^9 estados: la caché se desaloja y cae al respaldo
+    regex = "(a|b)*a" + "(a|b)" * 8 + "#"
+    eager = DFA(tree(regex))
+    lazy = LazyDFA(tree(regex), max_states=max_states, window=32)
+    text = "abbabaaabbbabaabbbbaababab" * 8
+    for start in range(0, len(text), 7):
+        assert lazy.match_at(text, start) == eager.match_at(text, start)
+    assert len(lazy.cache) <= max_states
+    if max_states == 2:
+        assert lazy.fallback
@@ -24,3 +24,31 @@ def test_lexer_simple_expression():
         ("EOL",    "\n"),
     ]
     assert tokens == expected
+
+def test_lexer_trace_is_silent_by_default(capsys):
+    tokens = Lexer("a+1").get_tokens()
+    assert tokens == [("ID", "a"), ("PLUS", "+"), ("NUMBER", "1"), ("EOF", "")]
+    assert capsys.readouterr().out == ""
+
+def test_lexer_trace_callback():
+    seen = []
+    tokens = Lexer("a+1", trace=lambda tok, lexeme: seen.append((tok, lexeme))).get_tokens()
+    assert seen == tokens[:-1]   # EOF no se traza
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_lexer_iter_tokens_matches_get_tokens(chunk_size):
+    import io
+    src = "x := 12.5E+3; while1 ñ ### comentario\n  foo"
+    expected = Lexer(src).get_tokens()
+    assert list(Lexer().iter_tokens(io.StringIO(src), chunk_size)) == expected
+    assert list(Lexer().iter_tokens(io.BytesIO(src.encode("utf-8")), chunk_size)) == expected
+
+def test_lexer_token_buffer_matches_get_tokens():
+    src = "x := 12.5E+3; while1 ñ\n  foo"
+    assert list(Lexer(src).get_token_buffer()) == Lexer(src).get_tokens()
+
+def test_lexer_wildcard_rules():
+    # "###".*[\n] descarta el comentario con su salto de línea; '.' atrapa lo no declarado
+    assert Lexer("a ### b := 1\nc @").get_tokens() == [
+        ("ID", "a"), ("ID", "c"), ("SYMBOL", "@"), ("EOF", ""),
+    ]
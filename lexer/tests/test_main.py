@@ -0,0 +1,148 @@
+# tests/test_main.py
+import pytest
+from lexer.src.controllers.main_controller import classify_action, first_char_dispatch
+from lexer.src.models.regex_parser import RegexParser
+from lexer.src.models.syntax_tree import SyntaxTree
+from lexer.src.models.dfa import DFA
+from lexer.src.models.regex_ast import sequence, tag_rule
+from lexer.src.models.lazydfa import LazyDFA
+
+@pytest.mark.parametrize("action, expected", [
+    ("return None",                  ("skip", None)),
+    ("pass",                         ("skip", None)),
+    ("return EOL",                   ("token", "EOL")),
+    ("return (IF,       lexeme)",    ("token", "IF")),
+    ("return lexeme",                ("function", None)),
+    ("return (NUMBER, int(lexeme))", ("function", None)),
+])
+def test_classify_action(action, expected):
+    assert classify_action(action) == expected
+
+def test_first_char_dispatch():
+    # x/y en racha, ';' de un carácter, "ab" necesita el DFA y '$' va al respaldo
+    ast = sequence('|', [tag_rule(RegexParser(regex).parse_ast(), order)
+                         for order, regex in enumerate(["(x|y)+", ";", "ab"])])
+    dfa = DFA(SyntaxTree(ast))
+    dfa.assign_rules([{'order': 0, 'action': 'return None'},
+                      {'order': 1, 'action': 'return SEMICOLON'},
+                      {'order': 2, 'action': 'return AB'}])
+    dispatch = first_char_dispatch(dfa, fallback_chars=['$', ';'])
+    xy = ((ord('x'), ord('y')),)
+    assert dispatch['x'] == (0, xy) and dispatch['y'] == (0, xy)
+    assert dispatch[';'] == (1, None)
+    assert dispatch['$'] == (None, None)
+    assert 'a' not in dispatch
+
+def test_rules_over_budget_fall_back_to_lazy(tmp_path):
+    from lexer.src.controllers.main_controller import build_global_dfa
+    from lexer.src.models.yalex_parser import YALexParser
+    spec = tmp_path / "explota.yal"
+    spec.write_text(
+        "let ab = ['a''b']\n"
+        "rule tokens =\n"
+        "    ab* 'a' ab ab ab ab ab ab ab ab ab ab { return (ID, lexeme) }\n"
+        "  | \"if\"                                 { return (IF, lexeme) }\n")
+    p = YALexParser(str(spec))
+    p.parse()
+    global_dfa, _, global_rules, lazy_rules, lazy_dfa = build_global_dfa(p, state_budget=500)
+    # La regla que explota se reconoce con un LazyDFA; el resto sigue en el DFA global
+    assert [info['order'] for info, _ in lazy_rules] == [0]
+    assert [info['order'] for info in global_rules] == [1]
+    assert lazy_dfa.match_prefix_and_token("bbabababababb") == (13, lazy_rules[0][0])
+    assert global_dfa.match_prefix_and_token("if")[1]['order'] == 1
+
+def test_product_retries_share_one_deadline(tmp_path, monkeypatch):
+    import time
+    from lexer.src.controllers import main_controller
+    from lexer.src.models.dfa import DFABudgetExceeded
+    from lexer.src.models.yalex_parser import YALexParser
+    spec = tmp_path / "reglas.yal"
+    spec.write_text("rule tokens =\n" + "".join(
+        f"  | \"{word}\" {{ return (ID, lexeme) }}\n" for word in ["if", "else", "while", "for", "do"]))
+    p = YALexParser(str(spec))
+    p.parse()
+    budgets = []
+    real_product = main_controller.product_dfa
+
+    def slow_product(automata, rules, time_budget=None, **budget):
+        # Cada intento con reglas agota 20 ms y explota
+        budgets.append(time_budget)
+        if automata:
+            time.sleep(0.02)
+            raise DFABudgetExceeded("demasiado grande")
+        return real_product(automata, rules, time_budget=time_budget, **budget)
+
+    monkeypatch.setattr(main_controller, "product_dfa", slow_product)
+    _, _, global_rules, lazy_rules, _ = main_controller.build_global_dfa(p, time_budget=0.05)
+    # Los reintentos reciben el tiempo que queda, no el presupuesto entero cada uno
+    tried = budgets[:-1]
+    assert tried == sorted(tried, reverse=True) and all(0 < b <= 0.05 for b in tried)
+    assert len(tried) < 5 and budgets[-1] is None
+    assert global_rules == [] and len(lazy_rules) == 5
+
+def generated_lexer(tmp_path, spec_text, **options):
+    """Genera un lexer desde spec_text en tmp_path y devuelve el módulo importado."""
+    import importlib.util
+    from lexer.src.controllers.main_controller import generate_lexer
+    spec = tmp_path / "spec.yal"
+    spec.write_text(spec_text, encoding="utf-8")
+    output = tmp_path / "lexer_generado.py"
+    generate_lexer(str(spec), str(output), **options)
+    module_spec = importlib.util.spec_from_file_location("lexer_generado", output)
+    generated = importlib.util.module_from_spec(module_spec)
+    module_spec.loader.exec_module(generated)
+    return generated
+
+def test_generated_lexer_uses_lazy_rules(tmp_path):
+    generated = generated_lexer(tmp_path,
+        "let ab = ['a''b']\n"
+        "rule tokens =\n"
+        "    [' ']+                               { return None }\n"
+        "  | \"if\"                                 { return (IF, lexeme) }\n"
+        "  | ab* 'a' ab ab ab ab ab ab ab ab ab ab { return (ID, lexeme) }\n"
+        "  | ['0'-'9']+                           { return (NUMBER, lexeme) }\n",
+        state_budget=500)
+    assert isinstance(generated.LAZY_DFA, LazyDFA)
+    # La regla perezosa compite con las del DFA global por el lexema más largo
+    tokens = generated.Lexer("if 42 bbabababababb if").get_tokens()
+    assert tokens == [("IF", "if"), ("NUMBER", "42"), ("ID", "bbabababababb"),
+                      ("IF", "if"), ("EOF", "")]
+
+def test_generated_lexer_string_rule(tmp_path):
+    # Las comillas dentro de una clase son miembros de la clase
+    generated = generated_lexer(tmp_path,
+        "{\n"
+        "  from lexer.src.runtime.token_types import *\n"
+        "  STRING = \"STRING\"\n"
+        "}\n"
+        "rule tokens =\n"
+        "    [' ']+                { return None }\n"
+        "  | '\"' [^'\"']* '\"'       { return (STRING, lexeme) }\n"
+        "  | ['a'-'z''\\'']+        { return (ID, lexeme) }\n")
+    tokens = generated.Lexer('"hola mundo" it\'s ""').get_tokens()
+    assert tokens == [("STRING", '"hola mundo"'), ("ID", "it's"), ("STRING", '""'), ("EOF", "")]
+
+def test_action_body_dedents_after_first_line():
+    from lexer.src.controllers.main_controller import action_body
+    # Primera línea tras '{' y el resto sangrado en el archivo
+    assert action_body("if lexeme == 'x':\n        return (ID, lexeme)\n    return (IF, lexeme)") == \
+        "if lexeme == 'x':\n    return (ID, lexeme)\nreturn (IF, lexeme)"
+    # Acción que empieza en su propia línea: su primera línea perdió la sangría
+    assert action_body("if lexeme:\n        return None") == "if lexeme:\n    return None"
+    assert action_body("return None") == "return None"
+
+def test_generated_lexer_multiline_action(tmp_path):
+    generated = generated_lexer(tmp_path,
+        "rule tokens =\n"
+        "    [' ']+        { return None }\n"
+        "  | ['a'-'z']+    { if lexeme == \"if\":\n"
+        "                        return (IF, lexeme)\n"
+        "                    return (ID, lexeme) }\n"
+        "  | ['0'-'9']+    {\n"
+        "        value = int(lexeme)\n"
+        "        if value > 9:\n"
+        "            return (NUMBER, lexeme)\n"
+        "        return (ID, lexeme)\n"
+        "    }\n")
+    tokens = generated.Lexer("if x 42 7").get_tokens()
+    assert tokens == [("IF", "if"), ("ID", "x"), ("NUMBER", "42"), ("ID", "7"), ("EOF", "")]
@@ -1,9 +1,10 @@
 # tests/test_mindfa.py
 import pytest
-from src.models.regex_parser import RegexParser
-from src.models.syntax_tree import SyntaxTree
-from src.models.dfa import DFA
-from src.models.mindfa import minimize_dfa
+from lexer.src.models.regex_parser import RegexParser
+from lexer.src.models.syntax_tree import SyntaxTree
+from lexer.src.models.dfa import DFA
+from lexer.src.models.mindfa import minimize_dfa
+from lexer.src.models.regex_ast import sequence, tag_rule
 
 @pytest.fixture
 def make_dfa():
@@ -38,3 +39,23 @@ def test_minimize_preserves_language(make_dfa):
     for s in rejected:
         assert not dfa.simulate(s), f"Original no debe aceptar '{s}'"
         assert not min_dfa.simulate(s), f"Mínimo no debe aceptar '{s}'"
+
+def test_minimize_is_minimal(make_dfa):
+    """El DFA mínimo de (a|b)*abb tiene 4 estados; 'ac|bc' colapsa sus dos ramas."""
+    assert len(minimize_dfa(make_dfa("(a|b)*abb#")).states) == 4
+    min_dfa = minimize_dfa(make_dfa("(ac|bc)#"))
+    assert len(min_dfa.states) == 3
+    assert min_dfa.simulate("ac") and min_dfa.simulate("bc") and not min_dfa.simulate("c")
+
+def test_minimize_keeps_rules_apart(make_dfa):
+    """Estados que aceptan reglas distintas no se fusionan y conservan su regla."""
+    dfa = DFA(SyntaxTree(sequence('|', [tag_rule(RegexParser("xa").parse_ast(), 0),
+                                        tag_rule(RegexParser("xb").parse_ast(), 1)])))
+    rules = [{'order': 0, 'action': 'A'}, {'order': 1, 'action': 'B'}]
+    dfa.assign_rules(rules)
+    min_dfa = minimize_dfa(dfa)
+    assert len(min_dfa.states) == 4
+    assert min_dfa.match_prefix_and_token("xa") == (2, rules[0])
+    assert min_dfa.match_prefix_and_token("xb!") == (2, rules[1])
+    # Sin reglas, ambos estados finales son equivalentes
+    assert len(minimize_dfa(make_dfa("((xa)|(xb))#")).states) == 3
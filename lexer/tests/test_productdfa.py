@@ -0,0 +1,57 @@
+# tests/test_productdfa.py
+import shelve
+from lexer.src.models import productdfa
+from lexer.src.models.mindfa import minimize_dfa
+from lexer.src.models.productdfa import compile_rule, compile_rules, product_dfa
+
+RULES = [
+    ({'order': 0, 'action': 'IF'}, "if"),
+    ({'order': 1, 'action': 'ID'}, "{letter}({letter}|[0-9])*"),
+    ({'order': 2, 'action': 'NUM'}, "[0-9]+"),
+]
+DEFINITIONS = [("letter", "[a-z]")]
+
+def test_product_keeps_rule_priority():
+    automata = [compile_rule(regex, DEFINITIONS) for _, regex in RULES]
+    dfa = minimize_dfa(product_dfa(automata, [info for info, _ in RULES]))
+    assert dfa.match_prefix_and_token("if(") == (2, RULES[0][0])
+    assert dfa.match_prefix_and_token("iffy") == (4, RULES[1][0])
+    assert dfa.match_prefix_and_token("42x") == (2, RULES[2][0])
+    assert dfa.match_prefix_and_token("(") == (0, None)
+    # Los caracteres fuera de las reglas no son una clase propia
+    assert dfa.lookup_class('\x80') == dfa.other_class
+
+def test_compile_rules_parallel_and_cached():
+    regexes = [regex for _, regex in RULES]
+    sequential = compile_rules(regexes, DEFINITIONS, workers=1)
+    cache = {}
+    parallel = compile_rules(regexes, DEFINITIONS, workers=2, cache=cache)
+    assert [a.transitions for a in parallel] == [a.transitions for a in sequential]
+    assert len(cache) == 3
+    # Con la caché llena no se vuelve a construir nada
+    assert all(a is b for a, b in zip(compile_rules(regexes, DEFINITIONS, cache=cache), parallel))
+
+def test_few_rules_compile_in_process(monkeypatch):
+    # Por debajo de PARALLEL_MIN_RULES, workers=None no arranca procesos
+    def no_pool(*args, **kwargs):
+        raise AssertionError("no debería crearse un ProcessPoolExecutor")
+    monkeypatch.setattr(productdfa, "ProcessPoolExecutor", no_pool)
+    assert all(compile_rules([regex for _, regex in RULES], DEFINITIONS))
+
+def test_compile_rules_with_shelve_cache(tmp_path):
+    regexes = [regex for _, regex in RULES]
+    with shelve.open(str(tmp_path / "reglas")) as cache:
+        first = compile_rules(regexes, DEFINITIONS, workers=1, cache=cache)
+    with shelve.open(str(tmp_path / "reglas")) as cache:
+        assert len(cache) == 3
+        again = compile_rules(regexes, DEFINITIONS, workers=1, cache=cache)
+    assert [a.transitions for a in again] == [a.transitions for a in first]
+
+def test_compile_rule_over_budget_returns_none():
+    assert compile_rule("(a|b)*a" + "(a|b)" * 10, state_budget=100) is None
+
+def test_long_literal_after_closure_compiles_eagerly():
+    # .* seguido de un literal largo tiene un estado por carácter: no va a LazyDFA
+    automaton = compile_rule(".*abcdefghijklmnopqrstuvwxyz", state_budget=100)
+    assert automaton is not None and len(automaton) <= 28
+    assert compile_rule("[a-z]+[0-9]+" * 6, state_budget=100) is not None
@@ -0,0 +1,38 @@
+# tests/test_regex_ast.py
+import pytest
+from lexer.src.models.regex_parser import RegexParser
+from lexer.src.models.regex_ast import Simplifier, simplify
+from lexer.src.models.syntax_tree import SyntaxTree
+from lexer.src.models.dfa import DFA
+
+def simplified(pattern):
+    return repr(simplify(RegexParser(pattern).parse_ast()))
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("(a(bc))d",      "(a.b.c.d)"),      # concatenaciones aplanadas
+    ("a|b|a",         "(a|b)"),          # alternativa repetida
+    ("if|in|int",     "(i.(f|(n.t?)))"), # prefijos comunes factorizados
+    ("(a*)*",         "a*"),
+    ("(a+)*",         "a*"),
+    ("(a?)+",         "a*"),
+    ("(a+)+",         "a+"),
+    ("(a*)?",         "a*"),
+    ("(a?b?)+",       "(a?.b?)*"),       # x+ con x anulable
+])
+def test_simplify(pattern, expected):
+    assert simplified(pattern) == expected
+
+def test_simplified_tree_has_fewer_positions_and_same_language():
+    pattern = "((if)|(in)|(int)|(in))(a|b)?(c*)*#"
+    ast = RegexParser(pattern).parse_ast()
+    raw, simple = SyntaxTree(ast), SyntaxTree(simplify(ast))
+    assert simple.posicion_actual < raw.posicion_actual
+    d1, d2 = DFA(raw), DFA(simple)
+    for w in ["if", "in", "int", "ina", "intbccc", "i", "ifc", "inab"]:
+        assert d1.simulate(w) == d2.simulate(w)
+
+def test_nullable_definitions():
+    s = Simplifier()
+    s.define("opt", RegexParser("a?").parse_ast())
+    # {opt}? sobra porque la definición ya es anulable
+    assert repr(s.simplify(RegexParser("{opt}?").parse_ast())) == "{opt}"
@@ -6,7 +6,7 @@ from src.models.regex_parser import RegexParser, Symbol
     ("a|b#", ["a", "|", "b", ".", "#"],      ["a", "b", "#", ".", "|"]),
     ("ab#",  ["a", ".", "b", ".", "#"],      ["a", "b", ".", "#", "."]),
     ("a*#",  ["a", "*", ".", "#"],           ["a", "*", "#", "."]),
-    ("[0-1]#", ["(", "0", "|", "1", ")", ".", "#"], ["0", "1", "|", "#", "."]),
+    ("[0-1]#", ["[0-1]", ".", "#"],          ["[0-1]", "#", "."]),   # una sola hoja con intervalos
  ])
 def test_tokenize_and_postfix(pattern, expected_tokens, expected_postfix):
     parser = RegexParser(pattern)
@@ -17,3 +17,75 @@ def test_tokenize_and_postfix(pattern, expected_tokens, expected_postfix):
     # Ignorar el marcador final en la comprobación de postfix
     assert token_vals[:len(expected_tokens)] == expected_tokens
     assert postfix_vals[:len(expected_postfix)] == expected_postfix
+
+def test_wildcards_and_negated_class():
+    from lexer.src.models.charset import ANY_CHAR, ANY_BUT_NEWLINE
+    (dot,) = RegexParser(".").parse()
+    assert dot.value == ANY_BUT_NEWLINE and "\n" not in dot.value and "λ" in dot.value
+    (any_char,) = RegexParser("_").parse()
+    assert any_char.value == ANY_CHAR
+    (negated,) = RegexParser("[^'a'-'c']").parse()
+    assert "d" in negated.value and "b" not in negated.value
+    # Un escape de puntuación es el carácter literal
+    assert [str(t) for t in RegexParser("\\.\\_").parse()] == [".", "_", "."]
+
+def test_parse_ast_matches_postfix_tree():
+    from lexer.src.models.syntax_tree import SyntaxTree
+    pattern = "(a|bc)*d?'xy'[0-9]+#"
+    ast = RegexParser(pattern).parse_ast()
+    assert repr(ast) == "((a|(b.c))*.d?.(x.y).[0-9]+.#)"
+    from_ast = SyntaxTree(ast)
+    from_postfix = SyntaxTree(RegexParser(pattern).parse())
+    assert from_ast.posicion_actual == from_postfix.posicion_actual
+    assert from_ast.raiz.firstpos == from_postfix.raiz.firstpos
+    assert from_ast.raiz.lastpos == from_postfix.raiz.lastpos
+
+def test_scanner_tokens_are_compact():
+    tokens = RegexParser("'ñu'|\\n").scan()
+    assert not hasattr(tokens[0], "__dict__")
+    # los literales entre comillas conservan los caracteres no ASCII
+    assert [t.value for t in tokens if t.kind == 'sym'] == ["ñ", "u", "\n"]
+    with pytest.raises(ValueError):
+        RegexParser("(a|b").parse_ast()
+
+def test_escapes_are_decoded_once(recwarn):
+    from lexer.src.controllers.main_controller import escape_literal
+    from lexer.src.models.regex_parser import decode_escapes
+    assert decode_escapes(r"\n\t\\\'\"\x41\}\.") == "\n\t\\'\"A}."
+    # Un escape sin significado propio es el carácter, sin DeprecationWarning
+    (klass,) = RegexParser(r"['\}' '.']").parse()
+    assert "}" in klass.value and "." in klass.value and "\\" not in klass.value
+    # El literal YALex '\t' es un tabulador, no una barra y una 't'
+    (tab_or_space,) = RegexParser("[" + escape_literal(" ") + escape_literal(r"\t") + "]").parse()
+    assert "\t" in tab_or_space.value and "\\" not in tab_or_space.value
+    assert not [w for w in recwarn if issubclass(w.category, DeprecationWarning)]
+
+def test_unicode_and_octal_escapes():
+    from lexer.src.models.regex_parser import decode_escapes
+    assert decode_escapes(r"\u00e9\U0001F600\0\101\x41") == "é\U0001F600\x00AA"
+    # En una clase, é es un solo carácter, no 'u', '0', '0', 'e', '9'
+    (klass,) = RegexParser(r"['a'-'z''\u00e9']").parse()
+    assert "é" in klass.value and "q" in klass.value
+    assert "0" not in klass.value and "9" not in klass.value
+    with pytest.raises(ValueError):
+        decode_escapes(r"\UFFFFFFFF")
+
+def test_quotes_inside_classes_are_members():
+    (not_quote,) = RegexParser(r"""[^'"']""").parse()
+    assert '"' not in not_quote.value and "a" in not_quote.value and "'" in not_quote.value
+    (quote,) = RegexParser(r"['\'']").parse()
+    assert quote.value == "'"
+    # Un ']' entre comillas no cierra la clase
+    (klass,) = RegexParser("[']''a']").parse()
+    assert "]" in klass.value and "a" in klass.value
+
+def test_ranges_between_any_endpoints():
+    (printable,) = RegexParser("[' '-'~']").parse()
+    assert len(printable.value) == 95 and "A" in printable.value
+    (latin1,) = RegexParser(r"['\x00'-'\xff']").parse()
+    assert len(latin1.value) == 256 and "ñ" in latin1.value
+    # Los espacios sin comillas entre elementos no son parte de la clase
+    (ab,) = RegexParser("['a' 'b']").parse()
+    assert len(ab.value) == 2 and " " not in ab.value
+    with pytest.raises(ValueError):
+        RegexParser("['z'-'a']").parse()
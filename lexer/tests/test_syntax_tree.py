@@ -1,7 +1,7 @@
 # tests/test_syntax_tree.py
 import pytest
-from src.models.regex_parser import RegexParser
-from src.models.syntax_tree import SyntaxTree
+from lexer.src.models.regex_parser import RegexParser
+from lexer.src.models.syntax_tree import SyntaxTree, bits_to_positions
 
 @pytest.mark.parametrize("pattern, nullable, firstpos, lastpos", [
     ("a#",   False, {1},    {2}),       # 'a' luego '#'
@@ -20,3 +20,29 @@ def test_syntax_tree_properties(pattern, nullable, firstpos, lastpos):
     assert root.nullable == nullable
     assert root.firstpos == firstpos
     assert root.lastpos  == lastpos
+
+def test_position_sets_are_bitsets():
+    root = SyntaxTree(RegexParser("(a|b)c#").parse()).raiz
+    assert root.firstpos_bits == (1 << 1) | (1 << 2)
+    assert root.lastpos_bits == 1 << 4
+    assert bits_to_positions(0b10110) == [1, 2, 4]
+    assert bits_to_positions(0) == []
+
+def test_plus_is_a_native_node():
+    # a+ no duplica 'a': una sola posición para la hoja
+    root = SyntaxTree(RegexParser("a+#").parse()).raiz
+    assert root.izquierdo.valor == '+'
+    assert not root.izquierdo.nullable
+    assert bits_to_positions(root.izquierdo.firstpos_bits) == [1]
+    assert root.lastpos == {2}
+
+def test_definition_references_get_fresh_positions():
+    # {d} se parsea una vez y cada uso recibe sus propias posiciones
+    definitions = {"d": RegexParser("([0-9])").parse()}
+    tree = SyntaxTree(RegexParser("{d}.{d}#").parse(), definitions)
+    assert tree.posicion_actual == 5
+    assert tree.raiz.firstpos == {1}
+    assert tree.raiz.lastpos == {4}
+    assert str(tree.raiz.izquierdo.izquierdo.izquierdo.valor) == "[0-9]"
+    with pytest.raises(ValueError):
+        SyntaxTree(RegexParser("{x}#").parse(), definitions)
@@ -0,0 +1,33 @@
+# tests/test_token_buffer.py
+import pytest
+from lexer.src.runtime.token_buffer import TokenBuffer
+
+@pytest.fixture
+def buffer():
+    src = "ab + 12"
+    buf = TokenBuffer(src)
+    buf.append("ID", 0, 2)
+    buf.append("PLUS", 3, 4)
+    buf.append("NUMBER", 5, 7, 12)   # valor distinto del lexema
+    buf.append("EOF", 7, 7)
+    return buf
+
+def test_token_buffer_sequence_protocol(buffer):
+    assert len(buffer) == 4
+    assert buffer[0] == ("ID", "ab")
+    assert buffer[-1] == ("EOF", "")
+    assert buffer[1:3] == [("PLUS", "+"), ("NUMBER", 12)]
+    assert list(buffer) == [("ID", "ab"), ("PLUS", "+"), ("NUMBER", 12), ("EOF", "")]
+    with pytest.raises(IndexError):
+        buffer[4]
+
+def test_token_buffer_interns_types(buffer):
+    assert buffer.type_names == ["ID", "PLUS", "NUMBER", "EOF"]
+    assert buffer.types.typecode == "H" and buffer.starts.typecode == "I"
+    assert buffer.type_of(2) == "NUMBER"
+
+def test_token_buffer_concatenates_like_a_list(buffer):
+    assert buffer + [("$", None)] == list(buffer) + [("$", None)]
+    assert [("BOF", "")] + buffer == [("BOF", "")] + list(buffer)
+    with pytest.raises(TypeError):
+        buffer + 1
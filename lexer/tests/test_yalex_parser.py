@@ -32,3 +32,21 @@ def test_rules_extracted(yalex_parser):
             continue
         assert isinstance(regex, str) and regex != ""
         assert action.strip().startswith("return")
+
+def test_definition_graph_and_order(yalex_parser):
+    graph = yalex_parser.definition_graph()
+    assert graph["id"] == ["letter", "alnum"]
+    assert graph["digit"] == []
+    order = yalex_parser.definition_order()
+    assert order.index("letter") < order.index("alnum") < order.index("id")
+    # dentro de comillas o de [...] no hay referencias
+    assert yalex_parser.reference_definitions("id ('digit' | [digit])* digits") == \
+        "{id} ('digit' | [digit])* digits"
+
+def test_cyclic_definitions_are_rejected(tmp_path):
+    spec = tmp_path / "ciclo.yal"
+    spec.write_text("let a = 'x' b\nlet b = a | 'y'\nrule tokens =\n  a { return A }\n")
+    p = YALexParser(str(spec))
+    p.parse()
+    with pytest.raises(ValueError, match="cíclica"):
+        p.definition_order()
@@ -1,5 +1,10 @@
 # Código generado automáticamente por YALex
 import re
+import codecs
+import logging
+from array import array
+from bisect import bisect_right
+from lexer.src.runtime.token_buffer import TokenBuffer
 from lexer.src.runtime.token_types import *
 
 # Mapa de puntuaciones generado según las reglas de la gramática
@@ -30,378 +35,1119 @@ PUNCTUATIONS = {
     '#': HASH,
 }
 
+# Reconocimiento rápido de números científicos (precompilado)
+SCIENTIFIC_NUMBER = re.compile(r'\d+\.\d+(?:[eE][+-]?\d+)?')
+# Cualquier prefijo de un número científico (para el modo por bloques)
+SCIENTIFIC_PREFIX = re.compile(r'\d+(?:\.\d*(?:[eE][+-]?\d*)?)?')
+
+# Expresión global de la que salen las tablas (solo referencia):
+# '({ws})|(\\#\\#\\#.*[\\n])|(\\n)|(if)|(else)|(while)|(for)|(return)|(break)|(continue)|({id})|({number})|(\\:\\=)|(\\+)|(\\-)|(\\*)|(\\/)|(\\()|(\\))|(\\,)|(\\;)|(\\:)|(\\<)|(\\=)|(\\>)|(\\{)|(\\})|(\\#)|(eof)|(.)'
+
+# Intervalos [CLASS_STARTS[i], CLASS_ENDS[i]] de la clase CLASS_IDS[i] (ordenados)
+CLASS_STARTS = array('i', [0, 9, 10, 11, 32, 33, 35, 36, 40, 41, 42, 43, 44, 45, 46, 47, 48, 58, 59, 60, 61, 62, 63, 65, 69, 70, 91, 95, 96, 97, 98, 99, 100, 101, 102, 103, 104, 105, 106, 107, 108, 109, 110, 111, 112, 114, 115, 116, 117, 118, 119, 120, 123, 124, 125, 126])
+CLASS_ENDS = array('i', [8, 9, 10, 31, 32, 34, 35, 39, 40, 41, 42, 43, 44, 45, 46, 47, 57, 58, 59, 60, 61, 62, 64, 68, 69, 90, 94, 95, 96, 97, 98, 99, 100, 101, 102, 103, 104, 105, 106, 107, 108, 109, 110, 111, 113, 114, 115, 116, 117, 118, 119, 122, 123, 124, 125, 1114111])
+CLASS_IDS = array('i', [0, 1, 2, 0, 1, 0, 3, 0, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 0, 18, 19, 18, 0, 20, 0, 21, 22, 23, 18, 24, 25, 18, 26, 27, 18, 28, 29, 18, 30, 31, 18, 32, 33, 34, 35, 18, 36, 18, 37, 0, 38, 0])
+OTHER_CLASS = 39
+# Clase de cada carácter Latin-1 del alfabeto; char_class completa el resto
+CHAR_CLASSES = {
+    '\x00': 0,
+    '\x01': 0,
+    '\x02': 0,
+    '\x03': 0,
+    '\x04': 0,
+    '\x05': 0,
+    '\x06': 0,
+    '\x07': 0,
+    '\x08': 0,
+    '\t': 1,
+    '\n': 2,
+    '\x0b': 0,
+    '\x0c': 0,
+    '\r': 0,
+    '\x0e': 0,
+    '\x0f': 0,
+    '\x10': 0,
+    '\x11': 0,
+    '\x12': 0,
+    '\x13': 0,
+    '\x14': 0,
+    '\x15': 0,
+    '\x16': 0,
+    '\x17': 0,
+    '\x18': 0,
+    '\x19': 0,
+    '\x1a': 0,
+    '\x1b': 0,
+    '\x1c': 0,
+    '\x1d': 0,
+    '\x1e': 0,
+    '\x1f': 0,
+    ' ': 1,
+    '!': 0,
+    '"': 0,
+    '#': 3,
+    '$': 0,
+    '%': 0,
+    '&': 0,
+    "'": 0,
+    '(': 4,
+    ')': 5,
+    '*': 6,
+    '+': 7,
+    ',': 8,
+    '-': 9,
+    '.': 10,
+    '/': 11,
+    '0': 12,
+    '1': 12,
+    '2': 12,
+    '3': 12,
+    '4': 12,
+    '5': 12,
+    '6': 12,
+    '7': 12,
+    '8': 12,
+    '9': 12,
+    ':': 13,
+    ';': 14,
+    '<': 15,
+    '=': 16,
+    '>': 17,
+    '?': 0,
+    '@': 0,
+    'A': 18,
+    'B': 18,
+    'C': 18,
+    'D': 18,
+    'E': 19,
+    'F': 18,
+    'G': 18,
+    'H': 18,
+    'I': 18,
+    'J': 18,
+    'K': 18,
+    'L': 18,
+    'M': 18,
+    'N': 18,
+    'O': 18,
+    'P': 18,
+    'Q': 18,
+    'R': 18,
+    'S': 18,
+    'T': 18,
+    'U': 18,
+    'V': 18,
+    'W': 18,
+    'X': 18,
+    'Y': 18,
+    'Z': 18,
+    '[': 0,
+    '\\': 0,
+    ']': 0,
+    '^': 0,
+    '_': 20,
+    '`': 0,
+    'a': 21,
+    'b': 22,
+    'c': 23,
+    'd': 18,
+    'e': 24,
+    'f': 25,
+    'g': 18,
+    'h': 26,
+    'i': 27,
+    'j': 18,
+    'k': 28,
+    'l': 29,
+    'm': 18,
+    'n': 30,
+    'o': 31,
+    'p': 18,
+    'q': 18,
+    'r': 32,
+    's': 33,
+    't': 34,
+    'u': 35,
+    'v': 18,
+    'w': 36,
+    'x': 18,
+    'y': 18,
+    'z': 18,
+    '{': 37,
+    '|': 0,
+    '}': 38,
+    '~': 0,
+    '\x7f': 0,
+    '\x80': 0,
+    '\x81': 0,
+    '\x82': 0,
+    '\x83': 0,
+    '\x84': 0,
+    '\x85': 0,
+    '\x86': 0,
+    '\x87': 0,
+    '\x88': 0,
+    '\x89': 0,
+    '\x8a': 0,
+    '\x8b': 0,
+    '\x8c': 0,
+    '\x8d': 0,
+    '\x8e': 0,
+    '\x8f': 0,
+    '\x90': 0,
+    '\x91': 0,
+    '\x92': 0,
+    '\x93': 0,
+    '\x94': 0,
+    '\x95': 0,
+    '\x96': 0,
+    '\x97': 0,
+    '\x98': 0,
+    '\x99': 0,
+    '\x9a': 0,
+    '\x9b': 0,
+    '\x9c': 0,
+    '\x9d': 0,
+    '\x9e': 0,
+    '\x9f': 0,
+    '\xa0': 0,
+    '¡': 0,
+    '¢': 0,
+    '£': 0,
+    '¤': 0,
+    '¥': 0,
+    '¦': 0,
+    '§': 0,
+    '¨': 0,
+    '©': 0,
+    'ª': 0,
+    '«': 0,
+    '¬': 0,
+    '\xad': 0,
+    '®': 0,
+    '¯': 0,
+    '°': 0,
+    '±': 0,
+    '²': 0,
+    '³': 0,
+    '´': 0,
+    'µ': 0,
+    '¶': 0,
+    '·': 0,
+    '¸': 0,
+    '¹': 0,
+    'º': 0,
+    '»': 0,
+    '¼': 0,
+    '½': 0,
+    '¾': 0,
+    '¿': 0,
+    'À': 0,
+    'Á': 0,
+    'Â': 0,
+    'Ã': 0,
+    'Ä': 0,
+    'Å': 0,
+    'Æ': 0,
+    'Ç': 0,
+    'È': 0,
+    'É': 0,
+    'Ê': 0,
+    'Ë': 0,
+    'Ì': 0,
+    'Í': 0,
+    'Î': 0,
+    'Ï': 0,
+    'Ð': 0,
+    'Ñ': 0,
+    'Ò': 0,
+    'Ó': 0,
+    'Ô': 0,
+    'Õ': 0,
+    'Ö': 0,
+    '×': 0,
+    'Ø': 0,
+    'Ù': 0,
+    'Ú': 0,
+    'Û': 0,
+    'Ü': 0,
+    'Ý': 0,
+    'Þ': 0,
+    'ß': 0,
+    'à': 0,
+    'á': 0,
+    'â': 0,
+    'ã': 0,
+    'ä': 0,
+    'å': 0,
+    'æ': 0,
+    'ç': 0,
+    'è': 0,
+    'é': 0,
+    'ê': 0,
+    'ë': 0,
+    'ì': 0,
+    'í': 0,
+    'î': 0,
+    'ï': 0,
+    'ð': 0,
+    'ñ': 0,
+    'ò': 0,
+    'ó': 0,
+    'ô': 0,
+    'õ': 0,
+    'ö': 0,
+    '÷': 0,
+    'ø': 0,
+    'ù': 0,
+    'ú': 0,
+    'û': 0,
+    'ü': 0,
+    'ý': 0,
+    'þ': 0,
+    'ÿ': 0,
+}
+
+def char_class(ch):
+    """Clase de un carácter fuera de CHAR_CLASSES: bisección sobre los intervalos."""
+    code = ord(ch)
+    i = bisect_right(CLASS_STARTS, code) - 1
+    class_id = CLASS_IDS[i] if i >= 0 and code <= CLASS_ENDS[i] else OTHER_CLASS
+    CHAR_CLASSES[ch] = class_id
+    return class_id
+
+NUM_COLUMNS = 40
+
+INITIAL_STATE = 1
+
+# Transiciones: TRANSITION_TABLE[estado * NUM_COLUMNS + clase] → estado (0 = muerto)
+TRANSITION_TABLE = array('i', [
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 2, 12, 13, 14, 15, 16, 17, 18, 19, 19, 2, 19, 20, 21, 22, 23, 19, 24, 19, 19, 19, 19, 25, 19, 19, 19, 26, 27, 28, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 3, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 29, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 30, 0, 13, 0, 0, 0, 0, 0, 0, 31, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 32, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 33, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 34, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 35, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 36, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 37, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 38, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 39, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 40, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 41, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 42, 0, 42, 0, 0, 43, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 44, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 45, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 46, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 47, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 48, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 49, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    40, 40, 50, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 40, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 41, 0, 0, 0, 0, 0, 0, 31, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 43, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 43, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 51, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 52, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 53, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 54, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 55, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 56, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 57, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 58, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 59, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 60, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 61, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 62, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 63, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 19, 0, 0, 0, 0, 0, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 0, 0, 0,
+])
+
+# Por estado: índice de la regla más prioritaria que acepta (-1 = no acepta)
+ACCEPT_RULE = array('i', [-1, -1, 29, 0, 2, 27, 17, 18, 15, 13, 19, 14, 16, 11, 21, 20, 22, 23, 24, 10, 10, 10, 10, 10, 10, 10, 10, 25, 26, -1, -1, -1, 12, 10, 10, 10, 10, 3, 10, 10, -1, 11, -1, 11, 10, 10, 10, 6, 10, 10, 1, 10, 10, 4, 10, 10, 8, 10, 10, 5, 10, 7, 10, 9])
+# Por estado: 1 si todavía puede llegar a aceptar
+LIVE = b'\x00\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01\x01'
+
+_RUN_0 = re.compile('[\\\t\\ ]*').match
+_RUN_1 = re.compile('[0-9A-Z_a-z]*').match
+# Primer carácter → (regla, racha): se resuelve sin recorrer el DFA.
+# regla None = el DFA no empieza con ese carácter (va a PUNCTUATIONS)
+FIRST_CHAR = {
+    '\x00': (29, None),
+    '\x01': (29, None),
+    '\x02': (29, None),
+    '\x03': (29, None),
+    '\x04': (29, None),
+    '\x05': (29, None),
+    '\x06': (29, None),
+    '\x07': (29, None),
+    '\x08': (29, None),
+    '\t': (0, _RUN_0),
+    '\n': (2, None),
+    '\x0b': (29, None),
+    '\x0c': (29, None),
+    '\r': (29, None),
+    '\x0e': (29, None),
+    '\x0f': (29, None),
+    '\x10': (29, None),
+    '\x11': (29, None),
+    '\x12': (29, None),
+    '\x13': (29, None),
+    '\x14': (29, None),
+    '\x15': (29, None),
+    '\x16': (29, None),
+    '\x17': (29, None),
+    '\x18': (29, None),
+    '\x19': (29, None),
+    '\x1a': (29, None),
+    '\x1b': (29, None),
+    '\x1c': (29, None),
+    '\x1d': (29, None),
+    '\x1e': (29, None),
+    '\x1f': (29, None),
+    ' ': (0, _RUN_0),
+    '!': (29, None),
+    '"': (29, None),
+    '$': (29, None),
+    '%': (29, None),
+    '&': (29, None),
+    "'": (29, None),
+    '(': (17, None),
+    ')': (18, None),
+    '*': (15, None),
+    '+': (13, None),
+    ',': (19, None),
+    '-': (14, None),
+    '.': (29, None),
+    '/': (16, None),
+    ';': (20, None),
+    '<': (22, None),
+    '=': (23, None),
+    '>': (24, None),
+    '?': (29, None),
+    '@': (29, None),
+    'A': (10, _RUN_1),
+    'B': (10, _RUN_1),
+    'C': (10, _RUN_1),
+    'D': (10, _RUN_1),
+    'E': (10, _RUN_1),
+    'F': (10, _RUN_1),
+    'G': (10, _RUN_1),
+    'H': (10, _RUN_1),
+    'I': (10, _RUN_1),
+    'J': (10, _RUN_1),
+    'K': (10, _RUN_1),
+    'L': (10, _RUN_1),
+    'M': (10, _RUN_1),
+    'N': (10, _RUN_1),
+    'O': (10, _RUN_1),
+    'P': (10, _RUN_1),
+    'Q': (10, _RUN_1),
+    'R': (10, _RUN_1),
+    'S': (10, _RUN_1),
+    'T': (10, _RUN_1),
+    'U': (10, _RUN_1),
+    'V': (10, _RUN_1),
+    'W': (10, _RUN_1),
+    'X': (10, _RUN_1),
+    'Y': (10, _RUN_1),
+    'Z': (10, _RUN_1),
+    '[': (29, None),
+    '\\': (29, None),
+    ']': (29, None),
+    '^': (29, None),
+    '_': (29, None),
+    '`': (29, None),
+    'a': (10, _RUN_1),
+    'd': (10, _RUN_1),
+    'g': (10, _RUN_1),
+    'h': (10, _RUN_1),
+    'j': (10, _RUN_1),
+    'k': (10, _RUN_1),
+    'l': (10, _RUN_1),
+    'm': (10, _RUN_1),
+    'n': (10, _RUN_1),
+    'o': (10, _RUN_1),
+    'p': (10, _RUN_1),
+    'q': (10, _RUN_1),
+    's': (10, _RUN_1),
+    't': (10, _RUN_1),
+    'u': (10, _RUN_1),
+    'v': (10, _RUN_1),
+    'x': (10, _RUN_1),
+    'y': (10, _RUN_1),
+    'z': (10, _RUN_1),
+    '{': (25, None),
+    '|': (29, None),
+    '}': (26, None),
+    '~': (29, None),
+    '\x7f': (29, None),
+    '\x80': (29, None),
+    '\x81': (29, None),
+    '\x82': (29, None),
+    '\x83': (29, None),
+    '\x84': (29, None),
+    '\x85': (29, None),
+    '\x86': (29, None),
+    '\x87': (29, None),
+    '\x88': (29, None),
+    '\x89': (29, None),
+    '\x8a': (29, None),
+    '\x8b': (29, None),
+    '\x8c': (29, None),
+    '\x8d': (29, None),
+    '\x8e': (29, None),
+    '\x8f': (29, None),
+    '\x90': (29, None),
+    '\x91': (29, None),
+    '\x92': (29, None),
+    '\x93': (29, None),
+    '\x94': (29, None),
+    '\x95': (29, None),
+    '\x96': (29, None),
+    '\x97': (29, None),
+    '\x98': (29, None),
+    '\x99': (29, None),
+    '\x9a': (29, None),
+    '\x9b': (29, None),
+    '\x9c': (29, None),
+    '\x9d': (29, None),
+    '\x9e': (29, None),
+    '\x9f': (29, None),
+    '\xa0': (29, None),
+    '¡': (29, None),
+    '¢': (29, None),
+    '£': (29, None),
+    '¤': (29, None),
+    '¥': (29, None),
+    '¦': (29, None),
+    '§': (29, None),
+    '¨': (29, None),
+    '©': (29, None),
+    'ª': (29, None),
+    '«': (29, None),
+    '¬': (29, None),
+    '\xad': (29, None),
+    '®': (29, None),
+    '¯': (29, None),
+    '°': (29, None),
+    '±': (29, None),
+    '²': (29, None),
+    '³': (29, None),
+    '´': (29, None),
+    'µ': (29, None),
+    '¶': (29, None),
+    '·': (29, None),
+    '¸': (29, None),
+    '¹': (29, None),
+    'º': (29, None),
+    '»': (29, None),
+    '¼': (29, None),
+    '½': (29, None),
+    '¾': (29, None),
+    '¿': (29, None),
+    'À': (29, None),
+    'Á': (29, None),
+    'Â': (29, None),
+    'Ã': (29, None),
+    'Ä': (29, None),
+    'Å': (29, None),
+    'Æ': (29, None),
+    'Ç': (29, None),
+    'È': (29, None),
+    'É': (29, None),
+    'Ê': (29, None),
+    'Ë': (29, None),
+    'Ì': (29, None),
+    'Í': (29, None),
+    'Î': (29, None),
+    'Ï': (29, None),
+    'Ð': (29, None),
+    'Ñ': (29, None),
+    'Ò': (29, None),
+    'Ó': (29, None),
+    'Ô': (29, None),
+    'Õ': (29, None),
+    'Ö': (29, None),
+    '×': (29, None),
+    'Ø': (29, None),
+    'Ù': (29, None),
+    'Ú': (29, None),
+    'Û': (29, None),
+    'Ü': (29, None),
+    'Ý': (29, None),
+    'Þ': (29, None),
+    'ß': (29, None),
+    'à': (29, None),
+    'á': (29, None),
+    'â': (29, None),
+    'ã': (29, None),
+    'ä': (29, None),
+    'å': (29, None),
+    'æ': (29, None),
+    'ç': (29, None),
+    'è': (29, None),
+    'é': (29, None),
+    'ê': (29, None),
+    'ë': (29, None),
+    'ì': (29, None),
+    'í': (29, None),
+    'î': (29, None),
+    'ï': (29, None),
+    'ð': (29, None),
+    'ñ': (29, None),
+    'ò': (29, None),
+    'ó': (29, None),
+    'ô': (29, None),
+    'õ': (29, None),
+    'ö': (29, None),
+    '÷': (29, None),
+    'ø': (29, None),
+    'ù': (29, None),
+    'ú': (29, None),
+    'û': (29, None),
+    'ü': (29, None),
+    'ý': (29, None),
+    'þ': (29, None),
+    'ÿ': (29, None),
+}
+
+# Por regla: tipo de token precalculado (None = se descarta el lexema)...
+RULE_TOKEN_TYPES = [
+    None,  # return None
+    None,  # return None
+    EOL,  # return EOL
+    IF,  # return (IF,       lexeme)
+    ELSE,  # return (ELSE,     lexeme)
+    WHILE,  # return (WHILE,    lexeme)
+    FOR,  # return (FOR,      lexeme)
+    RETURN,  # return (RETURN,   lexeme)
+    BREAK,  # return (BREAK,    lexeme)
+    CONTINUE,  # return (CONTINUE, lexeme)
+    ID,  # return (ID,       lexeme)
+    NUMBER,  # return (NUMBER,   lexeme)
+    ASSIGNOP,  # return (ASSIGNOP, lexeme)
+    PLUS,  # return (PLUS,     lexeme)
+    MINUS,  # return (MINUS,    lexeme)
+    TIMES,  # return (TIMES,    lexeme)
+    DIV,  # return (DIV,      lexeme)
+    LPAREN,  # return (LPAREN,   lexeme)
+    RPAREN,  # return (RPAREN,   lexeme)
+    COMMA,  # return (COMMA,    lexeme)
+    SEMICOLON,  # return (SEMICOLON,lexeme)
+    COLON,  # return (COLON,    lexeme)
+    LT,  # return (LT,       lexeme)
+    EQ,  # return (EQ,       lexeme)
+    GT,  # return (GT,       lexeme)
+    LBRACE,  # return (LBRACE,   lexeme)
+    RBRACE,  # return (RBRACE,   lexeme)
+    HASH,  # return (HASH,     lexeme)
+    EOF,  # return (EOF,      lexeme)
+    SYMBOL,  # return (SYMBOL,   lexeme)
+]
+
+# ...o la función de la acción cuando no es constante
+RULE_FUNCTIONS = [
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+    None,
+]
+
+# Tamaño de bloque por defecto de iter_tokens
+CHUNK_SIZE = 1 << 16
+
+def refill(stream, decoder, chunk_size, text, pos):
+    """
+    Descarta lo ya consumido del buffer y le añade el siguiente bloque del
+    archivo; los bloques binarios se decodifican en UTF-8 de forma incremental.
+    Devuelve (texto, pos, fin, eof).
+    """
+    chunk = stream.read(chunk_size)
+    eof = not chunk
+    if isinstance(chunk, bytes):
+        chunk = decoder.decode(chunk, final=eof)
+    text = text[pos:] + chunk
+    return text, 0, len(text), eof
+
+
+def make_trace(trace):
+    """
+    Convierte el destino de la traza en una función trace(tipo, lexema):
+      None            → sin traza (se usa el bucle sin ganchos)
+      logging.Logger  → logger.debug por token
+      objeto con write → escritura en el archivo (usa su propio buffer)
+      callable        → se usa tal cual
+    """
+    if trace is None:
+        return None
+    if isinstance(trace, logging.Logger):
+        return lambda tok_type, lexeme: trace.debug('⟶ Token: %r, lexema: %r', tok_type, lexeme)
+    if hasattr(trace, 'write'):
+        write = trace.write
+        return lambda tok_type, lexeme: write(f'⟶ Token: {tok_type!r}, lexema: {lexeme!r}\n')
+    if callable(trace):
+        return trace
+    raise TypeError(f'Destino de traza no soportado: {trace!r}')
+
+
 class Lexer:
-    def __init__(self, input_text):
+    def __init__(self, input_text='', trace=None):
         self.input_text = input_text
         self.pos = 0
+        # Destino de la traza de tokens; None = silencioso
+        self.trace = make_trace(trace)
 
     def get_tokens(self):
+        if self.trace is None:
+            return self._scan()
+        return self._scan_traced(self.trace)
+
+    def _scan(self):
         tokens = []
         text = self.input_text
         pos = 0
-        while pos < len(text):
-            m = re.match(r'\d+\.\d+(?:[eE][+-]?\d+)?', text[pos:])
-            if m:
-                lexeme = m.group(0)
-                tokens.append((NUMBER, lexeme))
-                print(f'⟶ Token: {NUMBER!r}, lexema: {lexeme!r}')
-                pos += len(lexeme)
-                continue
-            longest_match = 0
-            selected_rule = None
-            for rule in self.rules:
-                ml = rule['dfa'].match_prefix(text[pos:])
-                if ml > longest_match:
-                    longest_match = ml
-                    selected_rule = rule
-            if longest_match > 1:
+        end = len(text)
+        while pos < end:
+            dispatch = FIRST_CHAR.get(text[pos])
+            if dispatch is None:
+                m = SCIENTIFIC_NUMBER.match(text, pos)
+                if m:
+                    lexeme = m.group(0)
+                    tokens.append((NUMBER, lexeme))
+                    pos = m.end()
+                    continue
+                longest_match, rule, _ = self.longest_match(text, pos, end)
+            else:
+                rule, run = dispatch
+                if run is None:
+                    longest_match = 0 if rule is None else 1
+                else:
+                    stop = run(text, pos + 1, end).end()
+                    longest_match = stop - pos
+            if longest_match > 0:
                 lexeme = text[pos:pos+longest_match]
-                action_code = selected_rule['action']
-                local_env = {'lexeme': lexeme, 'text': text}
-                exec(action_code.replace('return', 'token ='), globals(), local_env)
-                tok = local_env.get('token')
-                if tok is not None:
-                    # si la acción ya devolvió (TOKEN, lexeme), lo usamos directamente
-                    if isinstance(tok, tuple):
-                        tokens.append(tok)
-                    else:
-                        tokens.append((tok, lexeme))
-                    print(f'⟶ Token: {tok!r}, lexema: {lexeme!r}')
+                action = RULE_FUNCTIONS[rule]
+                if action is None:
+                    tok_type = RULE_TOKEN_TYPES[rule]
+                    if tok_type is not None:
+                        tokens.append((tok_type, lexeme))
+                else:
+                    tok = action(lexeme, text)
+                    if tok is not None:
+                        # si la acción ya devolvió (TOKEN, lexeme), lo usamos directamente
+                        if not isinstance(tok, tuple):
+                            tok = (tok, lexeme)
+                        tokens.append((tok[0], tok[1]))
                 pos += longest_match
                 continue
-            if longest_match == 1:
-                lexeme = text[pos]
-                action_code = selected_rule['action']
-                local_env = {'lexeme': lexeme, 'text': text}
-                exec(action_code.replace('return', 'token ='), globals(), local_env)
-                tok = local_env.get('token')
-                if tok is not None:
-                    # si la acción ya devolvió (TOKEN, lexeme), lo usamos directamente
-                    if isinstance(tok, tuple):
-                        tokens.append(tok)
-                    else:
-                        tokens.append((tok, lexeme))
-                    print(f'⟶ Token: {tok!r}, lexema: {lexeme!r}')
+            ch = text[pos]
+            mapped = PUNCTUATIONS.get(ch)
+            if mapped is not None:
+                tokens.append((mapped, ch))
                 pos += 1
                 continue
+            # Carácter no declarado en la gramática: lo marcamos como UNKNOWN y continuamos
+            tokens.append((None, ch))
+            pos += 1
+        tokens.append((EOF, ''))
+        return tokens
+
+    def _scan_traced(self, trace):
+        tokens = []
+        text = self.input_text
+        pos = 0
+        end = len(text)
+        while pos < end:
+            dispatch = FIRST_CHAR.get(text[pos])
+            if dispatch is None:
+                m = SCIENTIFIC_NUMBER.match(text, pos)
+                if m:
+                    lexeme = m.group(0)
+                    tokens.append((NUMBER, lexeme))
+                    trace(NUMBER, lexeme)
+                    pos = m.end()
+                    continue
+                longest_match, rule, _ = self.longest_match(text, pos, end)
+            else:
+                rule, run = dispatch
+                if run is None:
+                    longest_match = 0 if rule is None else 1
+                else:
+                    stop = run(text, pos + 1, end).end()
+                    longest_match = stop - pos
+            if longest_match > 0:
+                lexeme = text[pos:pos+longest_match]
+                action = RULE_FUNCTIONS[rule]
+                if action is None:
+                    tok_type = RULE_TOKEN_TYPES[rule]
+                    if tok_type is not None:
+                        tokens.append((tok_type, lexeme))
+                        trace(tok_type, lexeme)
+                else:
+                    tok = action(lexeme, text)
+                    if tok is not None:
+                        # si la acción ya devolvió (TOKEN, lexeme), lo usamos directamente
+                        if not isinstance(tok, tuple):
+                            tok = (tok, lexeme)
+                        tokens.append((tok[0], tok[1]))
+                        trace(tok[0], tok[1])
+                pos += longest_match
+                continue
             ch = text[pos]
             mapped = PUNCTUATIONS.get(ch)
             if mapped is not None:
                 tokens.append((mapped, ch))
-                print(f'⟶ Token: {mapped!r}, lexema: {ch!r}')
+                trace(mapped, ch)
                 pos += 1
                 continue
             # Carácter no declarado en la gramática: lo marcamos como UNKNOWN y continuamos
-            ch = text[pos]
-            print(f"⟶ Token no reconocido: {ch!r} en posición {pos}")
-            tokens.append((None, ch))  # None indica token no reconocido
+            tokens.append((None, ch))
+            trace(None, ch)
             pos += 1
-            continue
         tokens.append((EOF, ''))
         return tokens
 
-    @property
-    def rules(self):
-        rules = []
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: (([\  \\t])+)
-        parser = RegexParser('(([\\  \\\\t])+)' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '(([\\  \\\\t])+)', 'action': 'return None', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: \#\#\#.*[\n]
-        parser = RegexParser('\\#\\#\\#.*[\\n]' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '\\#\\#\\#.*[\\n]', 'action': 'return None', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: \n
-        parser = RegexParser('\\n' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '\\n', 'action': 'return EOL', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: if
-        parser = RegexParser('if' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': 'if', 'action': 'return (IF,       lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: else
-        parser = RegexParser('else' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': 'else', 'action': 'return (ELSE,     lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: while
-        parser = RegexParser('while' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': 'while', 'action': 'return (WHILE,    lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: for
-        parser = RegexParser('for' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': 'for', 'action': 'return (FOR,      lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: return
-        parser = RegexParser('return' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': 'return', 'action': 'return (RETURN,   lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: break
-        parser = RegexParser('break' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': 'break', 'action': 'return (BREAK,    lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: continue
-        parser = RegexParser('continue' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': 'continue', 'action': 'return (CONTINUE, lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: (([A-Za-z]) ((([A-Za-z]) | ([0-9]) | _))*)
-        parser = RegexParser('(([A-Za-z]) ((([A-Za-z]) | ([0-9]) | _))*)' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '(([A-Za-z]) ((([A-Za-z]) | ([0-9]) | _))*)', 'action': 'return (ID,       lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: (([0-9])+(\.([0-9])+)?(E(\+|\-)?([0-9])+)?)
-        parser = RegexParser('(([0-9])+(\\.([0-9])+)?(E(\\+|\\-)?([0-9])+)?)' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '(([0-9])+(\\.([0-9])+)?(E(\\+|\\-)?([0-9])+)?)', 'action': 'return (NUMBER,   lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: :=
-        parser = RegexParser(':=' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': ':=', 'action': 'return (ASSIGNOP, lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: \+
-        parser = RegexParser('\\+' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '\\+', 'action': 'return (PLUS,     lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: \-
-        parser = RegexParser('\\-' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '\\-', 'action': 'return (MINUS,    lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: \*
-        parser = RegexParser('\\*' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '\\*', 'action': 'return (TIMES,    lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: /
-        parser = RegexParser('/' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '/', 'action': 'return (DIV,      lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: \(
-        parser = RegexParser('\\(' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '\\(', 'action': 'return (LPAREN,   lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: \)
-        parser = RegexParser('\\)' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '\\)', 'action': 'return (RPAREN,   lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: ,
-        parser = RegexParser(',' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': ',', 'action': 'return (COMMA,    lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: ;
-        parser = RegexParser(';' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': ';', 'action': 'return (SEMICOLON,lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: :
-        parser = RegexParser(':' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': ':', 'action': 'return (COLON,    lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: <
-        parser = RegexParser('<' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '<', 'action': 'return (LT,       lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: =
-        parser = RegexParser('=' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '=', 'action': 'return (EQ,       lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: >
-        parser = RegexParser('>' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '>', 'action': 'return (GT,       lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: \{
-        parser = RegexParser('\\{' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '\\{', 'action': 'return (LBRACE,   lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: \}
-        parser = RegexParser('\\}' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '\\}', 'action': 'return (RBRACE,   lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: \#
-        parser = RegexParser('\\#' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '\\#', 'action': 'return (HASH,     lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: eof
-        parser = RegexParser('eof' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': 'eof', 'action': 'return (EOF,      lexeme)', 'dfa': dfa})
-        from lexer.src.models.regex_parser import RegexParser
-        from lexer.src.models.syntax_tree import SyntaxTree
-        from lexer.src.models.dfa import DFA
-        # Regla: .
-        parser = RegexParser('.' + '#')
-        parser.tokenize()
-        postfix = parser.to_postfix()
-        syntax_tree = SyntaxTree(postfix)
-        dfa = DFA(syntax_tree)
-        rules.append({'regex': '.', 'action': 'return (SYMBOL,   lexeme)', 'dfa': dfa})
-        return rules
+    def iter_tokens(self, stream, chunk_size=CHUNK_SIZE):
+        """
+        Genera los tokens de un archivo de texto o binario (UTF-8) leyéndolo por
+        bloques de chunk_size, con memoria acotada al token más largo más un bloque.
+        Las acciones reciben como 'text' la ventana actual del buffer.
+        """
+        if self.trace is None:
+            return self._iter_scan(stream, chunk_size)
+        return self._iter_scan_traced(stream, chunk_size, self.trace)
+
+    def _iter_scan(self, stream, chunk_size):
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        text = ''
+        pos = end = 0
+        eof = False
+        while True:
+            if pos == end:
+                if eof:
+                    break
+                text, pos, end, eof = refill(stream, decoder, chunk_size, text, pos)
+                continue
+            if not eof:
+                m = SCIENTIFIC_PREFIX.match(text, pos)
+                if m and m.end() == end:
+                    text, pos, end, eof = refill(stream, decoder, chunk_size, text, pos)
+                    continue
+            dispatch = FIRST_CHAR.get(text[pos])
+            if dispatch is None:
+                m = SCIENTIFIC_NUMBER.match(text, pos)
+                if m:
+                    lexeme = m.group(0)
+                    yield (NUMBER, lexeme)
+                    pos = m.end()
+                    continue
+                longest_match, rule, stop = self.longest_match(text, pos, end)
+                if stop == end and not eof:
+                    text, pos, end, eof = refill(stream, decoder, chunk_size, text, pos)
+                    continue
+            else:
+                rule, run = dispatch
+                if run is None:
+                    longest_match = 0 if rule is None else 1
+                else:
+                    stop = run(text, pos + 1, end).end()
+                    if stop == end and not eof:
+                        text, pos, end, eof = refill(stream, decoder, chunk_size, text, pos)
+                        continue
+                    longest_match = stop - pos
+            if longest_match > 0:
+                lexeme = text[pos:pos+longest_match]
+                action = RULE_FUNCTIONS[rule]
+                if action is None:
+                    tok_type = RULE_TOKEN_TYPES[rule]
+                    if tok_type is not None:
+                        yield (tok_type, lexeme)
+                else:
+                    tok = action(lexeme, text)
+                    if tok is not None:
+                        # si la acción ya devolvió (TOKEN, lexeme), lo usamos directamente
+                        if not isinstance(tok, tuple):
+                            tok = (tok, lexeme)
+                        yield (tok[0], tok[1])
+                pos += longest_match
+                continue
+            ch = text[pos]
+            mapped = PUNCTUATIONS.get(ch)
+            if mapped is not None:
+                yield (mapped, ch)
+                pos += 1
+                continue
+            # Carácter no declarado en la gramática: lo marcamos como UNKNOWN y continuamos
+            yield (None, ch)
+            pos += 1
+        yield (EOF, '')
+
+    def _iter_scan_traced(self, stream, chunk_size, trace):
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        text = ''
+        pos = end = 0
+        eof = False
+        while True:
+            if pos == end:
+                if eof:
+                    break
+                text, pos, end, eof = refill(stream, decoder, chunk_size, text, pos)
+                continue
+            if not eof:
+                m = SCIENTIFIC_PREFIX.match(text, pos)
+                if m and m.end() == end:
+                    text, pos, end, eof = refill(stream, decoder, chunk_size, text, pos)
+                    continue
+            dispatch = FIRST_CHAR.get(text[pos])
+            if dispatch is None:
+                m = SCIENTIFIC_NUMBER.match(text, pos)
+                if m:
+                    lexeme = m.group(0)
+                    yield (NUMBER, lexeme)
+                    trace(NUMBER, lexeme)
+                    pos = m.end()
+                    continue
+                longest_match, rule, stop = self.longest_match(text, pos, end)
+                if stop == end and not eof:
+                    text, pos, end, eof = refill(stream, decoder, chunk_size, text, pos)
+                    continue
+            else:
+                rule, run = dispatch
+                if run is None:
+                    longest_match = 0 if rule is None else 1
+                else:
+                    stop = run(text, pos + 1, end).end()
+                    if stop == end and not eof:
+                        text, pos, end, eof = refill(stream, decoder, chunk_size, text, pos)
+                        continue
+                    longest_match = stop - pos
+            if longest_match > 0:
+                lexeme = text[pos:pos+longest_match]
+                action = RULE_FUNCTIONS[rule]
+                if action is None:
+                    tok_type = RULE_TOKEN_TYPES[rule]
+                    if tok_type is not None:
+                        yield (tok_type, lexeme)
+                        trace(tok_type, lexeme)
+                else:
+                    tok = action(lexeme, text)
+                    if tok is not None:
+                        # si la acción ya devolvió (TOKEN, lexeme), lo usamos directamente
+                        if not isinstance(tok, tuple):
+                            tok = (tok, lexeme)
+                        yield (tok[0], tok[1])
+                        trace(tok[0], tok[1])
+                pos += longest_match
+                continue
+            ch = text[pos]
+            mapped = PUNCTUATIONS.get(ch)
+            if mapped is not None:
+                yield (mapped, ch)
+                trace(mapped, ch)
+                pos += 1
+                continue
+            # Carácter no declarado en la gramática: lo marcamos como UNKNOWN y continuamos
+            yield (None, ch)
+            trace(None, ch)
+            pos += 1
+        yield (EOF, '')
+
+    def get_token_buffer(self):
+        """
+        Igual que get_tokens, pero devuelve un TokenBuffer compacto (tipo + offsets)
+        cuyos lexemas se cortan del texto sólo al accederlos.
+        """
+        if self.trace is None:
+            return self._scan_buffer()
+        return self._scan_buffer_traced(self.trace)
+
+    def _scan_buffer(self):
+        tokens = TokenBuffer(self.input_text)
+        append = tokens.append
+        text = self.input_text
+        pos = 0
+        end = len(text)
+        while pos < end:
+            dispatch = FIRST_CHAR.get(text[pos])
+            if dispatch is None:
+                m = SCIENTIFIC_NUMBER.match(text, pos)
+                if m:
+                    append(NUMBER, pos, m.end())
+                    pos = m.end()
+                    continue
+                longest_match, rule, _ = self.longest_match(text, pos, end)
+            else:
+                rule, run = dispatch
+                if run is None:
+                    longest_match = 0 if rule is None else 1
+                else:
+                    stop = run(text, pos + 1, end).end()
+                    longest_match = stop - pos
+            if longest_match > 0:
+                action = RULE_FUNCTIONS[rule]
+                if action is None:
+                    tok_type = RULE_TOKEN_TYPES[rule]
+                    if tok_type is not None:
+                        append(tok_type, pos, pos+longest_match)
+                else:
+                    lexeme = text[pos:pos+longest_match]
+                    tok = action(lexeme, text)
+                    if tok is not None:
+                        # si la acción ya devolvió (TOKEN, lexeme), lo usamos directamente
+                        if not isinstance(tok, tuple):
+                            tok = (tok, lexeme)
+                        if tok[1] == lexeme:
+                            append(tok[0], pos, pos+longest_match)
+                        else:
+                            append(tok[0], pos, pos+longest_match, tok[1])
+                pos += longest_match
+                continue
+            ch = text[pos]
+            mapped = PUNCTUATIONS.get(ch)
+            if mapped is not None:
+                append(mapped, pos, pos+1)
+                pos += 1
+                continue
+            # Carácter no declarado en la gramática: lo marcamos como UNKNOWN y continuamos
+            append(None, pos, pos+1)
+            pos += 1
+        append(EOF, end, end)
+        return tokens
+
+    def _scan_buffer_traced(self, trace):
+        tokens = TokenBuffer(self.input_text)
+        append = tokens.append
+        text = self.input_text
+        pos = 0
+        end = len(text)
+        while pos < end:
+            dispatch = FIRST_CHAR.get(text[pos])
+            if dispatch is None:
+                m = SCIENTIFIC_NUMBER.match(text, pos)
+                if m:
+                    lexeme = m.group(0)
+                    append(NUMBER, pos, m.end())
+                    trace(NUMBER, lexeme)
+                    pos = m.end()
+                    continue
+                longest_match, rule, _ = self.longest_match(text, pos, end)
+            else:
+                rule, run = dispatch
+                if run is None:
+                    longest_match = 0 if rule is None else 1
+                else:
+                    stop = run(text, pos + 1, end).end()
+                    longest_match = stop - pos
+            if longest_match > 0:
+                lexeme = text[pos:pos+longest_match]
+                action = RULE_FUNCTIONS[rule]
+                if action is None:
+                    tok_type = RULE_TOKEN_TYPES[rule]
+                    if tok_type is not None:
+                        append(tok_type, pos, pos+longest_match)
+                        trace(tok_type, lexeme)
+                else:
+                    tok = action(lexeme, text)
+                    if tok is not None:
+                        # si la acción ya devolvió (TOKEN, lexeme), lo usamos directamente
+                        if not isinstance(tok, tuple):
+                            tok = (tok, lexeme)
+                        if tok[1] == lexeme:
+                            append(tok[0], pos, pos+longest_match)
+                            trace(tok[0], tok[1])
+                        else:
+                            append(tok[0], pos, pos+longest_match, tok[1])
+                            trace(tok[0], tok[1])
+                pos += longest_match
+                continue
+            ch = text[pos]
+            mapped = PUNCTUATIONS.get(ch)
+            if mapped is not None:
+                append(mapped, pos, pos+1)
+                trace(mapped, ch)
+                pos += 1
+                continue
+            # Carácter no declarado en la gramática: lo marcamos como UNKNOWN y continuamos
+            append(None, pos, pos+1)
+            trace(None, ch)
+            pos += 1
+        append(EOF, end, end)
+        return tokens
+
+    def longest_match(self, text, start, end):
+        # Tablas en variables locales: un índice y una carga de array por carácter
+        table, columns, live, accept_rule = TRANSITION_TABLE, NUM_COLUMNS, LIVE, ACCEPT_RULE
+        char_classes = CHAR_CLASSES.get
+        state = INITIAL_STATE
+        last_accept_pos = start
+        accepted_rule = None
+        pos = start
+        while pos < end:
+            ch = text[pos]
+            class_id = char_classes(ch)
+            if class_id is None:
+                class_id = char_class(ch)
+            state = table[state * columns + class_id]
+            if not live[state]:
+                break
+            pos += 1
+            rule = accept_rule[state]
+            if rule >= 0:
+                last_accept_pos = pos
+                accepted_rule = rule
+        if accepted_rule is None:
+            return 0, None, pos
+        return last_accept_pos - start, accepted_rule, pos
 
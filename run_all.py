@@ -74,7 +74,12 @@ def regenerate_parser(
 # ------------------------------------------------------------------
 # 3) Tokenizar el archivo fuente usando lexer/thelexer.py
 # ------------------------------------------------------------------
-def tokenize_source(source_path):
+def tokenize_source(source_path, trace_tokens=None, show_tokens=False):
+    """
+    trace_tokens: None (sin traza), "-" (traza en stdout) o ruta de archivo
+                  donde el lexer escribe cada token reconocido.
+    show_tokens:  imprime la lista completa de tokens tras el análisis léxico.
+    """
     thelexer_path = os.path.join(project_root, "lexer", "thelexer.py")
     if not os.path.isfile(thelexer_path):
         print(f"Error: no encontré thelexer.py en {thelexer_path}")
@@ -90,22 +95,35 @@ def tokenize_source(source_path):
         source_code = f.read()
 
     print(f"→ Tokenizando el archivo fuente: {source_path}")
+    # Por defecto el lexer es silencioso; la traza se escribe con buffer
+    trace_file = None
+    if trace_tokens == "-":
+        trace_file = sys.stdout
+    elif trace_tokens:
+        trace_file = open(trace_tokens, "w", encoding="utf-8")
     try:
-        lexer = Lexer(source_code)
+        lexer = Lexer(source_code, trace=trace_file)
         token_tuples = lexer.get_tokens()
     except Exception as e:
         # Si ocurriera cualquier excepción en el lexer, sólo mostramos un mensaje conciso
         print("[Lexical Error]:", e)
         sys.exit(2)
+    finally:
+        if trace_file is not None and trace_file is not sys.stdout:
+            trace_file.close()
 
-    print("\n[DEBUG-LEXER] Tokens generados por el lexer (incluye WS/EOF):")
-    for idx, (ttype, lexeme) in enumerate(token_tuples):
-        print(f"  {idx:3}: (\"{ttype}\", \"{lexeme}\")")
-    print("[/DEBUG-LEXER]\n")
+    if show_tokens:
+        print("\n[DEBUG-LEXER] Tokens generados por el lexer (incluye WS/EOF):")
+        for idx, (ttype, lexeme) in enumerate(token_tuples):
+            print(f"  {idx:3}: (\"{ttype}\", \"{lexeme}\")")
+        print("[/DEBUG-LEXER]\n")
 
     # Filtrar tokens IGNORE (por ejemplo, WS)
     filtered = [(t, l) for (t, l) in token_tuples if t != "WS"]
-    print(f"   Tokens filtrados ({len(filtered)}): {filtered}\n")
+    if show_tokens:
+        print(f"   Tokens filtrados ({len(filtered)}): {filtered}\n")
+    else:
+        print(f"   Tokens generados: {len(filtered)}\n")
     return filtered
 
 
@@ -248,6 +266,9 @@ def main():
     parser.add_argument("--show-automaton",    action="store_true", help="Muestra autómata LR(0)")
     parser.add_argument("--show-tables",       action="store_true", help="Muestra ACTION/GOTO")
     parser.add_argument("--show-parse",        action="store_true", help="Muestra traza shift/reduce")
+    parser.add_argument("--show-tokens",       action="store_true", help="Muestra la lista de tokens del lexer")
+    parser.add_argument("--trace-tokens",      nargs="?", const="-", default=None, metavar="ARCHIVO",
+                        help="Traza cada token del lexer en ARCHIVO (o stdout si se omite)")
 
     args = parser.parse_args()
     grammar_file = args.grammar_file
@@ -292,7 +313,9 @@ def main():
     '''
 
     # 3) Tokenizar el código fuente
-    token_list = tokenize_source(source_file)
+    token_list = tokenize_source(source_file,
+                                 trace_tokens=args.trace_tokens,
+                                 show_tokens=args.show_tokens)
 
     # 4) Si piden traza, generarla con los tokens obtenidos
     if args.show_parse:
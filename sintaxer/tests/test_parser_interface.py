@@ -35,3 +35,14 @@ def test_parse_rejects_unexpected_token_without_eof():
     with pytest.raises(SyntaxError) as excinfo:
         parse(tokens, action, goto, productions, start_symbol='S')
     assert 'unexpected token' in str(excinfo.value).lower()
+
+def test_parse_accepts_token_buffer():
+    """El TokenBuffer compacto del lexer se consume igual que una lista."""
+    from lexer.src.runtime.token_buffer import TokenBuffer
+    tokens = TokenBuffer("a")
+    tokens.append('a', 0, 1)
+    parse(tokens, action, goto, productions, start_symbol='S')
+    bad = TokenBuffer("b")
+    bad.append('b', 0, 1)
+    with pytest.raises(SyntaxError):
+        parse(bad, action, goto, productions, start_symbol='S')